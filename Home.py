@@ -1,17 +1,21 @@
 import streamlit as st
 
+from utils.profiling import finish_page_profile, profile_section, start_page_profile
+
 # — App config —
 st.set_page_config(
     page_title="UNICEF Cyclone Impact Explorer",
     page_icon="🌪️",
     layout="wide"
 )
+start_page_profile("Home")
 
 # Welcome Page
 st.title("Welcome to UNICEF Cyclone Impact Explorer 🌪️")
 
 # Introduction
-st.markdown("""
+with profile_section("render introduction"):
+    st.markdown("""
 ### About This Tool
 This interactive platform helps analyze and understand cyclone impacts, with a focus on child-centric risk assessment and preparedness planning.
 
@@ -47,4 +51,6 @@ with col2:
     st.warning("**Risk Assessment**\n\nEvaluate current vulnerabilities and exposure levels.")
 
 with col3:
-    st.success("**Future Planning**\n\nModel potential scenarios and plan for resilience.") 
\ No newline at end of file
+    st.success("**Future Planning**\n\nModel potential scenarios and plan for resilience.")
+
+finish_page_profile()
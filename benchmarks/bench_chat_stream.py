@@ -0,0 +1,58 @@
+"""Measure chat streaming latency against the local OpenAI-compatible stub.
+
+    python benchmarks/bench_chat_stream.py [--turns 10] [--base-url URL]
+
+Without --base-url an in-process stub is started. Records time-to-first-token
+and tokens/s per turn.
+"""
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.chat import budget_history, get_client, stream_chat  # noqa: E402
+from utils.openai_stub import start_stub_server  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--base-url")
+    parser.add_argument("--api-key", default="sk-local-stub")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = start_stub_server(token_delay=args.token_delay, first_token_delay=0.05)
+    client = get_client(args.api_key, base_url=base_url)
+
+    history, turns = [], []
+    for turn in range(args.turns):
+        history.append({"role": "user", "content": f"Question {turn}: which early actions fit a 72-hour lead time?"})
+        metrics = {}
+        reply = "".join(stream_chat(client, budget_history(history), metrics))
+        history.append({"role": "assistant", "content": reply})
+        turns.append(metrics)
+        print(f"turn {turn}: ttft {metrics['ttft_s'] * 1000:.0f} ms, {metrics['tokens_per_s']:.0f} tokens/s")
+
+    result = {
+        "benchmark": "chat.stream_chat",
+        "base_url": base_url,
+        "turns": turns,
+        "median_ttft_s": statistics.median(t["ttft_s"] for t in turns),
+        "median_tokens_per_s": statistics.median(t["tokens_per_s"] for t in turns),
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / "chat_stream.json", 'w') as f:
+        json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""Time the hot paths each page relies on, on seeded production-scale fixtures.
+
+    python benchmarks/bench_engines.py [--scale full|quick] [--repeat 5] [--only tracks timeline]
+    python benchmarks/bench_engines.py --compare benchmarks/results/engines-previous.json
+
+Fixtures are generated once per scale/seed under benchmarks/results/fixtures.
+Results go to benchmarks/results/engines.json (or --output) with run metadata,
+so two runs can be compared with --compare.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import rasterio  # noqa: E402
+
+import fixtures  # noqa: E402
+from utils.anomaly import AnomalyDetector  # noqa: E402
+from utils.boundaries import BoundaryStore  # noqa: E402
+from utils.facilities import FacilityIndex  # noqa: E402
+from utils.monitoring import StreamBuffer, STREAMS  # noqa: E402
+from utils.retrieval import build_pdf_index  # noqa: E402
+from utils.timeline import HORIZONS, load_events  # noqa: E402
+from utils.tracks import ingest, load_index, load_track, read_track_file  # noqa: E402
+from utils.windfield import max_wind_footprint  # noqa: E402
+from utils.zonal import footprint_hazard, zonal_exposure  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SCALES = {
+    # adm4 units, storm tracks, monitoring entities x hours, timeline events, PDF pages, population grid (deg),
+    # schools and health facilities
+    "full": {"polygons": 5000, "tracks": 150, "entities": 10_000, "hours": 24 * 60, "events": 100_000, "pages": 300,
+             "resolution": 1 / 1200, "facilities": 120_000},
+    "quick": {"polygons": 500, "tracks": 20, "entities": 1000, "hours": 24 * 7, "events": 10_000, "pages": 30,
+              "resolution": 1 / 240, "facilities": 10_000},
+}
+
+
+def measure(fn, repeat, setup=None):
+    """Median/min/max wall time of ``fn(setup())`` over ``repeat`` runs (setup untimed)"""
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "repeat": repeat,
+    }
+
+
+def bench_boundaries(scale, fixture_dir, repeat):
+    base = fixture_dir / "boundaries"
+    path = base / "adm4.geojson"
+    if not path.exists():
+        fixtures.write_admin_geojson(fixtures.admin_polygons(scale["polygons"], seed=scale["seed"]), path)
+    results = {
+        "boundaries.load_cold": measure(lambda store: store.get("Admin Level 4"), repeat,
+                                        setup=lambda: BoundaryStore(base_path=base)),
+        "boundaries.fixture": {"units": scale["polygons"], "mb": path.stat().st_size / 1e6},
+    }
+    store = BoundaryStore(base_path=base)
+    store.get("Admin Level 4")
+    results["boundaries.get_warm"] = measure(lambda: store.get("Admin Level 4", zoom=6), repeat)
+    return results
+
+
+def bench_tracks(scale, fixture_dir, repeat):
+    source_dir = fixture_dir / "tracks"
+    paths = sorted(source_dir.glob("*_track.csv")) or fixtures.storm_tracks(source_dir, scale["tracks"], seed=scale["seed"])
+    catalog = fixture_dir / "catalog"
+    results = {"tracks.ingest": measure(lambda: ingest(paths, catalog), 1)}
+    index = load_index(catalog)
+    results["tracks.load_index"] = measure(lambda: load_index(catalog), repeat)
+    results["tracks.load_one"] = measure(lambda: load_track(index.index[0], catalog, index=index), repeat)
+    results["tracks.load_all_one_by_one"] = measure(
+        lambda: [load_track(sid, catalog, index=index) for sid in index.index], repeat)
+    results["tracks.read_csv_all"] = measure(lambda: [read_track_file(p) for p in paths], repeat)
+    return results
+
+
+def bench_monitoring(scale, repeat):
+    spec = STREAMS["shelter"]
+    frame = fixtures.monitoring_frame("shelter", scale["entities"], scale["hours"], seed=scale["seed"])
+    results = {
+        "monitoring.groupby_last": measure(
+            lambda: frame.groupby(spec.entity, observed=True)["occupancy"].last(), repeat),
+        "monitoring.fixture": {"rows": len(frame), "entities": scale["entities"], "hours": scale["hours"]},
+    }
+
+    # Feed the store a day at a time, as the page would over weeks of operation
+    day = scale["entities"] * 24
+    buffer = StreamBuffer(spec)
+    start = time.perf_counter()
+    for offset in range(0, len(frame), day):
+        buffer.append(frame.iloc[offset:offset + day])
+    results["monitoring.store_append_all"] = {"total_s": time.perf_counter() - start, "batches": -(-len(frame) // day)}
+    results["monitoring.store_latest"] = measure(lambda: buffer.latest()["occupancy"], repeat)
+
+    detector = AnomalyDetector()
+    hour = scale["entities"]
+    for offset in range(0, 48 * hour, hour):
+        detector.process("shelter", frame.iloc[offset:offset + hour])
+    batches = iter(range(48 * hour, len(frame), hour))
+    results["anomaly.process_hour"] = measure(
+        lambda offset: detector.process("shelter", frame.iloc[offset:offset + hour]), repeat,
+        setup=lambda: next(batches))
+    return results
+
+
+def bench_timeline(scale, fixture_dir, repeat):
+    df = fixtures.timeline_events(scale["events"], seed=scale["seed"])
+
+    def filters():
+        # The four horizon filters exactly as the Crisis Timeline page runs them
+        preparedness = df['Phase'] == 'Preparedness'
+        return (
+            df[preparedness & (df['Event'].str.contains('Seasonal'))],
+            df[preparedness & (df['Event'].str.contains('MJO|Risk Period'))],
+            df[preparedness & (df['Event'].str.contains('Track Forecast'))],
+            df[preparedness & (df['Event'].str.contains('Intensity|Surge'))],
+        )
+
+    # The same lookups through the indexed event store (tags computed once at load)
+    path = fixture_dir / f"events_{len(df)}.parquet"
+    if not path.exists():
+        df.to_parquet(path)
+    store = load_events(path)
+
+    def lookups():
+        return [store.latest(phase='Preparedness', horizon=h) for h in HORIZONS]
+
+    return {
+        "timeline.str_contains_filters": measure(filters, repeat),
+        "timeline.event_store_load": measure(lambda: load_events(path), repeat),
+        "timeline.event_store_lookups": measure(lookups, repeat),
+        "timeline.fixture": {"events": len(df), "storms": len(store.storms())},
+    }
+
+
+def bench_pdf(scale, fixture_dir, repeat):
+    path = fixture_dir / f"document_{scale['pages']}p.pdf"
+    if not path.exists():
+        fixtures.write_pdf(path, pages=scale["pages"], seed=scale["seed"])
+    from PyPDF2 import PdfReader
+
+    index = build_pdf_index(path)
+    return {
+        "pdf.extract_text": measure(lambda: [p.extract_text() for p in PdfReader(path).pages], repeat),
+        "pdf.build_index": measure(lambda: build_pdf_index(path), repeat),
+        "pdf.search": measure(lambda: index.search("cyclone landfall evacuation trigger", 5), repeat),
+        "pdf.fixture": {"pages": scale["pages"], "mb": path.stat().st_size / 1e6, "chunks": len(index)},
+    }
+
+
+def bench_zonal(scale, fixture_dir, repeat):
+    raster = fixture_dir / "population.tif"
+    if not raster.exists():
+        fixtures.population_raster(raster, resolution=scale["resolution"], seed=scale["seed"])
+    geoms = fixtures.admin_polygons(scale["polygons"], seed=scale["seed"])
+    properties = [{} for _ in geoms]
+    source_dir = fixture_dir / "tracks"
+    paths = sorted(source_dir.glob("*_track.csv")) or fixtures.storm_tracks(source_dir, scale["tracks"], seed=scale["seed"])
+    hazard = footprint_hazard(max_wind_footprint(read_track_file(paths[0])))
+    zones = fixture_dir / "zones"
+
+    def run():
+        return zonal_exposure(geoms, properties, raster, hazard, cache_dir=zones)
+
+    tracemalloc.start()
+    results = {"zonal.first_run_with_mask": measure(run, 1)}
+    results["zonal.peak_traced_mb"] = {"mb": tracemalloc.get_traced_memory()[1] / 1e6}
+    tracemalloc.stop()
+    results["zonal.cached_mask"] = measure(run, repeat)
+    with rasterio.open(raster) as dataset:
+        cells = dataset.width * dataset.height
+    results["zonal.fixture"] = {"cells": cells, "units": len(geoms), "mb": raster.stat().st_size / 1e6}
+    return results
+
+
+def bench_facilities(scale, fixture_dir, repeat):
+    facilities = fixtures.facilities(scale["facilities"], seed=scale["seed"])
+    source_dir = fixture_dir / "tracks"
+    paths = sorted(source_dir.glob("*_track.csv")) or fixtures.storm_tracks(source_dir, scale["tracks"], seed=scale["seed"])
+    track = read_track_file(paths[0])
+    index = FacilityIndex(facilities)
+    return {
+        "facilities.build_index": measure(lambda: FacilityIndex(facilities), repeat),
+        "facilities.within_100km": measure(lambda: index.pairs(track["lon"], track["lat"], 100.0), repeat),
+        "facilities.storm_exposure": measure(lambda: index.storm_exposure(track), repeat),
+        "facilities.fixture": {"facilities": len(facilities), "steps": len(track)},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path):
+    """Print the median-time ratio for every benchmark present in both runs"""
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)["results"]
+    print(f"\nCompared with {previous_path}:")
+    for name, result in current.items():
+        old = previous.get(name, {})
+        if "median_s" in result and "median_s" in old and old["median_s"] > 0:
+            ratio = result["median_s"] / old["median_s"]
+            print(f"  {name:<36} {ratio:5.2f}x {'slower' if ratio > 1 else 'faster'}")
+
+
+GROUPS = ("boundaries", "tracks", "monitoring", "timeline", "pdf", "zonal", "facilities")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="full")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="fixture seed, recorded with the results")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "engines.json")
+    parser.add_argument("--compare", type=Path, help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale], seed=args.seed)
+    fixture_dir = RESULTS_DIR / "fixtures" / f"{args.scale}-seed{args.seed}"
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+
+    runners = {
+        "boundaries": lambda: bench_boundaries(scale, fixture_dir, args.repeat),
+        "tracks": lambda: bench_tracks(scale, fixture_dir, args.repeat),
+        "monitoring": lambda: bench_monitoring(scale, args.repeat),
+        "timeline": lambda: bench_timeline(scale, fixture_dir, args.repeat),
+        "pdf": lambda: bench_pdf(scale, fixture_dir, args.repeat),
+        "zonal": lambda: bench_zonal(scale, fixture_dir, args.repeat),
+        "facilities": lambda: bench_facilities(scale, fixture_dir, args.repeat),
+    }
+    results = {}
+    for group in args.only:
+        print(f"Running {group}...")
+        results.update(runners[group]())
+
+    for name, result in results.items():
+        if "median_s" in result:
+            print(f"  {name:<36} median {result['median_s'] * 1000:9.1f} ms")
+        elif "total_s" in result:
+            print(f"  {name:<36} total  {result['total_s'] * 1000:9.1f} ms")
+
+    run = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"Saved {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
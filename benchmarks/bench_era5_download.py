@@ -0,0 +1,93 @@
+"""Measure chunked ERA5 retrieval against the local CDS stub.
+
+    python benchmarks/bench_era5_download.py [--dates 9] [--workers 4] [--latency 0.5] [--failure-rate 0.1]
+
+Starts an in-process stub with the given latency and failure rate, then
+times a sequential and a concurrent download of the same request into fresh
+chunk directories, and a rerun of the concurrent one (which must fetch
+nothing). Checks that the merged GRIB opens as one dataset.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.cds_stub import PARAMETERS, start_stub_server  # noqa: E402
+from utils.era5_download import HTTPBackend, download_chunks, merge_chunks, split_request  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# [north, west, south, east]: the Bay of Bengal
+AREA = [27.0, 80.0, 5.0, 100.0]
+
+
+def timed_download(backend, chunks, chunk_dir, workers, backoff):
+    start = time.perf_counter()
+    paths, stats = download_chunks(backend, chunks, chunk_dir, max_workers=workers, backoff=backoff)
+    stats["wall_s"] = time.perf_counter() - start
+    return paths, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dates", type=int, default=9)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub seconds per request")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--backoff", type=float, default=0.1, help="first retry delay (seconds)")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, failure_rate=args.failure_rate)
+    backend = HTTPBackend(url)
+    dates = [d.strftime("%Y-%m-%d") for d in pd.date_range("2020-05-16", periods=args.dates)]
+    times = [f"{h:02d}:00" for h in range(args.hours)]
+    chunks = split_request(list(PARAMETERS), dates, times, AREA)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"Sequential, {len(chunks)} chunks:")
+        _, sequential = timed_download(backend, chunks, tmp / "sequential", 1, args.backoff)
+        print(f"Concurrent ({args.workers} workers):")
+        paths, concurrent = timed_download(backend, chunks, tmp / "concurrent", args.workers, args.backoff)
+        requests_before = server.stats["requests"]
+        print("Rerun:")
+        _, rerun = timed_download(backend, chunks, tmp / "concurrent", args.workers, args.backoff)
+        rerun["requests"] = server.stats["requests"] - requests_before
+
+        complete = None not in paths
+        if complete:
+            from utils.era5 import open_grib
+
+            ds = open_grib(str(merge_chunks(paths, tmp / "era5_core_variables.grib")))
+            complete = ds.sizes["time"] == args.dates * args.hours and len(ds.data_vars) == len(PARAMETERS)
+
+    result = {
+        "benchmark": "era5_download.download_chunks",
+        "chunks": len(chunks),
+        "latency_s": args.latency,
+        "failure_rate": args.failure_rate,
+        "workers": args.workers,
+        "sequential": sequential,
+        "concurrent": concurrent,
+        "rerun": rerun,
+        "speedup": sequential["wall_s"] / concurrent["wall_s"],
+        "merged_complete": complete,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / "era5_download.json", 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{len(chunks)} chunks: sequential {sequential['wall_s']:.1f}s, concurrent {concurrent['wall_s']:.1f}s "
+          f"({result['speedup']:.1f}x), rerun {rerun['wall_s']:.2f}s with {rerun['requests']} requests; "
+          f"merged file complete: {complete}")
+    return 0 if complete and rerun["requests"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
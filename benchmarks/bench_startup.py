@@ -0,0 +1,106 @@
+"""Measure cold-start import cost of Home.py and every page.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--only Home.py pages/2_Establishing_Crisis_Timeline.py]
+
+Each measurement runs in a fresh interpreter: Streamlit itself is imported
+first (every page pays for it, so it is the baseline), then the script's
+top-level imports are executed and timed. Records the median import time,
+the resident-set growth over the baseline and which of the lazily imported
+libraries in utils.lazy.HEAVY_MODULES the script loaded on top of it. Exits
+non-zero if a script exceeds its time or memory budget in BUDGETS or loads
+any of them.
+
+Only the imports are run, not the page: a library deferred with utils.lazy but
+used on every rerun would look free here while still costing the first run, so
+such libraries are imported normally.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+sys.path.insert(0, str(ROOT))
+
+from utils.lazy import HEAVY_MODULES  # noqa: E402
+
+SCRIPTS = ["Home.py"] + sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))
+# Per script over the Streamlit baseline: import seconds and RSS growth (MB). Libraries a page uses on
+# every rerun (pydeck, altair, plotly) are imported normally and count towards these; no script may load
+# any of HEAVY_MODULES, which are deferred with utils.lazy
+BUDGETS = {
+    "Home.py": (0.05, 5),
+    "pages/1_Defining_Risk.py": (1.0, 150),
+    "pages/2_Establishing_Crisis_Timeline.py": (1.0, 150),
+    "pages/3_Anticipatory_Action_Chatbot.py": (0.15, 30),
+    "pages/4_Monitoring_Crisis_Response.py": (1.0, 150),
+}
+DEFAULT_BUDGET = (1.0, 150)
+
+# Run in the child interpreter: time the script's top-level imports after importing Streamlit
+_PROBE = r'''
+import ast, json, resource, sys, time
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+import streamlit  # noqa: F401
+baseline, before = rss_mb(), set(sys.modules)
+tree = ast.parse(open(sys.argv[1]).read())
+imports = ast.Module([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], [])
+start = time.perf_counter()
+exec(compile(imports, sys.argv[1], "exec"), {"__name__": "__page__"})
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_s": elapsed, "rss_mb": rss_mb() - baseline,
+                  "loaded": [m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in before]}))
+'''
+
+
+def probe(script):
+    output = subprocess.run([sys.executable, "-c", _PROBE, script, json.dumps(HEAVY_MODULES)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=SCRIPTS, default=SCRIPTS)
+    parser.add_argument("--budget-factor", type=float, default=1.0, help="scale the time budgets (slow machines)")
+    args = parser.parse_args()
+
+    results, over = {}, []
+    for script in args.only:
+        runs = [probe(script) for _ in range(args.repeat)]
+        budget_s, budget_mb = BUDGETS.get(script, DEFAULT_BUDGET)
+        budget_s *= args.budget_factor
+        result = {
+            "median_s": statistics.median(r["import_s"] for r in runs),
+            "max_s": max(r["import_s"] for r in runs),
+            "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+            "loaded": runs[0]["loaded"],
+            "budget_s": budget_s,
+            "budget_mb": budget_mb,
+        }
+        results[script] = result
+        within = result["median_s"] <= budget_s and result["rss_mb"] <= budget_mb and not result["loaded"]
+        if not within:
+            over.append(script)
+        print(f"  {script:<42} {result['median_s'] * 1000:7.0f} ms {result['rss_mb']:6.1f} MB  "
+              f"{'ok  ' if within else 'OVER'} (budget {budget_s * 1000:.0f} ms, {budget_mb} MB)  "
+              f"deferred libraries loaded: {', '.join(result['loaded']) or '-'}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / "startup.json", 'w') as f:
+        json.dump({"benchmark": "startup", "repeat": args.repeat, "results": results}, f, indent=2)
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Benchmark the wind-field footprint engine on a 0.05° Bangladesh grid.
+
+    python benchmarks/bench_windfield.py [--repeat 20] [--budget 1.0]
+
+Exits non-zero if the median time for a full track exceeds the budget (seconds).
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.tracks import DEFAULT_SOURCES, read_track_file  # noqa: E402
+from utils.windfield import BANGLADESH_BOUNDS, make_grid, max_wind_footprint  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--resolution", type=float, default=0.05)
+    parser.add_argument("--budget", type=float, default=1.0)
+    args = parser.parse_args()
+
+    track = read_track_file(DEFAULT_SOURCES[0])
+    lons, lats = make_grid(BANGLADESH_BOUNDS, args.resolution)
+
+    max_wind_footprint(track, resolution=args.resolution)  # warm-up
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        max_wind_footprint(track, resolution=args.resolution)
+        timings.append(time.perf_counter() - start)
+
+    result = {
+        "benchmark": "windfield.max_wind_footprint",
+        "steps": len(track),
+        "grid": [int(lats.size), int(lons.size)],
+        "resolution": args.resolution,
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "budget_s": args.budget,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / "windfield.json", 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{len(track)} steps x {lats.size}x{lons.size} cells: "
+          f"median {result['median_s'] * 1000:.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    return 0 if result["median_s"] <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Seeded synthetic fixtures at production scale for the benchmarks.
+
+Every generator takes a seed, so two runs (or two machines) time exactly the
+same inputs and their JSON results can be compared.
+"""
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from utils.monitoring import STREAMS
+from utils.windfield import BANGLADESH_BOUNDS
+
+TRACK_COLUMNS = ["time", "radius_max_wind", "radius_oci", "max_sustained_wind", "central_pressure",
+                 "environmental_pressure", "time_step", "basin", "lat", "lon"]
+
+# Vocabulary mirrored from the Crisis Timeline page
+TIMELINE_EVENTS = {
+    "Preparedness": [
+        "ECMWF SEAS5 Seasonal Forecast Released", "SEAS5 Mid-season Update", "MJO Pulse Detected",
+        "S2S Models Flag Elevated Risk", "Track Forecast Day 7", "Track Forecast Day 3",
+        "90th-percentile Wind Speed Alert", "Community Evacuation Drills", "Relief Consignment Departs",
+        "District-level Evacuation Orders", "72-hour Landfall Warning", "Storm Surge Nowcast",
+        "Rapid Intensity Change Warning",
+    ],
+    "Monitoring": [
+        "Landfall Occurs", "First Damage Assessment Report", "Floodwaters Begin Receding",
+        "Satellite Flood Extent Update", "Cholera Risk Zones Identified", "Drone Survey of Road Blockages",
+        "Mobile Lab Testing Results", "Vector-borne Disease Window Opens",
+    ],
+    "Recovery": [
+        "School Reconstruction Launch", "After-Action Review Workshop", "Three-month Recovery Check-in",
+        "Major Infrastructure Restoration", "Transition to Resilience Programming",
+    ],
+}
+TIMELINE_SOURCES = ["ECMWF SEAS5", "MJO Monitoring", "S2S Models", "ECMWF Track", "Ensemble Model",
+                    "Field Teams", "UNICEF Logistics", "Regional Model", "Weather Stations",
+                    "Rapid Assessment", "Satellite Data", "Health Assessment", "Drone Survey"]
+ALERT_LEVELS = ["Info", "Watch", "Warning", "Alert", "Critical"]
+
+PDF_WORDS = ("anticipatory action cyclone forecast trigger evacuation shelter district upazila union "
+             "early warning readiness stock prepositioning cash transfer lead time landfall surge "
+             "flood WASH health nutrition protection education logistics coordination funding").split()
+
+
+# — Admin polygons —
+
+def _wiggle(coords, amplitude, seed):
+    """Deterministic displacement field: shared vertices move identically, so the coverage stays gap-free"""
+    rng = np.random.default_rng(seed)
+    k = rng.uniform(20, 60, size=4)
+    x, y = coords[:, 0], coords[:, 1]
+    dx = amplitude * (np.sin(k[0] * x + k[1] * y) + 0.5 * np.sin(3.1 * k[1] * x - k[0] * y))
+    dy = amplitude * (np.cos(k[2] * x - k[3] * y) + 0.5 * np.cos(2.7 * k[3] * x + k[2] * y))
+    return np.column_stack([x + dx, y + dy])
+
+
+def admin_polygons(n=5000, bounds=BANGLADESH_BOUNDS, seed=0, segment=0.004):
+    """Adm4-sized polygon coverage: jagged Voronoi cells over the bounds"""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = bounds
+    points = shapely.points(rng.uniform(west, east, n), rng.uniform(south, north, n))
+    cells = shapely.get_parts(shapely.voronoi_polygons(shapely.multipoints(points)))
+    cells = shapely.clip_by_rect(cells, west, south, east, north)
+    # Densify edges then displace them so each unit has a few hundred vertices, like real boundaries
+    cells = shapely.segmentize(cells, segment)
+    return shapely.transform(cells, lambda c: _wiggle(c, segment / 2, seed))
+
+
+def write_admin_geojson(geoms, path):
+    """Write polygons as a GeoJSON FeatureCollection with adm-style properties"""
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"name": f"Union {i:05d}", "level": 4, "level_name": "Admin Level 4",
+                           "ucode": f"BGD_U{i:05d}"},
+            "geometry": json.loads(shapely.to_geojson(geom)),
+        }
+        for i, geom in enumerate(geoms)
+    ]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return path
+
+
+# — Population raster —
+
+def population_raster(path, resolution=1 / 1200, bounds=BANGLADESH_BOUNDS, seed=0, block=512):
+    """Write a tiled float32 people-per-cell GeoTIFF (WorldPop-like, ~100 m at the default resolution)
+
+    Written a block row at a time, so country-scale grids never sit in memory.
+    """
+    import rasterio
+    from rasterio.transform import from_origin
+    from rasterio.windows import Window
+
+    west, south, east, north = bounds
+    width = int(round((east - west) / resolution))
+    height = int(round((north - south) / resolution))
+    rng = np.random.default_rng(seed)
+    # A few dozen smooth population centres over a sparse rural background
+    centres = rng.uniform([west, south], [east, north], size=(40, 2))
+    scales = rng.uniform(0.05, 0.3, size=40)
+    peaks = rng.uniform(50, 400, size=40)
+    xs = west + (np.arange(width) + 0.5) * resolution
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile = {"driver": "GTiff", "width": width, "height": height, "count": 1, "dtype": "float32",
+               "crs": "EPSG:4326", "transform": from_origin(west, north, resolution, resolution),
+               "nodata": -99999.0, "tiled": True, "blockxsize": block, "blockysize": block,
+               "compress": "deflate"}
+    with rasterio.open(path, "w", **profile) as dst:
+        for row in range(0, height, block):
+            n_rows = min(block, height - row)
+            ys = north - (np.arange(row, row + n_rows) + 0.5) * resolution
+            density = rng.gamma(0.5, 2.0, size=(n_rows, width))
+            for (cx, cy), scale, peak in zip(centres, scales, peaks):
+                gy = np.exp(-((ys - cy) / scale) ** 2)[:, None]
+                gx = np.exp(-((xs - cx) / scale) ** 2)[None, :]
+                density += peak * gy * gx
+            dst.write(density.astype(np.float32), 1, window=Window(0, row, width, n_rows))
+    return path
+
+
+# — Facilities —
+
+def facilities(n=120_000, bounds=BANGLADESH_BOUNDS, seed=0, health_share=0.15):
+    """School and health-site points clustered around population centres, in the facility catalog columns"""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = bounds
+    centres = rng.uniform([west, south], [east, north], size=(40, 2))
+    # Most facilities sit near a centre, the rest spread over the country
+    clustered = int(n * 0.7)
+    near = centres[rng.integers(0, len(centres), clustered)] + rng.normal(0, 0.15, size=(clustered, 2))
+    spread = rng.uniform([west, south], [east, north], size=(n - clustered, 2))
+    points = np.clip(np.vstack([near, spread]), [west, south], [east, north])
+    kind = np.where(rng.random(n) < health_share, "health", "school")
+    return pd.DataFrame({
+        "facility_id": [f"F{i:06d}" for i in range(n)],
+        "name": [f"{k.title()} {i}" for i, k in enumerate(kind)],
+        "type": pd.Categorical(kind),
+        "lon": points[:, 0],
+        "lat": points[:, 1],
+    })
+
+
+# — Storm tracks —
+
+def storm_tracks(out_dir, n=150, seed=0):
+    """Write ``n`` CLIMADA-style 3-hourly track CSVs, named {name}_{year}_track.csv"""
+    rng = np.random.default_rng(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n):
+        year = 1980 + i % 45
+        steps = int(rng.integers(40, 120))
+        start = pd.Timestamp(f"{year}-{rng.choice([5, 10, 11]):02d}-01") + pd.Timedelta(days=int(rng.integers(0, 28)))
+        # Recurving random walk from the southern Bay of Bengal towards the coast
+        heading = np.cumsum(rng.normal(0, 4, steps)) + rng.uniform(-20, 20)
+        speed = rng.uniform(0.08, 0.25, steps)
+        lat = rng.uniform(8, 14) + np.cumsum(speed * np.cos(np.radians(heading)))
+        lon = rng.uniform(84, 92) + np.cumsum(speed * np.sin(np.radians(heading)))
+        peak = rng.uniform(50, 150)
+        wind = np.clip(peak * np.sin(np.linspace(0.1, np.pi - 0.1, steps)) + rng.normal(0, 3, steps), 15, None)
+        track = pd.DataFrame({
+            "time": pd.date_range(start, periods=steps, freq="3h"),
+            "radius_max_wind": rng.uniform(15, 60, steps).round(1),
+            "radius_oci": rng.uniform(120, 300, steps).round(1),
+            "max_sustained_wind": wind.round(1),
+            "central_pressure": (1010 - 0.6 * wind).round(1),
+            "environmental_pressure": 1008.0,
+            "time_step": 3.0,
+            "basin": "NI",
+            "lat": lat.round(2),
+            "lon": lon.round(2),
+        })[TRACK_COLUMNS]
+        path = out_dir / f"storm{i:04d}_{year}_track.csv"
+        track.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+# — Monitoring streams —
+
+def monitoring_frame(stream="shelter", n_entities=10_000, hours=24 * 60, seed=0):
+    """Hourly rows for every entity, oldest first (entity and status as categoricals)"""
+    rng = np.random.default_rng(seed)
+    spec = STREAMS[stream]
+    entities = pd.Categorical.from_codes(
+        np.tile(np.arange(n_entities, dtype=np.int32), hours),
+        categories=[f"{stream}-{i:05d}" for i in range(n_entities)],
+    )
+    n = n_entities * hours
+    frame = pd.DataFrame({
+        "timestamp": np.repeat(pd.date_range("2024-05-01", periods=hours, freq="h").to_numpy(), n_entities),
+        spec.entity: entities,
+    })
+    for column in spec.numeric:
+        frame[column] = rng.integers(0, 500, size=n, dtype=np.int32)
+    for column in spec.categorical:
+        frame[column] = pd.Categorical.from_codes(rng.integers(0, 3, size=n), categories=["A", "B", "C"])
+    return frame
+
+
+# — Crisis timeline events —
+
+def timeline_events(n=100_000, n_storms=200, seed=0):
+    """Timeline table with the page's columns and event vocabulary, spread over many storms"""
+    rng = np.random.default_rng(seed)
+    phases = rng.choice(list(TIMELINE_EVENTS), size=n, p=[0.5, 0.3, 0.2])
+    events = np.empty(n, dtype=object)
+    for phase, names in TIMELINE_EVENTS.items():
+        mask = phases == phase
+        events[mask] = rng.choice(names, size=int(mask.sum()))
+    start = pd.Timestamp("2000-01-01", tz="UTC")
+    return pd.DataFrame({
+        "storm_id": rng.choice([f"STORM{i:04d}_{2000 + i % 25}" for i in range(n_storms)], size=n),
+        "Phase": phases,
+        "Event": events,
+        "Timestamp": start + pd.to_timedelta(np.sort(rng.integers(0, 25 * 365 * 24, size=n)), unit="h"),
+        "Location": rng.choice(["Bay of Bengal", "Cox's Bazar", "Khulna", "Satkhira", "Barishal"], size=n),
+        "Source": rng.choice(TIMELINE_SOURCES, size=n),
+        "Alert_Level": rng.choice(ALERT_LEVELS, size=n),
+    })
+
+
+# — PDF document —
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages=300, lines_per_page=45, words_per_line=12, seed=0):
+    """Write a plain multi-page text PDF (no PDF library needed)"""
+    rng = np.random.default_rng(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [" ".join(rng.choice(PDF_WORDS, size=words_per_line)) for _ in range(lines_per_page)]
+        text = f"Page {page + 1}\n" + "\n".join(lines)
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in text.split("\n")]
+        ops.append("ET")
+        stream = zlib.compress("\n".join(ops).encode("latin-1"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+    return path
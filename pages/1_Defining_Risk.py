@@ -1,73 +1,144 @@
 import streamlit as st
 import pandas as pd
-import os
+import numpy as np
 import pydeck as pdk
-import altair as alt
-from datetime import datetime, timedelta
-import folium
-from streamlit_folium import folium_static
-import json
-from pathlib import Path
+
+from utils import products
+from utils.boundaries import get_boundary_store
+from utils.crossing import storm_landfall, unit_crossings
+from utils.ensemble import EnsembleSettings, ensemble_summary, perturbed_tracks
+from utils.exposure import exposure_geojson
+from utils.facilities import FACILITIES_FILE
+from utils.interpolation import resample_track, trip
+from utils.profiling import finish_page_profile, profile_section, start_page_profile
+from utils.strike import STRIKE_RADIUS_KM, StrikeGrid, probability_image
+from utils.tiles import load_metadata, tile_url
+from utils.tracks import load_index, load_track
+from utils.windfield import footprint_image
+from utils.zonal import POPULATION_RASTER
+
+# Initial map zoom, also used to pick the boundary simplification level
+MAP_ZOOM = 6
+# Playback resolution of the animated track, and how much of the past path stays drawn
+PLAYBACK_STEP = pd.Timedelta("10min")
+TRAIL_HOURS = 12
+# Ensemble members drawn on the scenario map (statistics use every member)
+MAX_DRAWN_MEMBERS = 200
+# Members added to the strike-probability grid between map refreshes
+STRIKE_BATCH = 250
+STRIKE_STATE_KEY = "strike_grid"
+# Facilities drawn on the facility map, highest peak wind first (metrics use every facility)
+MAX_DRAWN_FACILITIES = 20_000
 
 # Data loading functions
-def load_admin_boundary(admin_level):
-    # Map admin levels to file names
-    admin_files = {
-        "Admin Level 0": "adm0.geojson",
-        "Admin Level 1": "adm1.geojson",
-        "Admin Level 2": "adm2.geojson",
-        "Admin Level 3": "adm3.geojson",
-        "Admin Level 4": "adm4.geojson"
-    }
-    
-    base_path = Path("/Users/majju/Downloads/UNTechWeek/data/boundaries/Bangladesh_Latest_-_Global_Administrative_Boundaries")
-    file_name = admin_files.get(admin_level)
-    
-    if not file_name:
-        st.error(f"Invalid admin level: {admin_level}")
-        return None
-        
-    file_path = base_path / file_name
-    
+@profile_section("load boundaries")
+def load_admin_boundary(admin_level, zoom=MAP_ZOOM):
+    store = get_boundary_store()
+
     try:
-        if not file_path.exists():
-            if admin_level in ["Admin Level 2", "Admin Level 3", "Admin Level 4"]:
-                st.warning(f"Data for {admin_level} is not available in the current version.")
-                return None
-            else:
-                st.error(f"File not found: {file_path}")
-                return None
-                
-        # Read the GeoJSON file using json
-        with open(file_path, 'r') as f:
-            geojson_data = json.load(f)
-            
-        return geojson_data
-        
+        # Parsed once per process and shared across sessions
+        return store.get(admin_level, zoom=zoom)
+
+    except ValueError as e:
+        st.error(str(e))
+        return None
+    except FileNotFoundError as e:
+        if admin_level in ["Admin Level 2", "Admin Level 3", "Admin Level 4"]:
+            st.warning(f"Data for {admin_level} is not available in the current version.")
+        else:
+            st.error(str(e))
+        return None
     except Exception as e:
         st.error(f"Error loading {admin_level} boundary: {str(e)}")
         return None
 
-def load_cyclone_track():
-    track_path = Path("/Users/majju/Downloads/UNTechWeek/data/boundaries/CyclonePath/amphan_2020_track.geojson")
-    if track_path.exists():
-        with open(track_path, 'r') as f:
-            track_data = json.load(f)
-            
-        # Extract coordinates from GeoJSON
-        coordinates = []
-        for feature in track_data['features']:
-            coords = feature['geometry']['coordinates']
-            coordinates.append({
-                'longitude': coords[0],
-                'latitude': coords[1]
-            })
-            
-        return pd.DataFrame(coordinates)
-    return None
+@st.cache_data
+def load_storm_index():
+    return load_index()
+
+@st.cache_data
+def load_cyclone_track(storm_id):
+    index = load_storm_index()
+    if index is None or storm_id not in index.index:
+        return None
+    return load_track(storm_id, index=index)
+
+@st.cache_data
+def load_wind_footprint(storm_id, resolution=0.05):
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    # Read through the disk cache, so a restarted server does not recompute it
+    return products.wind_footprint(storm_id, track_df, resolution=resolution)
+
+@st.cache_data
+def load_exposure(storm_id, admin_level):
+    # Shared by the exposure map and table
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    try:
+        return products.exposure_table(storm_id, admin_level, track_df)
+    except (ValueError, FileNotFoundError):
+        return None
+
+@st.cache_data
+def load_population_exposure(storm_id, admin_level):
+    # People (and children, when that grid is present) under the footprint, per unit
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    try:
+        return products.population_exposure(storm_id, admin_level, track_df)
+    except (ValueError, FileNotFoundError):
+        return None
+
+@st.cache_data
+def load_facility_exposure(storm_id, radius_km):
+    # Per storm and radius, read through the disk cache
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    return products.facility_exposure(storm_id, track_df, radius_km=radius_km)
+
+@st.cache_data
+def load_track_playback(storm_id, step=PLAYBACK_STEP):
+    # Resampled once per storm; slider moves only look up a row
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None, None
+    resampled = resample_track(track_df, freq=step)
+    return resampled, trip(resampled)
+
+@st.cache_data
+def load_ensemble(storm_id, settings):
+    # Regenerated only when the storm or a setting changes
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    return perturbed_tracks(track_df, settings)
+
+@st.cache_data
+def load_crossings(storm_id, admin_level):
+    # When the storm centre enters and leaves each unit at this level
+    store = get_boundary_store()
+    track_df = load_cyclone_track(storm_id)
+    if track_df is None:
+        return None
+    try:
+        geoms = store.geometries(admin_level)
+        properties = store.properties(admin_level)
+    except (ValueError, FileNotFoundError):
+        return None
+    return unit_crossings(geoms, properties, track_df)
+
+@st.cache_data
+def load_landfall(storm_id):
+    return storm_landfall(storm_id)
 
 # — App config —
 st.set_page_config(page_title="UNICEF Cyclone Impact Explorer", layout="wide")
+start_page_profile("Defining Risk")
 
 # Add UNICEF logo
 col1, col2 = st.columns([0.85, 0.15])
@@ -95,13 +166,20 @@ with hazard_tab:
         st.header("Historical Cyclone Analysis")
         st.markdown(
             "Select which administrative boundary to use, "
-            "and load the Cyclone Amphan track data."
+            "and load the track data for a cyclone from the catalog."
         )
 
         # — 1. Cyclone selection —
+        with profile_section("load storm index"):
+            storm_index = load_storm_index()
+        storm_ids = [] if storm_index is None else storm_index.index.tolist()
         cyclone = st.selectbox(
             "Select Cyclone",
-            ["Cyclone Amphan"]
+            storm_ids,
+            format_func=lambda sid: (
+                f"Cyclone {storm_index.loc[sid, 'name'].title()} "
+                f"({storm_index.loc[sid, 'year']}, {storm_index.loc[sid, 'basin']})"
+            )
         )
 
         # — 2. Admin level dropdown —
@@ -111,66 +189,384 @@ with hazard_tab:
         )
 
         # — 3. Load boundary data —
-        boundary_data = load_admin_boundary(admin_level)
-        if boundary_data is None:
-            if admin_level in ["Admin Level 0", "Admin Level 1"]:
-                st.error(f"Could not load {admin_level} boundary data. Please ensure the data file exists.")
-            # For other levels, the warning is already shown in load_admin_boundary
+        # Prefer the local vector tile pyramid (python -m utils.tiles) so only tiles in view are sent
+        tile_metadata = load_metadata(admin_level)
+        tiles = tile_url(admin_level) if tile_metadata is not None else None
+        if tiles is None:
+            tile_metadata = None
+        boundary_data = None
+        if tile_metadata is None:
+            boundary_data = load_admin_boundary(admin_level)
+            if boundary_data is None:
+                if admin_level in ["Admin Level 0", "Admin Level 1"]:
+                    st.error(f"Could not load {admin_level} boundary data. Please ensure the data file exists.")
+                # For other levels, the warning is already shown in load_admin_boundary
 
         # — 4. Load cyclone track —
-        track_df = load_cyclone_track()
+        with profile_section("load track"):
+            track_df = load_cyclone_track(cyclone) if cyclone is not None else None
         if track_df is None:
             st.error("Could not load cyclone track data. Please ensure the data file exists.")
 
         # — 5. Map display —
         st.subheader("Primary Hazard: Cyclone Track")
-        if boundary_data is not None and track_df is not None:
-            # Create layers for the map
-            boundary_layer = pdk.Layer(
-                "GeoJsonLayer",
-                data=boundary_data,
-                get_fill_color=[255, 0, 0, 50],  # Red with 50% opacity
-                pickable=True,
-                stroked=True,
-                filled=True,
-                extruded=False,
-                line_width_min_pixels=1
-            )
+        show_footprint = st.checkbox("Show max-wind footprint (Holland parametric model)", value=True)
+        if (tile_metadata is not None or boundary_data is not None) and track_df is not None:
+            with profile_section("build hazard deck"):
+                # Create layers for the map
+                if tile_metadata is not None:
+                    boundary_layer = pdk.Layer(
+                        "MVTLayer",
+                        data=tiles,
+                        min_zoom=tile_metadata["minzoom"],
+                        max_zoom=tile_metadata["maxzoom"],
+                        extent=tile_metadata["bounds"],  # no tiles exist outside it
+                        get_fill_color=[255, 0, 0, 50],  # Red with 50% opacity
+                        get_line_color=[0, 0, 0, 255],
+                        pickable=True,
+                        stroked=True,
+                        filled=True,
+                        line_width_min_pixels=1
+                    )
+                else:
+                    boundary_layer = pdk.Layer(
+                        "GeoJsonLayer",
+                        data=boundary_data,
+                        get_fill_color=[255, 0, 0, 50],  # Red with 50% opacity
+                        pickable=True,
+                        stroked=True,
+                        filled=True,
+                        extruded=False,
+                        line_width_min_pixels=1
+                    )
             
-            track_layer = pdk.Layer(
-                "ScatterplotLayer",
-                data=track_df,
-                get_position=['longitude', 'latitude'],
-                get_color=[0, 0, 255],  # Blue
-                get_radius=5000,  # Increased from 1000 to 5000
-                pickable=True,
-                stroked=True,
-                filled=True,
-                line_width_min_pixels=2
-            )
+                track_layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=track_df.assign(time=track_df['time'].dt.strftime('%Y-%m-%d %H:%M')),
+                    get_position=['lon', 'lat'],
+                    get_color=[0, 0, 255],  # Blue
+                    get_radius=5000,  # Increased from 1000 to 5000
+                    pickable=True,
+                    stroked=True,
+                    filled=True,
+                    line_width_min_pixels=2
+                )
             
-            # Set the initial viewport
-            view_state = pdk.ViewState(
-                latitude=23.6850,  # Center of Bangladesh
-                longitude=90.3563,
-                zoom=6
-            )
+                layers = [boundary_layer, track_layer]
+                landfall = load_landfall(cyclone)
+                if landfall is not None:
+                    landfall_layer = pdk.Layer(
+                        "ScatterplotLayer",
+                        data=[{"lon": landfall.lon, "lat": landfall.lat, "time": f"Landfall {landfall.time:%Y-%m-%d %H:%M}"}],
+                        get_position=['lon', 'lat'],
+                        get_color=[220, 20, 60],  # Crimson
+                        get_radius=12000,
+                        pickable=True
+                    )
+                    layers.append(landfall_layer)
+                if show_footprint:
+                    with profile_section("wind footprint"):
+                        footprint = load_wind_footprint(cyclone)
+                        image, bounds = footprint_image(footprint)
+                    footprint_layer = pdk.Layer(
+                        "BitmapLayer",
+                        image=image,
+                        bounds=bounds,
+                        opacity=0.8
+                    )
+                    layers = [boundary_layer, footprint_layer] + layers[1:]
+                    st.caption(f"Peak modelled sustained wind over the map area: {footprint.wind.max():.0f} m/s")
+
+                # Set the initial viewport
+                view_state = pdk.ViewState(
+                    latitude=23.6850,  # Center of Bangladesh
+                    longitude=90.3563,
+                    zoom=MAP_ZOOM
+                )
             
-            # Create the deck.gl map
-            deck = pdk.Deck(
-                layers=[boundary_layer, track_layer],
-                initial_view_state=view_state,
-                map_style='mapbox://styles/mapbox/light-v9'
-            )
+                # Create the deck.gl map
+                deck = pdk.Deck(
+                    layers=layers,
+                    initial_view_state=view_state,
+                    map_style='mapbox://styles/mapbox/light-v9'
+                )
             
-            st.pydeck_chart(deck)
+            with profile_section("render hazard map"):
+                st.pydeck_chart(deck)
+
+            # — 6. Animated playback of the resampled track —
+            with st.expander("Track playback", expanded=False):
+                with profile_section("track playback"):
+                    playback_df, playback_trip = load_track_playback(cyclone)
+                first, last = playback_df['time'].iloc[0], playback_df['time'].iloc[-1]
+                playback_time = st.slider(
+                    "Time (UTC)",
+                    min_value=first.to_pydatetime(),
+                    max_value=last.to_pydatetime(),
+                    value=first.to_pydatetime(),
+                    step=PLAYBACK_STEP.to_pytimedelta(),
+                    format="YYYY-MM-DD HH:mm"
+                )
+                now = playback_df.iloc[min(playback_df['time'].searchsorted(pd.Timestamp(playback_time)), len(playback_df) - 1)]
+                playback_layers = [
+                    boundary_layer,
+                    pdk.Layer(
+                        "TripsLayer",
+                        data=[playback_trip],
+                        get_path="path",
+                        get_timestamps="timestamps",
+                        get_color=[0, 0, 255],
+                        width_min_pixels=4,
+                        rounded=True,
+                        trail_length=TRAIL_HOURS * 3600,
+                        current_time=(now['time'] - first).total_seconds()
+                    ),
+                    pdk.Layer(
+                        "ScatterplotLayer",
+                        data=[{"lon": now['lon'], "lat": now['lat']}],
+                        get_position=['lon', 'lat'],
+                        get_color=[0, 0, 255],
+                        get_radius=now['radius_max_wind'] * 1852,  # RMW, nautical miles to metres
+                        opacity=0.3
+                    ),
+                ]
+                st.pydeck_chart(pdk.Deck(
+                    layers=playback_layers,
+                    initial_view_state=pdk.ViewState(latitude=now['lat'], longitude=now['lon'], zoom=MAP_ZOOM - 1),
+                    map_style='mapbox://styles/mapbox/light-v9'
+                ))
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Sustained wind", f"{now['max_sustained_wind']:.0f} kn")
+                col2.metric("Central pressure", f"{now['central_pressure']:.0f} hPa")
+                col3.metric("Radius of max wind", f"{now['radius_max_wind']:.0f} nm")
+
+            # — 7. Landfall and units crossed by the storm centre —
+            if landfall is not None:
+                st.metric(
+                    "Landfall",
+                    f"{landfall.time:%Y-%m-%d %H:%M} UTC",
+                    help=f"First crossing onto land at {landfall.lat:.2f}°N, {landfall.lon:.2f}°E "
+                         f"with {landfall.wind_kn:.0f} kn sustained wind"
+                )
+            with profile_section("track crossings"):
+                crossings_df = load_crossings(cyclone, admin_level)
+            if crossings_df is not None and not crossings_df.empty:
+                with st.expander(f"Units crossed by the storm centre ({len(crossings_df)})"):
+                    st.dataframe(crossings_df.drop(columns=['unit']), use_container_width=True, hide_index=True)
         else:
             st.warning("Please ensure both boundary and track data are available to display the map.")
 
+    # Forward-Looking Scenario Tab
+    with forward_tab:
+        st.header("Forward-Looking Cyclone Scenario Analysis")
+        st.markdown(
+            "A synthetic ensemble of tracks perturbed from the cyclone selected in the historical analysis: "
+            "each member starts from a displaced position, drifts in heading, and moves and intensifies "
+            "faster or slower than the original."
+        )
+
+        col1, col2, col3 = st.columns(3)
+        n_members = col1.select_slider("Members", options=[100, 250, 500, 1000, 2000, 5000], value=1000)
+        heading_deg = col2.slider("Heading drift per step (°)", 0.0, 10.0, 3.0, 0.5)
+        speed_frac = col3.slider("Speed spread (%)", 0, 50, 15, 5) / 100
+        col1, col2, col3 = st.columns(3)
+        intensity_frac = col1.slider("Intensity spread (%)", 0, 50, 15, 5) / 100
+        start_km = col2.slider("Initial position spread (km)", 0, 150, 30, 10)
+        seed = col3.number_input("Random seed", min_value=0, value=0, step=1)
+        strike_radius = st.slider("Strike radius (km)", 25, 200, int(STRIKE_RADIUS_KM), 25)
+        settings = EnsembleSettings(
+            n_members=n_members, seed=int(seed), start_km=float(start_km), heading_deg=heading_deg,
+            speed_frac=speed_frac, intensity_frac=intensity_frac
+        )
+
+        with profile_section("ensemble"):
+            ensemble = load_ensemble(cyclone, settings) if cyclone is not None else None
+        if ensemble is None:
+            st.warning("Select a cyclone with track data in the historical analysis to build scenarios.")
+        else:
+            peak_wind = ensemble.max_sustained_wind.max(axis=1)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Members", f"{len(peak_wind):,}")
+            col2.metric("Median peak wind", f"{np.median(peak_wind):.0f} kn")
+            col3.metric("Members reaching ≥ 64 kn", f"{(peak_wind >= 64).mean():.0%}")
+
+            # Evenly spaced subset of members, coloured by their peak wind
+            drawn = np.linspace(0, len(peak_wind) - 1, min(MAX_DRAWN_MEMBERS, len(peak_wind))).astype(int)
+            scaled = np.clip(peak_wind[drawn] / 140.0, 0.0, 1.0)
+            member_paths = [
+                {
+                    "path": np.column_stack([ensemble.lon[i], ensemble.lat[i]]).round(3).tolist(),
+                    "member": int(i),
+                    "peak_wind_kn": round(float(peak_wind[i]), 1),
+                    "color": [255, int(200 * (1 - s)), 0, 90],
+                }
+                for i, s in zip(drawn, scaled)
+            ]
+            base_path = [{"path": track_df[['lon', 'lat']].to_numpy().round(3).tolist(), "member": "original",
+                          "peak_wind_kn": float(track_df['max_sustained_wind'].max()), "color": [0, 0, 255, 255]}]
+
+            def scenario_deck(strike_grid):
+                image, bounds = probability_image(strike_grid)
+                return pdk.Deck(
+                    layers=[
+                        pdk.Layer("BitmapLayer", image=image, bounds=bounds, opacity=0.8),
+                        pdk.Layer("PathLayer", data=member_paths, get_path="path", get_color="color",
+                                  width_min_pixels=1, pickable=True),
+                        pdk.Layer("PathLayer", data=base_path, get_path="path", get_color="color",
+                                  width_min_pixels=3, pickable=True),
+                    ],
+                    initial_view_state=pdk.ViewState(latitude=18.0, longitude=88.5, zoom=MAP_ZOOM - 2),
+                    map_style='mapbox://styles/mapbox/light-v9',
+                    tooltip={"text": "Member {member}\nPeak wind: {peak_wind_kn} kn"}
+                )
+
+            # Strike probability fills in batch by batch the first time; later reruns reuse the grid
+            strike_key = (cyclone, settings, strike_radius)
+            cached = st.session_state.get(STRIKE_STATE_KEY)
+            map_placeholder = st.empty()
+            if cached is not None and cached[0] == strike_key:
+                strike_grid = cached[1]
+            else:
+                strike_grid = StrikeGrid(radius_km=strike_radius)
+                progress = st.progress(0.0)
+                with profile_section("strike probability"):
+                    for start in range(0, len(peak_wind), STRIKE_BATCH):
+                        strike_grid.add(ensemble.lon[start:start + STRIKE_BATCH], ensemble.lat[start:start + STRIKE_BATCH])
+                        map_placeholder.pydeck_chart(scenario_deck(strike_grid))
+                        progress.progress(strike_grid.n_members / len(peak_wind),
+                                          text=f"Strike probability: {strike_grid.n_members:,} members")
+                progress.empty()
+                st.session_state[STRIKE_STATE_KEY] = (strike_key, strike_grid)
+            map_placeholder.pydeck_chart(scenario_deck(strike_grid))
+            st.caption(
+                f"Shading: probability that the centre passes within {strike_radius} km of each cell, "
+                f"over all {strike_grid.n_members:,} members. {len(drawn)} member tracks drawn."
+            )
+
+            summary = ensemble_summary(ensemble).set_index('time')
+            col1, col2 = st.columns(2)
+            col1.markdown("**Track spread (km)**")
+            col1.line_chart(summary['spread_km'])
+            col2.markdown("**Sustained wind percentiles (kn)**")
+            col2.line_chart(summary[['wind_p10', 'wind_p50', 'wind_p90']])
+
+# Exposure Tab
+with exposure_tab:
+    st.header("Admin Unit Exposure")
+    st.markdown(
+        "Peak modelled wind, time of first gale-force impact (≥ 17 m/s) and the share of each "
+        f"unit's area under gale-force winds, for the cyclone and admin level selected in the Hazard tab ({admin_level})."
+    )
+
+    with profile_section("exposure table"):
+        exposure_df = load_exposure(cyclone, admin_level) if cyclone is not None else None
+    if exposure_df is None:
+        st.warning("Exposure needs both the cyclone track and the boundary data for the selected admin level.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Units under gale-force winds", int((exposure_df['hazard_fraction'] > 0).sum()))
+        col2.metric("Highest unit peak wind", f"{exposure_df['peak_wind_ms'].max():.0f} m/s")
+        col3.metric("First impact", str(exposure_df['first_impact'].min()) if exposure_df['first_impact'].notna().any() else "—")
+
+        with profile_section("exposure choropleth"):
+            exposure_data = exposure_geojson(load_admin_boundary(admin_level), exposure_df)
+        exposure_layer = pdk.Layer(
+            "GeoJsonLayer",
+            data=exposure_data,
+            get_fill_color="properties.fill_color",
+            pickable=True,
+            stroked=True,
+            filled=True,
+            line_width_min_pixels=1
+        )
+        st.pydeck_chart(pdk.Deck(
+            layers=[exposure_layer],
+            initial_view_state=pdk.ViewState(latitude=23.6850, longitude=90.3563, zoom=MAP_ZOOM),
+            map_style='mapbox://styles/mapbox/light-v9',
+            tooltip={"text": "{unit_name}\nPeak wind: {peak_wind_ms} m/s\nGale-force area: {hazard_fraction}\nFirst impact: {first_impact}"}
+        ))
+
+        with profile_section("population exposure"):
+            population_df = load_population_exposure(cyclone, admin_level)
+        if population_df is not None:
+            col1, col2 = st.columns(2)
+            col1.metric("People under gale-force winds", f"{population_df['exposed_population'].sum():,.0f}")
+            if 'exposed_children' in population_df:
+                col2.metric("Children under gale-force winds", f"{population_df['exposed_children'].sum():,.0f}")
+            exposure_df = exposure_df.merge(population_df.drop(columns=['name', 'n_cells']), on='unit', how='left')
+        else:
+            st.caption(f"Add a population grid at {POPULATION_RASTER} (or set POPULATION_RASTER) for people exposed per unit.")
+
+        st.dataframe(
+            exposure_df.drop(columns=['unit', 'first_impact_step']),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    st.subheader("Schools and Health Facilities")
+    if not FACILITIES_FILE.exists():
+        st.caption(f"Add school and health facility points with `python -m utils.facilities <files>` "
+                   f"(written to {FACILITIES_FILE}, or set FACILITIES_FILE) for facility exposure.")
+    elif cyclone is not None:
+        facility_radius = st.slider("Facilities within this distance of the storm centre (km)", 25, 300, 100, step=25)
+        with profile_section("facility exposure"):
+            facility_result = load_facility_exposure(cyclone, facility_radius)
+        if facility_result is not None:
+            steps_df, facilities_df = facility_result
+            gale_df = facilities_df[facilities_df['peak_wind_ms'] >= 17]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Schools under gale-force winds", f"{(gale_df['type'] == 'school').sum():,}")
+            col2.metric("Health facilities under gale-force winds", f"{(gale_df['type'] == 'health').sum():,}")
+            col3.metric(f"Most facilities within {facility_radius} km of the centre",
+                        f"{steps_df['facilities_within'].max():,}")
+
+            with profile_section("facility map"):
+                drawn = facilities_df.head(MAX_DRAWN_FACILITIES).copy()
+                # Yellow -> red by peak wind, as on the footprint
+                scaled = np.clip((drawn['peak_wind_ms'].to_numpy() - 10.0) / 60.0, 0.0, 1.0)
+                drawn['color'] = np.column_stack([
+                    np.full(len(drawn), 255), (220 * (1.0 - scaled)).astype(int), np.zeros(len(drawn), dtype=int),
+                    np.full(len(drawn), 200),
+                ]).tolist()
+                drawn['first_gale'] = drawn['first_gale'].dt.strftime('%Y-%m-%d %H:%M').fillna("—")
+                drawn['peak_time'] = drawn['peak_time'].dt.strftime('%Y-%m-%d %H:%M')
+                facility_layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=drawn,
+                    get_position='[lon, lat]',
+                    get_fill_color='color',
+                    get_radius=800,
+                    radius_min_pixels=2,
+                    radius_max_pixels=8,
+                    pickable=True,
+                )
+                track_df = load_cyclone_track(cyclone)
+                track_path = [{"path": track_df[['lon', 'lat']].to_numpy().tolist()}]
+                st.pydeck_chart(pdk.Deck(
+                    layers=[
+                        facility_layer,
+                        pdk.Layer("PathLayer", data=track_path, get_path="path", get_color=[30, 30, 30],
+                                  width_min_pixels=2),
+                    ],
+                    initial_view_state=pdk.ViewState(latitude=23.6850, longitude=90.3563, zoom=MAP_ZOOM),
+                    map_style='mapbox://styles/mapbox/light-v9',
+                    tooltip={"text": "{name} ({type})\nPeak wind: {peak_wind_ms} m/s at {peak_time}\n"
+                                     "First gale-force: {first_gale}\nClosest approach: {closest_km} km"}
+                ))
+            if len(facilities_df) > MAX_DRAWN_FACILITIES:
+                st.caption(f"Showing the {MAX_DRAWN_FACILITIES:,} facilities with the highest peak wind "
+                           f"of {len(facilities_df):,} reached by the wind field.")
+
+            st.markdown(f"**Facilities within {facility_radius} km of the centre, and under gale-force winds, per fix**")
+            st.line_chart(steps_df.set_index('time')[['facilities_within', 'facilities_gale_force']])
+            st.dataframe(gale_df.drop(columns=['lon', 'lat']), use_container_width=True, hide_index=True)
+
 # Add UNICEF footer
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666; font-size: 0.8em;'>
     © 2025 UNICEF. All rights reserved. This application is part of UNICEF's efforts to improve disaster preparedness and response.
 </div>
-""", unsafe_allow_html=True) 
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_page_profile()
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from datetime import datetime, timedelta
-import geopandas as gpd
-import pydeck as pdk
+
+from utils.crossing import storm_landfalls
+from utils.profiling import PANEL_KEY, finish_page_profile, profile_section, start_page_profile
+from utils.timeline import (
+    ALERT_LEVELS, MAX_RAW_EVENTS, EventStore, bin_events, place_landfall, read_events, width_label,
+)
 
 # — App config —
 st.set_page_config(page_title="UNICEF Cyclone Impact Explorer", layout="wide")
+start_page_profile("Crisis Timeline")
 
 # Add UNICEF logo
 col1, col2 = st.columns([0.85, 0.15])
@@ -41,169 +45,21 @@ PHASES = [
     "Recovery"
 ]
 
-# Sample event data (replace with actual data loading)
-events_data = {
-    "Phase": [
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Preparedness",
-        "Monitoring",
-        "Monitoring",
-        "Monitoring",
-        "Monitoring",
-        "Monitoring",
-        "Monitoring",
-        "Monitoring",
-        "Recovery",
-        "Recovery",
-        "Recovery",
-        "Recovery",
-        "Recovery"
-    ],
-    "Event": [
-        "ECMWF SEAS5 Seasonal Forecast Released",
-        "SEAS5 Mid-season Update",
-        "MJO Pulse Detected",
-        "S2S Models Flag Elevated Risk",
-        "Track Forecast Day 7",
-        "Track Forecast Day 3",
-        "90th-percentile Wind Speed Alert",
-        "Community Evacuation Drills",
-        "Relief Consignment Departs",
-        "District-level Evacuation Orders",
-        "72-hour Landfall Warning",
-        "Landfall Occurs",
-        "First Damage Assessment Report",
-        "Floodwaters Begin Receding",
-        "Satellite Flood Extent Update",
-        "Cholera Risk Zones Identified",
-        "Drone Survey of Road Blockages",
-        "Mobile Lab Testing Results",
-        "Vector-borne Disease Window Opens",
-        "School Reconstruction Launch",
-        "After-Action Review Workshop",
-        "Three-month Recovery Check-in",
-        "Major Infrastructure Restoration",
-        "Transition to Resilience Programming"
-    ],
-    "Timestamp": [
-        "2020-04-01 00:00 UTC",
-        "2020-04-15 00:00 UTC",
-        "2020-05-01 00:00 UTC",
-        "2020-05-01 12:00 UTC",
-        "2020-05-10 00:00 UTC",
-        "2020-05-17 00:00 UTC",
-        "2020-05-11 00:00 UTC",
-        "2020-05-13 00:00 UTC",
-        "2020-05-16 00:00 UTC",
-        "2020-05-12 00:00 UTC",
-        "2020-05-17 00:00 UTC",
-        "2020-05-19 00:00 UTC",
-        "2020-05-19 18:00 UTC",
-        "2020-05-22 00:00 UTC",
-        "2020-05-23 00:00 UTC",
-        "2020-05-24 00:00 UTC",
-        "2020-05-23 00:00 UTC",
-        "2020-05-25 00:00 UTC",
-        "2020-05-27 00:00 UTC",
-        "2020-06-01 00:00 UTC",
-        "2020-07-15 00:00 UTC",
-        "2020-08-01 00:00 UTC",
-        "2020-12-01 00:00 UTC",
-        "2020-12-01 12:00 UTC"
-    ],
-    "Location": [
-        "Bay of Bengal",
-        "Bay of Bengal",
-        "Indian Ocean",
-        "Bay of Bengal",
-        "Predicted Path",
-        "Impact Zone",
-        "Cox's Bazar",
-        "Satkhira and Khulna",
-        "Dhaka to Khulna",
-        "Sundarbans Region",
-        "Coastal Areas",
-        "Landfall Zone",
-        "Multiple Districts",
-        "Low-lying Polders",
-        "Flood-affected Areas",
-        "Contaminated Areas",
-        "Road Network",
-        "Water and Soil Samples",
-        "Risk Zones",
-        "Affected Schools",
-        "UNICEF HQ",
-        "Affected Communities",
-        "Major Infrastructure",
-        "Program Areas"
-    ],
-    "Source": [
-        "ECMWF SEAS5",
-        "ECMWF SEAS5",
-        "MJO Monitoring",
-        "S2S Models",
-        "ECMWF Track",
-        "ECMWF Track",
-        "Ensemble Model",
-        "Field Teams",
-        "UNICEF Logistics",
-        "ECMWF Track",
-        "Regional Model",
-        "Weather Stations",
-        "Rapid Assessment",
-        "Field Reports",
-        "Satellite Data",
-        "Health Assessment",
-        "Drone Survey",
-        "Mobile Lab",
-        "Health Teams",
-        "Education Team",
-        "Stakeholders",
-        "Monitoring Team",
-        "Infrastructure Team",
-        "Program Team"
-    ],
-    "Alert_Level": [
-        "Info",
-        "Info",
-        "Watch",
-        "Warning",
-        "Warning",
-        "Alert",
-        "Alert",
-        "Warning",
-        "Info",
-        "Alert",
-        "Critical",
-        "Critical",
-        "Critical",
-        "Warning",
-        "Warning",
-        "Alert",
-        "Warning",
-        "Info",
-        "Alert",
-        "Info",
-        "Info",
-        "Info",
-        "Info",
-        "Info"
-    ]
-}
+# The alerts below (events.latest) read the phase/horizon/storm groups indexed here, not the raw frame
+@st.cache_resource
+def load_event_store():
+    """Events file parsed, tagged and indexed once per process, with landfall placed from each storm's track"""
+    df = read_events()
+    return EventStore(place_landfall(df, storm_landfalls(df["storm_id"].cat.categories)))
+
+with profile_section("load events"):
+    events = load_event_store()
 
-# Convert to DataFrame
-df = pd.DataFrame(events_data)
-df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+# Storm whose events the alerts and event chart below refer to (None = all storms)
+storm_ids = events.storms()
+storm_id = storm_ids[0] if len(storm_ids) == 1 else None
+if len(storm_ids) > 1:
+    storm_id = st.selectbox("Storm", [None] + storm_ids, format_func=lambda sid: "All storms" if sid is None else sid)
 
 # Create tabs for different views
 timeline_tab = st.tabs(["Timeline View"])[0]
@@ -258,7 +114,59 @@ with timeline_tab:
     )
 
     # Display the Gantt chart
-    st.altair_chart(gantt_chart, use_container_width=True)
+    with profile_section("render gantt chart"):
+        st.altair_chart(gantt_chart, use_container_width=True)
+
+    # Event chart: binned on the server so the spec stays small however many events are in view
+    st.subheader("Event Timeline")
+    event_span = events.span(storm_id)
+    if event_span is not None:
+        first_event, last_event = (t.tz_convert(None).to_pydatetime() for t in event_span)
+        window = (first_event, last_event)
+        if first_event < last_event:
+            window = st.slider(
+                "Time window (narrow it to drill down to individual events)",
+                min_value=first_event,
+                max_value=last_event,
+                value=(first_event, last_event),
+                format="YYYY-MM-DD"
+            )
+        aggregate = st.toggle("Aggregate on the server", value=True)
+
+        with profile_section("event chart"):
+            window_start = pd.Timestamp(window[0], tz="UTC")
+            window_end = pd.Timestamp(window[1], tz="UTC") + pd.Timedelta(seconds=1)
+            in_window = events.between(window_start, window_end, storm_id=storm_id)
+            alert_scale = alt.Scale(domain=ALERT_LEVELS, range=['#AED6F1', '#F9E79F', '#F5B041', '#E74C3C', '#7B241C'])
+
+            if aggregate and len(in_window) > MAX_RAW_EVENTS:
+                binned, width = bin_events(in_window, window_start, window_end)
+                event_chart = alt.Chart(binned).mark_bar().encode(
+                    x=alt.X('bin_start:T', title=''),
+                    x2='bin_end:T',
+                    y=alt.Y('Phase:N', sort=list(events.events['Phase'].cat.categories), title=''),
+                    color=alt.Color('max_alert:O', scale=alert_scale, title='Highest alert'),
+                    opacity=alt.Opacity('events:Q', legend=None),
+                    tooltip=['bin_start:T', 'Phase', 'events', 'max_alert', 'top_event']
+                )
+                caption = f"{len(in_window):,} events binned into {len(binned)} bars of {width_label(width)}"
+            else:
+                if len(in_window) > MAX_RAW_EVENTS:
+                    st.warning(f"Showing the first {MAX_RAW_EVENTS:,} of {len(in_window):,} events; "
+                               "turn on server aggregation to see them all.")
+                raw = in_window.head(MAX_RAW_EVENTS)
+                event_chart = alt.Chart(raw).mark_tick(thickness=2, size=20).encode(
+                    x=alt.X('Timestamp:T', title=''),
+                    y=alt.Y('Phase:N', sort=list(events.events['Phase'].cat.categories), title=''),
+                    color=alt.Color('Alert_Level:O', scale=alert_scale, title='Alert level'),
+                    tooltip=['Event', 'Timestamp:T', 'storm_id', 'Source', 'Location', 'Alert_Level']
+                )
+                caption = f"{len(raw):,} events"
+            st.altair_chart(event_chart.properties(height=220), use_container_width=True)
+            if st.session_state.get(PANEL_KEY):
+                # Serializing the spec again costs as much as sending it; only measured while profiling
+                caption += f" · {len(event_chart.to_json()) / 1024:.0f} KB chart spec"
+            st.caption(caption)
     
     st.markdown("---")
     
@@ -275,10 +183,9 @@ with timeline_tab:
         * **What?** ECMWF's seasonal forecasting system (SEAS5) gives you a heads-up 3–6 months out.
         """)
         
-        # Filter for seasonal events
-        seasonal_events = df[(df['Phase'] == 'Preparedness') & (df['Event'].str.contains('Seasonal'))]
-        if not seasonal_events.empty:
-            st.info(f"🔔 **Current Alert**: {seasonal_events.iloc[-1]['Event']}")
+        seasonal_event = events.latest(phase='Preparedness', horizon='seasonal', storm_id=storm_id)
+        if seasonal_event is not None:
+            st.info(f"🔔 **Current Alert**: {seasonal_event['Event']}")
             st.map()
         
         st.markdown("""
@@ -287,10 +194,9 @@ with timeline_tab:
         * **What?** Dynamical S2S forecasts signal periods of elevated cyclone risk.
         """)
         
-        # Filter for sub-seasonal events
-        subseasonal_events = df[(df['Phase'] == 'Preparedness') & (df['Event'].str.contains('MJO|Risk Period'))]
-        if not subseasonal_events.empty:
-            st.warning(f"⚠️ **Current Alert**: {subseasonal_events.iloc[-1]['Event']}")
+        subseasonal_event = events.latest(phase='Preparedness', horizon='s2s', storm_id=storm_id)
+        if subseasonal_event is not None:
+            st.warning(f"⚠️ **Current Alert**: {subseasonal_event['Event']}")
             st.map()
         
         st.markdown("""
@@ -302,10 +208,9 @@ with timeline_tab:
             * **Day 3:** errors closer to ~100 km
         """)
         
-        # Filter for medium-range events
-        medium_range_events = df[(df['Phase'] == 'Preparedness') & (df['Event'].str.contains('Track Forecast'))]
-        if not medium_range_events.empty:
-            st.error(f"🚨 **Current Alert**: {medium_range_events.iloc[-1]['Event']}")
+        medium_range_event = events.latest(phase='Preparedness', horizon='medium_range', storm_id=storm_id)
+        if medium_range_event is not None:
+            st.error(f"🚨 **Current Alert**: {medium_range_event['Event']}")
             st.map()
         
         st.markdown("""
@@ -314,10 +219,9 @@ with timeline_tab:
         * **What?** High-resolution regional models and satellite/radar updates.
         """)
         
-        # Filter for short-range events
-        short_range_events = df[(df['Phase'] == 'Preparedness') & (df['Event'].str.contains('Intensity|Surge'))]
-        if not short_range_events.empty:
-            st.error(f"🚨 **Current Alert**: {short_range_events.iloc[-1]['Event']}")
+        short_range_event = events.latest(phase='Preparedness', horizon='nowcast', storm_id=storm_id)
+        if short_range_event is not None:
+            st.error(f"🚨 **Current Alert**: {short_range_event['Event']}")
             st.map()
     
     # Monitoring Section
@@ -328,10 +232,9 @@ with timeline_tab:
         * Critical infrastructure status
         """)
         
-        # Filter for monitoring events
-        monitoring_events = df[df['Phase'] == 'Monitoring']
-        if not monitoring_events.empty:
-            st.error("🚨 **Current Alert**: " + monitoring_events.iloc[-1]['Event'])
+        monitoring_event = events.latest(phase='Monitoring', storm_id=storm_id)
+        if monitoring_event is not None:
+            st.error("🚨 **Current Alert**: " + monitoring_event['Event'])
             st.map()
     
     # Recovery Section
@@ -342,10 +245,9 @@ with timeline_tab:
         * Community recovery
         """)
         
-        # Filter for recovery events
-        recovery_events = df[df['Phase'] == 'Recovery']
-        if not recovery_events.empty:
-            st.warning("⚠️ **Current Alert**: " + recovery_events.iloc[-1]['Event'])
+        recovery_event = events.latest(phase='Recovery', storm_id=storm_id)
+        if recovery_event is not None:
+            st.warning("⚠️ **Current Alert**: " + recovery_event['Event'])
             st.map()
 
 # Add UNICEF footer
@@ -354,4 +256,6 @@ st.markdown("""
 <div style='text-align: center; color: #666; font-size: 0.8em;'>
     © 2025 UNICEF. All rights reserved. This application is part of UNICEF's efforts to improve disaster preparedness and response.
 </div>
-""", unsafe_allow_html=True) 
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_page_profile()
@@ -1,14 +1,13 @@
 import streamlit as st
-from openai import OpenAI
-from PyPDF2 import PdfReader
-import io
-from typing import List, Dict, Any, Union, cast
-from openai.types.chat import (
-    ChatCompletionSystemMessageParam,
-    ChatCompletionUserMessageParam,
-    ChatCompletionAssistantMessageParam,
-    ChatCompletionMessageParam
-)
+
+from utils.chat import budget_history, get_client, stream_chat
+from utils.profiling import finish_page_profile, profile_section, start_page_profile
+from utils.retrieval import build_pdf_index, file_hash, format_context
+
+# Number of document chunks sent with each question
+TOP_K_CHUNKS = 5
+# Token budget for the chat history sent with each question
+HISTORY_TOKEN_BUDGET = 3000
 
 # Set the page configuration
 st.set_page_config(
@@ -17,6 +16,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_profile("Chatbot")
 
 # Add UNICEF logo
 col1, col2 = st.columns([0.85, 0.15])
@@ -93,22 +93,36 @@ uploaded_file = st.file_uploader(
     help="Upload SOPs, meeting minutes, or other relevant documents"
 )
 
-document_text = ""
+@st.cache_resource(max_entries=8, show_spinner="Indexing document...")
+def load_document_index(document_hash, _uploaded_file):
+    # Keyed by content hash only, so reruns and re-uploads of the same file reuse the index
+    _uploaded_file.seek(0)
+    return build_pdf_index(_uploaded_file)
+
+document_index = None
 if uploaded_file:
     try:
-        pdf_reader = PdfReader(uploaded_file)
-        document_text = "".join(page.extract_text() for page in pdf_reader.pages)
-        st.success("Document uploaded successfully. The assistant will use this for context.")
-        
-        st.session_state["messages"].append(
-            {
-                "role": "assistant",
-                "content": (
-                    f"I've processed your document. Based on the selected focus area '{context_option}', "
-                    "I can provide specific guidance. What would you like to know?"
-                ),
-            }
-        )
+        # Hash each upload once per session rather than on every rerun
+        hashes = st.session_state.setdefault("document_hashes", {})
+        if uploaded_file.file_id not in hashes:
+            hashes[uploaded_file.file_id] = file_hash(uploaded_file.getvalue())
+        document_hash = hashes[uploaded_file.file_id]
+        with profile_section("index document"):
+            document_index = load_document_index(document_hash, uploaded_file)
+
+        if st.session_state.get("indexed_document") != document_hash:
+            st.session_state["indexed_document"] = document_hash
+            st.success("Document uploaded successfully. The assistant will use this for context.")
+
+            st.session_state["messages"].append(
+                {
+                    "role": "assistant",
+                    "content": (
+                        f"I've processed your document. Based on the selected focus area '{context_option}', "
+                        "I can provide specific guidance. What would you like to know?"
+                    ),
+                }
+            )
     except Exception as e:
         st.error(f"Error processing document: {str(e)}")
 
@@ -137,35 +151,41 @@ Focus on practical, actionable advice that can be implemented in real-world scen
 if prompt := st.chat_input("Ask a question about anticipatory actions..."):
     if not openai_api_key:
         st.info("Please add your OpenAI API key to continue.")
+        finish_page_profile()
         st.stop()
 
-    # OpenAI client
-    client = OpenAI(api_key=openai_api_key)
+    # OpenAI client, shared across reruns for this key
+    client = get_client(openai_api_key)
 
-    # Prepare context
+    # Prepare context: only the document chunks relevant to this question
     system_prompt = get_system_prompt(context_option)
-    context = f"{system_prompt}\n\nSelected Focus Area: {context_option}\n\nDocument Content:\n{document_text}\n\nUser Query: {prompt}"
+    document_context = ""
+    if document_index is not None:
+        with profile_section("retrieve excerpts"):
+            document_context = format_context(document_index.search(prompt, k=TOP_K_CHUNKS))
 
     # Add user message to chat
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.chat_message("user").write(prompt)
 
     try:
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "assistant", "content": f"Focus Area: {context_option}\n\nDocument Context:\n{document_text}"},
-            ]
-            + [{"role": msg["role"], "content": msg["content"]} for msg in st.session_state.messages],
-            max_tokens=1000,
-        )
-
-        # Process and display response
-        msg = response.choices[0].message.content
+        # Call OpenAI API, streaming tokens to the page as they arrive
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "assistant", "content": f"Focus Area: {context_option}\n\nRelevant Document Excerpts:\n{document_context}"},
+        ] + budget_history(st.session_state.messages, max_tokens=HISTORY_TOKEN_BUDGET)
+
+        metrics = {}
+        with st.chat_message("assistant"), profile_section("openai call"):
+            msg = st.write_stream(stream_chat(client, messages, metrics, model="gpt-4", max_tokens=1000))
         st.session_state.messages.append({"role": "assistant", "content": msg})
-        st.chat_message("assistant").write(msg)
+
+        # Per-turn latency, kept for the session
+        st.session_state.setdefault("turn_metrics", []).append(metrics)
+        st.caption(
+            f"First token after {metrics['ttft_s']:.2f}s · {metrics['tokens']} tokens "
+            f"at {metrics['tokens_per_s']:.0f} tokens/s"
+        )
     except Exception as e:
         st.error(f"Error communicating with OpenAI: {str(e)}")
 
@@ -175,4 +195,6 @@ st.markdown(
     "© UNICEF. All rights reserved."
     "</div>",
     unsafe_allow_html=True
-) 
\ No newline at end of file
+)
+
+finish_page_profile()
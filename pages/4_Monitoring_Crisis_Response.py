@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+
+from utils import products
+from utils.anomaly import AnomalyDetector
+from utils.boundaries import ADMIN_FILES, get_boundary_store
+from utils.monitoring import MonitoringStore, synthetic_batch
+from utils.profiling import finish_page_profile, profile_section, start_page_profile
+from utils.tracks import load_index
 
 # — App config —
 st.set_page_config(
@@ -12,6 +16,7 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+start_page_profile("Monitoring")
 
 # Add UNICEF logo
 col1, col2 = st.columns([0.85, 0.15])
@@ -20,51 +25,62 @@ with col2:
 
 st.title("Monitoring & Adaptation System")
 
-# Generate dummy data
-def generate_dummy_data():
-    # Time range for the last 7 days
-    dates = pd.date_range(end=datetime.now(), periods=168, freq='h')
-    
-    # Generate shelter data
-    shelter_data = pd.DataFrame({
-        'timestamp': dates,
-        'shelter_id': np.random.choice(['Shelter A', 'Shelter B', 'Shelter C'], size=168),
-        'occupancy': np.random.randint(50, 100, size=168),
-        'capacity': 100,
-        'status': np.random.choice(['Operational', 'At Capacity', 'Needs Support'], size=168, p=[0.7, 0.2, 0.1])
-    })
-    
-    # Generate stock data
-    stock_data = pd.DataFrame({
-        'timestamp': dates,
-        'hub_id': np.random.choice(['Hub North', 'Hub South', 'Hub East'], size=168),
-        'kits_available': np.random.randint(100, 500, size=168),
-        'kits_distributed': np.random.randint(50, 200, size=168),
-        'status': np.random.choice(['Adequate', 'Low Stock', 'Critical'], size=168, p=[0.6, 0.3, 0.1])
-    })
-    
-    # Generate facility data
-    facility_data = pd.DataFrame({
-        'timestamp': dates,
-        'facility_id': np.random.choice(['Clinic A', 'School B', 'Hospital C'], size=168),
-        'operational_status': np.random.randint(60, 100, size=168),
-        'type': np.random.choice(['Medical', 'Education', 'Health'], size=168),
-        'status': np.random.choice(['Fully Operational', 'Partially Operational', 'Non-Operational'], size=168, p=[0.6, 0.3, 0.1])
-    })
-    
-    # Generate WASH data
-    wash_data = pd.DataFrame({
-        'timestamp': dates,
-        'location': np.random.choice(['Zone 1', 'Zone 2', 'Zone 3'], size=168),
-        'kits_deployed': np.random.randint(20, 100, size=168),
-        'cases_reported': np.random.randint(0, 10, size=168),
-        'status': np.random.choice(['Normal', 'Alert', 'Critical'], size=168, p=[0.7, 0.2, 0.1])
-    })
-    
-    return shelter_data, stock_data, facility_data, wash_data
+# Simulated feed: the entities reporting on each stream and how much history to seed
+DEMO_ENTITIES = {
+    "shelter": ['Shelter A', 'Shelter B', 'Shelter C'],
+    "stock": ['Hub North', 'Hub South', 'Hub East'],
+    "facility": ['Clinic A', 'School B', 'Hospital C'],
+    "wash": ['Zone 1', 'Zone 2', 'Zone 3'],
+}
+HISTORY_HOURS = 168
+MAX_ALERTS_SHOWN = 10
+MAX_IMPACT_UNITS = 10
 
-# Generate the dummy data
-shelter_data, stock_data, facility_data, wash_data = generate_dummy_data()
+@st.cache_resource
+def get_monitoring_store():
+    """Process-wide append-only store shared by every session"""
+    return MonitoringStore()
+
+@st.cache_resource
+def get_anomaly_detector():
+    """Detector state lives as long as the store it is fed alongside"""
+    return AnomalyDetector()
+
+@st.cache_data(ttl=3600)
+def load_storm_impact():
+    """Exposure of the most recent catalogued storm at the finest admin level on disk"""
+    index = load_index()
+    if index is None or index.empty:
+        return None, None
+    storm_id = index.sort_values('start_time').index[-1]
+    store = get_boundary_store()
+    levels = [level for level in ADMIN_FILES if store.path_for(level).exists()]
+    if not levels:
+        return storm_id, None
+    # Served from the hazard product cache the Defining Risk page fills
+    return storm_id, products.exposure_table(storm_id, levels[-1])
+
+@profile_section("ingest streams")
+def ingest_new_data(store, detector):
+    """Append the hourly records that arrived since the last rerun"""
+    now = pd.Timestamp(datetime.now()).floor('h')
+    # Held across the check and the append so concurrent sessions never ingest an hour twice
+    with store.lock:
+        for stream, entities in DEMO_ENTITIES.items():
+            last = store.last_timestamp(stream)
+            if last is None:
+                start = now - pd.Timedelta(hours=HISTORY_HOURS - 1)
+            else:
+                start = last + pd.Timedelta(hours=1)
+            times = pd.date_range(start, now, freq='h')
+            if len(times):
+                batch = synthetic_batch(stream, times, entities)
+                store.append(stream, batch)
+                detector.process(stream, batch)
+
+store = get_monitoring_store()
+detector = get_anomaly_detector()
+ingest_new_data(store, detector)
 
 # Create tabs for different sections
 tab1, tab2, tab3, tab4 = st.tabs([
@@ -110,6 +126,19 @@ with tab1:
     
     st.dataframe(pd.DataFrame(streams_data), use_container_width=True)
 
+    # Volume currently held by the append-only store
+    ingest_stats = pd.DataFrame(store.stats()).T
+    st.dataframe(ingest_stats, use_container_width=True)
+
+    # Footprints and exposure tables shared with the Defining Risk page through the disk cache
+    cache_stats = products.get_product_cache().stats()
+    st.caption(
+        f"Hazard product cache: {cache_stats['entries']} products, {cache_stats['mb']:.1f} of "
+        f"{cache_stats['cap_mb']:.0f} MB, hit rate "
+        + (f"{cache_stats['hit_rate']:.0%}" if cache_stats['hit_rate'] is not None else "n/a")
+        + " in this process"
+    )
+
 with tab2:
     st.header("Key Monitoring Dashboards")
     
@@ -119,99 +148,100 @@ with tab2:
     with col1:
         st.subheader("Shelter Occupancy")
         # Calculate current occupancy
-        current_occupancy = shelter_data.groupby('shelter_id')['occupancy'].last()
-        fig = px.bar(
-            current_occupancy,
-            title="Current Shelter Occupancy",
-            labels={'value': 'Occupancy %', 'shelter_id': 'Shelter'},
-            color=current_occupancy.values,
-            color_continuous_scale='RdYlGn'
-        )
+        with profile_section("shelter figure"):
+            current_occupancy = store.latest('shelter')['occupancy']
+            fig = px.bar(
+                current_occupancy,
+                title="Current Shelter Occupancy",
+                labels={'value': 'Occupancy %', 'shelter_id': 'Shelter'},
+                color=current_occupancy.values,
+                color_continuous_scale='RdYlGn'
+            )
         st.plotly_chart(fig, use_container_width=True)
         
         st.subheader("Stock & Kit Distribution")
         # Calculate current stock levels
-        current_stock = stock_data.groupby('hub_id')['kits_available'].last()
-        fig = px.bar(
-            current_stock,
-            title="Current Stock Levels by Hub",
-            labels={'value': 'Kits Available', 'hub_id': 'Hub'},
-            color=current_stock.values,
-            color_continuous_scale='RdYlGn'
-        )
+        with profile_section("stock figure"):
+            current_stock = store.latest('stock')['kits_available']
+            fig = px.bar(
+                current_stock,
+                title="Current Stock Levels by Hub",
+                labels={'value': 'Kits Available', 'hub_id': 'Hub'},
+                color=current_stock.values,
+                color_continuous_scale='RdYlGn'
+            )
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("Facility Status")
         # Calculate facility operational status
-        current_facility = facility_data.groupby('facility_id')['operational_status'].last()
-        fig = px.bar(
-            current_facility,
-            title="Facility Operational Status",
-            labels={'value': 'Operational %', 'facility_id': 'Facility'},
-            color=current_facility.values,
-            color_continuous_scale='RdYlGn'
-        )
+        with profile_section("facility figure"):
+            current_facility = store.latest('facility')['operational_status']
+            fig = px.bar(
+                current_facility,
+                title="Facility Operational Status",
+                labels={'value': 'Operational %', 'facility_id': 'Facility'},
+                color=current_facility.values,
+                color_continuous_scale='RdYlGn'
+            )
         st.plotly_chart(fig, use_container_width=True)
         
         st.subheader("Health & WASH Indicators")
         # Calculate WASH metrics
-        current_wash = wash_data.groupby('location')['kits_deployed'].last()
-        fig = px.bar(
-            current_wash,
-            title="WASH Kits Deployed by Zone",
-            labels={'value': 'Kits Deployed', 'location': 'Zone'},
-            color=current_wash.values,
-            color_continuous_scale='RdYlGn'
-        )
+        with profile_section("wash figure"):
+            current_wash = store.latest('wash')['kits_deployed']
+            fig = px.bar(
+                current_wash,
+                title="WASH Kits Deployed by Zone",
+                labels={'value': 'Kits Deployed', 'location': 'Zone'},
+                color=current_wash.values,
+                color_continuous_scale='RdYlGn'
+            )
         st.plotly_chart(fig, use_container_width=True)
 
+    st.subheader("Storm Impact by Admin Unit")
+    with profile_section("storm impact"):
+        impact_storm, impact_df = load_storm_impact()
+    if impact_df is None:
+        st.info("No catalogued storm with boundary data to summarise.")
+    else:
+        st.caption(f"Units most exposed to {impact_storm}, from its modelled wind footprint")
+        st.dataframe(
+            impact_df.head(MAX_IMPACT_UNITS).drop(columns=['unit', 'first_impact_step']),
+            use_container_width=True,
+            hide_index=True
+        )
+
 with tab3:
     st.header("Anomaly Detection & Alerts")
     
-    # Generate dummy alerts
-    alerts = [
-        {
-            "type": "Shelter Spike Alert",
-            "location": "Shelter A",
-            "message": "Occupancy at 95% - Above threshold",
-            "severity": "High",
-            "timestamp": datetime.now() - timedelta(hours=2)
-        },
-        {
-            "type": "Stock-out Warning",
-            "location": "Hub South",
-            "message": "Kit usage rate 25% above forecast",
-            "severity": "Medium",
-            "timestamp": datetime.now() - timedelta(hours=4)
-        },
-        {
-            "type": "Facility Drop-off",
-            "location": "Clinic A",
-            "message": "Operational status at 75%",
-            "severity": "High",
-            "timestamp": datetime.now() - timedelta(hours=1)
-        },
-        {
-            "type": "WASH Outbreak Trigger",
-            "location": "Zone 2",
-            "message": "5 cholera cases reported in last 24h",
-            "severity": "Critical",
-            "timestamp": datetime.now() - timedelta(hours=3)
-        }
-    ]
+    # Alerts opened by the streaming detector and still active
+    with profile_section("active alerts"):
+        alerts = detector.active_alerts()
+    severity_counts = alerts['severity'].value_counts()
+    metric_cols = st.columns(3)
+    for col, severity in zip(metric_cols, ["Critical", "High", "Medium"]):
+        col.metric(f"{severity} alerts", int(severity_counts.get(severity, 0)))
+    
+    if alerts.empty:
+        st.info("No active alerts")
     
     # Display alerts
-    for alert in alerts:
+    for alert in alerts.head(MAX_ALERTS_SHOWN).to_dict('records'):
         with st.container():
             col1, col2, col3 = st.columns([0.2, 0.6, 0.2])
             with col1:
-                st.write(f"**{alert['type']}**")
+                st.write(f"**{alert['alert_type']}**")
             with col2:
-                st.write(f"{alert['message']} at {alert['location']}")
+                st.write(f"{alert['message']} at {alert['entity']}")
             with col3:
                 st.write(f"Severity: {alert['severity']}")
+            st.caption(f"{alert['timestamp']:%Y-%m-%d %H:%M} · {alert['dedup_key']}")
             st.divider()
+    
+    if len(alerts) > MAX_ALERTS_SHOWN:
+        with st.expander(f"All {len(alerts)} active alerts"):
+            st.dataframe(alerts, use_container_width=True)
 
 with tab4:
     st.header("Adaptive Feedback Loop")
@@ -255,4 +285,6 @@ with tab4:
 
 # Add a footer with last update time
 st.divider()
-st.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}") 
\ No newline at end of file
+st.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+finish_page_profile()
@@ -0,0 +1,224 @@
+"""Streaming anomaly detection over the monitoring streams.
+
+Every rule keeps its state as NumPy arrays indexed by entity code (a ring of
+recent values, an EWMA level, whether the alert is currently open), so a batch
+is evaluated for all entities at once: one vectorized step per timestamp in the
+batch, not one Python loop per entity. Alerts fire when a condition starts to
+hold and stay open, under a stable deduplication key, until it clears.
+"""
+import threading
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.monitoring import STREAMS, Codes
+
+SEVERITIES = ("Low", "Medium", "High", "Critical")
+# A z-score/EWMA deviation this many times the trigger escalates the severity one level
+ESCALATE_AT = 1.5
+MAX_LOG = 10_000
+
+
+class Rule(NamedTuple):
+    rule_id: str
+    alert_type: str
+    stream: str
+    column: str
+    kind: str  # "threshold", "zscore" or "ewma"
+    trigger: float
+    direction: str = "above"  # or "below"
+    window: int = 24  # zscore baseline / threshold rolling-sum length (1 = raw value)
+    alpha: float = 0.2  # EWMA smoothing
+    min_periods: int = 12
+    severity: str = "Medium"
+    message: str = "{column} at {value:.0f}"
+
+
+DEFAULT_RULES = (
+    Rule("shelter-occupancy", "Shelter Spike Alert", "shelter", "occupancy", "threshold", 95,
+         window=1, severity="High", message="Occupancy at {value:.0f}% - Above threshold"),
+    Rule("shelter-zscore", "Shelter Spike Alert", "shelter", "occupancy", "zscore", 3.0,
+         message="Occupancy {value:.0f}% is {score:.1f} sd above the last 24h"),
+    Rule("stock-usage", "Stock-out Warning", "stock", "kits_distributed", "ewma", 0.5,
+         message="Kit usage rate {score:.0%} above forecast"),
+    Rule("stock-low", "Stock-out Warning", "stock", "kits_available", "threshold", 120,
+         direction="below", window=1, severity="High", message="Only {value:.0f} kits available"),
+    Rule("facility-drop", "Facility Drop-off", "facility", "operational_status", "threshold", 65,
+         direction="below", window=1, severity="High", message="Operational status at {value:.0f}%"),
+    Rule("facility-zscore", "Facility Drop-off", "facility", "operational_status", "zscore", 3.0,
+         direction="below", message="Operational status {value:.0f}% is {score:.1f} sd below the last 24h"),
+    Rule("wash-cases", "WASH Outbreak Trigger", "wash", "cases_reported", "threshold", 130,
+         severity="Critical", message="{score:.0f} cases reported in last 24h"),
+)
+
+ALERT_COLUMNS = ["timestamp", "alert_type", "entity", "stream", "rule_id", "value", "score",
+                 "severity", "message", "dedup_key"]
+
+
+def _escalate(severity, steps):
+    """Raise each severity by its number of steps, capped at Critical"""
+    base = SEVERITIES.index(severity)
+    levels = np.minimum(base + steps, len(SEVERITIES) - 1)
+    return np.asarray(SEVERITIES, dtype=object)[levels]
+
+
+class _RuleState:
+    """Per-entity arrays for one rule, grown as new entities appear"""
+
+    def __init__(self, rule):
+        self.rule = rule
+        width = max(rule.window, 1)
+        self.ring = np.full((0, width), np.nan)
+        self.pos = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.level = np.full(0, np.nan)
+        self.active = np.zeros(0, dtype=bool)
+
+    def grow(self, n):
+        extra = n - len(self.active)
+        if extra <= 0:
+            return
+        self.ring = np.vstack([self.ring, np.full((extra, self.ring.shape[1]), np.nan)])
+        self.pos = np.concatenate([self.pos, np.zeros(extra, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.level = np.concatenate([self.level, np.full(extra, np.nan)])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+
+    def _push(self, idx, values):
+        self.ring[idx, self.pos[idx]] = values
+        self.pos[idx] = (self.pos[idx] + 1) % self.ring.shape[1]
+        self.count[idx] = np.minimum(self.count[idx] + 1, self.ring.shape[1])
+
+    def step(self, idx, values):
+        """Evaluate one timestamp for entities ``idx``; returns (firing mask, score)"""
+        rule = self.rule
+        sign = 1.0 if rule.direction == "above" else -1.0
+
+        if rule.kind == "threshold":
+            self._push(idx, values)
+            measured = values if rule.window == 1 else np.nansum(self.ring[idx], axis=1)
+            score = measured
+            firing = sign * (measured - rule.trigger) >= 0
+        elif rule.kind == "zscore":
+            # Baseline excludes the current value so a spike cannot mask itself
+            history = self.ring[idx]
+            ready = self.count[idx] >= rule.min_periods
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.nanmean(np.where(ready[:, None], history, 0.0), axis=1)
+                std = np.nanstd(np.where(ready[:, None], history, 0.0), axis=1)
+                score = sign * (values - mean) / std
+            score = np.where(ready & (std > 0), score, 0.0)
+            firing = score >= rule.trigger
+            self._push(idx, values)
+        elif rule.kind == "ewma":
+            level = self.level[idx]
+            seen = ~np.isnan(level)
+            ready = seen & (self.count[idx] >= rule.min_periods)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                score = sign * (values - level) / np.abs(level)
+            score = np.where(ready & np.isfinite(score), score, 0.0)
+            firing = score >= rule.trigger
+            self.level[idx] = np.where(seen, rule.alpha * values + (1 - rule.alpha) * level, values)
+            self.count[idx] = self.count[idx] + 1
+        else:
+            raise ValueError(f"Unknown rule kind: {rule.kind}")
+        return firing, score
+
+
+class AnomalyDetector:
+    """Incremental, vectorized rule engine fed with the same batches as the store"""
+
+    def __init__(self, rules=DEFAULT_RULES, max_log=MAX_LOG):
+        self.rules = tuple(rules)
+        self._states = {rule.rule_id: _RuleState(rule) for rule in self.rules}
+        self._entities = {stream: Codes() for stream in STREAMS}
+        self._open = {}  # dedup_key -> alert dict
+        self._log = deque(maxlen=max_log)
+        self._lock = threading.Lock()
+
+    def process(self, stream, records):
+        """Run every rule for ``stream`` over a batch; returns the newly opened alerts"""
+        rules = [r for r in self.rules if r.stream == stream]
+        if not rules or len(records) == 0:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        entity_column = STREAMS[stream].entity
+
+        with self._lock:
+            codebook = self._entities[stream]
+            codes = codebook.encode(records[entity_column])
+            times = pd.to_datetime(records["timestamp"]).to_numpy("datetime64[ns]")
+            columns = {}
+            for rule in rules:
+                self._states[rule.rule_id].grow(len(codebook.values))
+                columns[rule.column] = records[rule.column].to_numpy(dtype=np.float64)
+
+            # One vectorized step per distinct timestamp, in time order
+            order = np.argsort(times, kind="stable")
+            bounds = np.flatnonzero(np.diff(times[order].view(np.int64))) + 1
+            opened = []
+            for step_rows in np.split(order, bounds):
+                # Keep the last record per entity if one reported twice at this time
+                idx, last = np.unique(codes[step_rows][::-1], return_index=True)
+                rows = step_rows[::-1][last]
+                timestamp = pd.Timestamp(times[rows[0]])
+                for rule in rules:
+                    opened.extend(self._step(rule, timestamp, idx, columns[rule.column][rows], codebook))
+
+        if not opened:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        return pd.DataFrame(opened, columns=ALERT_COLUMNS)
+
+    def _step(self, rule, timestamp, idx, values, codebook):
+        state = self._states[rule.rule_id]
+        firing, score = state.step(idx, values)
+        was_active = state.active[idx]
+        rising = firing & ~was_active
+        cleared = ~firing & was_active
+        state.active[idx] = firing
+
+        for code in idx[cleared]:
+            self._open.pop(f"{rule.rule_id}:{codebook.values[code]}", None)
+        if not rising.any():
+            return []
+
+        if rule.kind == "threshold":
+            severities = np.full(int(rising.sum()), rule.severity, dtype=object)
+        else:
+            severities = _escalate(rule.severity, (score[rising] >= ESCALATE_AT * rule.trigger).astype(int))
+        alerts = []
+        for code, value, s, severity in zip(idx[rising], values[rising], score[rising], severities):
+            entity = codebook.values[code]
+            key = f"{rule.rule_id}:{entity}"
+            alert = {
+                "timestamp": timestamp,
+                "alert_type": rule.alert_type,
+                "entity": entity,
+                "stream": rule.stream,
+                "rule_id": rule.rule_id,
+                "value": float(value),
+                "score": float(s),
+                "severity": severity,
+                "message": rule.message.format(column=rule.column, value=value, score=s),
+                "dedup_key": key,
+            }
+            self._open[key] = alert
+            self._log.append(alert)
+            alerts.append(alert)
+        return alerts
+
+    def active_alerts(self):
+        """Currently open alerts, most severe and most recent first"""
+        with self._lock:
+            alerts = pd.DataFrame(list(self._open.values()), columns=ALERT_COLUMNS)
+        if alerts.empty:
+            return alerts
+        rank = alerts["severity"].map({s: i for i, s in enumerate(SEVERITIES)})
+        order = np.lexsort((-alerts["timestamp"].astype("int64").to_numpy(), -rank.to_numpy()))
+        return alerts.iloc[order].reset_index(drop=True)
+
+    def alert_log(self):
+        """Every alert opened so far (bounded), oldest first"""
+        with self._lock:
+            return pd.DataFrame(list(self._log), columns=ALERT_COLUMNS)
@@ -0,0 +1,191 @@
+"""Headless batch runner: precompute hazard products for many storms.
+
+    python -m utils.batch AMPHAN_2020 --levels "Admin Level 0" "Admin Level 3"
+    python -m utils.batch --all --memory-mb 8000
+
+Each storm runs in its own spawned worker process (a fresh one per storm)
+through load -> footprint -> exposure per admin level -> report. Products are
+computed through ``utils.products``, so the Streamlit pages serve what a batch
+run wrote. The memory budget sets how many workers run at once and caps each
+worker's address space, so an outsized storm fails on its own instead of
+taking the host down. Reports and a run summary with per-storm stage timings
+are written as JSON under ``data/reports/``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils.boundaries import ADMIN_FILES
+
+REPORT_DIR = Path(__file__).resolve().parent.parent / "data" / "reports"
+# Planning figure for one storm's peak memory on the default grid (footprint blocks dominate)
+WORKER_MB = 1000
+DEFAULT_MEMORY_MB = 6000
+# Units listed per admin level in a storm report
+REPORT_TOP_UNITS = 10
+
+
+def _limit_memory(limit_mb):
+    """Worker initializer: cap the address space so a runaway storm raises MemoryError"""
+    if limit_mb:
+        limit = int(limit_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _records(table, columns):
+    top = table.head(REPORT_TOP_UNITS)[columns]
+    return json.loads(top.to_json(orient="records", date_format="iso"))
+
+
+def run_storm(storm_id, levels, report_dir=REPORT_DIR):
+    """Run the pipeline for one storm and write its report; returns timings and outcome"""
+    from utils import products
+    from utils.crossing import storm_landfall
+    from utils.tracks import load_track
+
+    result = {"storm_id": storm_id, "status": "ok", "error": None, "timings": {}, "levels": {}}
+    timings = result["timings"]
+    try:
+        start = time.perf_counter()
+        track = load_track(storm_id)
+        timings["load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        footprint = products.wind_footprint(storm_id, track)
+        timings["footprint"] = time.perf_counter() - start
+
+        report = {
+            "storm_id": storm_id,
+            "name": str(track["name"].iloc[0]) if "name" in track else storm_id,
+            "start": track["time"].iloc[0].isoformat(),
+            "end": track["time"].iloc[-1].isoformat(),
+            "max_sustained_wind_kn": float(track["max_sustained_wind"].max()),
+            "footprint_peak_wind_ms": float(footprint.wind.max()),
+            "levels": {},
+        }
+        for level in levels:
+            start = time.perf_counter()
+            try:
+                table = products.exposure_table(storm_id, level, track)
+                population = products.population_exposure(storm_id, level, track)
+            except FileNotFoundError:
+                result["levels"][level] = "no boundary data"
+                continue
+            timings[f"exposure {level}"] = time.perf_counter() - start
+            result["levels"][level] = "ok"
+            level_report = {
+                "units": int(len(table)),
+                "units_gale_force": int((table["hazard_fraction"] > 0).sum()),
+                "top_units": _records(table, ["name", "peak_wind_ms", "hazard_fraction", "first_impact"]),
+            }
+            if population is not None:
+                level_report["exposed_population"] = float(population["exposed_population"].sum())
+                if "exposed_children" in population:
+                    level_report["exposed_children"] = float(population["exposed_children"].sum())
+            report["levels"][level] = level_report
+
+        start = time.perf_counter()
+        landfall = storm_landfall(storm_id)
+        report["landfall"] = None if landfall is None else {
+            "time": landfall.time.isoformat(), "lon": landfall.lon, "lat": landfall.lat,
+            "wind_kn": landfall.wind_kn,
+        }
+        report_dir = Path(report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        path = report_dir / f"{storm_id}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        result["report"] = str(path)
+        timings["report"] = time.perf_counter() - start
+    except MemoryError:
+        result.update(status="failed", error="memory budget exceeded")
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    result["total_s"] = sum(timings.values())
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def plan_workers(n_storms, memory_mb, max_workers=None):
+    """(workers, per-worker MB): as many workers as the budget and CPUs allow, at least one"""
+    workers = min(max_workers or os.cpu_count() or 1, n_storms, max(1, int(memory_mb // WORKER_MB)))
+    workers = max(workers, 1)
+    return workers, memory_mb / workers
+
+
+def run_batch(storm_ids, levels, memory_mb=DEFAULT_MEMORY_MB, max_workers=None, report_dir=REPORT_DIR):
+    """Run every storm in a process pool, one fresh worker per storm, and write the run summary"""
+    report_dir = Path(report_dir)
+    workers, worker_mb = plan_workers(len(storm_ids), memory_mb, max_workers)
+    summary = {
+        "run_id": uuid.uuid4().hex[:12],
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "levels": list(levels),
+        "workers": workers,
+        "memory_mb": memory_mb,
+        "worker_limit_mb": worker_mb,
+        "storms": [],
+    }
+    print(f"Running {len(storm_ids)} storms on {workers} workers ({worker_mb:.0f} MB each)...")
+    start = time.perf_counter()
+    # Spawned workers: forking a parent that already holds GDAL/dask threads can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1,
+                             initializer=_limit_memory, initargs=(worker_mb,)) as pool:
+        futures = {pool.submit(run_storm, storm_id, levels, report_dir): storm_id for storm_id in storm_ids}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OS), so there is no result to read
+                result = {"storm_id": futures[future], "status": "failed", "error": f"{type(e).__name__}: {e}",
+                          "timings": {}, "levels": {}, "total_s": None, "peak_rss_mb": None}
+            summary["storms"].append(result)
+            total = f"{result['total_s']:.1f}s" if result["total_s"] is not None else "-"
+            print(f"   {result['storm_id']:<24} {result['status']:<7} {total:>8}  {result['error'] or ''}")
+
+    summary["storms"].sort(key=lambda r: r["storm_id"])
+    summary["wall_s"] = time.perf_counter() - start
+    summary["failed"] = sum(r["status"] != "ok" for r in summary["storms"])
+    runs_dir = report_dir / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    summary_path = runs_dir / f"{summary['started'][:19].replace(':', '')}-{summary['run_id']}.json"
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Finished in {summary['wall_s']:.1f}s, {summary['failed']} failed; summary in {summary_path}")
+    return summary
+
+
+def main():
+    from utils.tracks import load_index
+
+    parser = argparse.ArgumentParser(description="Precompute footprints, exposure and reports for many storms")
+    parser.add_argument("storm_ids", nargs="*", help="catalog storm ids (see python -m utils.tracks)")
+    parser.add_argument("--all", action="store_true", help="every storm in the catalog")
+    parser.add_argument("--levels", nargs="+", default=list(ADMIN_FILES), choices=list(ADMIN_FILES))
+    parser.add_argument("--memory-mb", type=float, default=DEFAULT_MEMORY_MB, help="total memory budget")
+    parser.add_argument("--workers", type=int, help="upper bound on worker processes")
+    parser.add_argument("--report-dir", type=Path, default=REPORT_DIR)
+    args = parser.parse_args()
+
+    storm_ids = list(args.storm_ids)
+    if args.all:
+        index = load_index()
+        storm_ids += [] if index is None else [s for s in index.index if s not in storm_ids]
+    if not storm_ids:
+        parser.error("give storm ids or --all")
+    summary = run_batch(storm_ids, args.levels, args.memory_mb, args.workers, args.report_dir)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
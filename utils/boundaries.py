@@ -0,0 +1,144 @@
+"""Process-wide store for administrative boundary GeoJSON.
+
+Each admin level is parsed once per process and kept as a single shared copy
+for every Streamlit session. Simplified versions are built at load time so the
+map can ask for the level of detail that matches its zoom.
+"""
+import json
+import threading
+from pathlib import Path
+
+import shapely
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data" / "boundaries"
+BOUNDARY_DIR = DATA_DIR / "Bangladesh_Latest_-_Global_Administrative_Boundaries"
+
+# Map admin levels to file names
+ADMIN_FILES = {
+    "Admin Level 0": "adm0.geojson",
+    "Admin Level 1": "adm1.geojson",
+    "Admin Level 2": "adm2.geojson",
+    "Admin Level 3": "adm3.geojson",
+    "Admin Level 4": "adm4.geojson"
+}
+
+# Simplification tolerances in degrees, finest first (0.0 = original geometry)
+TOLERANCES = (0.0, 0.0005, 0.002, 0.01, 0.05)
+
+
+def tolerance_for_zoom(zoom):
+    """Pick the coarsest tolerance that stays below half a pixel at this zoom"""
+    # Degrees of longitude covered by one 256 px tile pixel at this zoom level
+    pixel_deg = 360.0 / (256 * 2 ** max(float(zoom), 0.0))
+    usable = [tol for tol in TOLERANCES if tol <= pixel_deg / 2]
+    return max(usable) if usable else TOLERANCES[0]
+
+
+def _simplify(geoms, tolerance):
+    """Simplify a polygon coverage without opening gaps between neighbours"""
+    if tolerance == 0.0:
+        return geoms
+    # coverage_simplify keeps shared edges shared (shapely >= 2.1, GEOS >= 3.12)
+    if hasattr(shapely, "coverage_simplify") and shapely.geos_version >= (3, 12, 0):
+        try:
+            return shapely.coverage_simplify(geoms, tolerance)
+        except shapely.errors.GEOSException:
+            pass
+    return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+class BoundaryStore:
+    """Thread-safe cache of parsed and pre-simplified admin boundaries"""
+
+    def __init__(self, base_path=BOUNDARY_DIR, tolerances=TOLERANCES):
+        self.base_path = Path(base_path)
+        self.tolerances = tuple(sorted(tolerances))
+        self._levels = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0}
+
+    def path_for(self, admin_level):
+        file_name = ADMIN_FILES.get(admin_level)
+        if not file_name:
+            raise ValueError(f"Invalid admin level: {admin_level}")
+        return self.base_path / file_name
+
+    def _load(self, admin_level):
+        file_path = self.path_for(admin_level)
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with open(file_path, 'r') as f:
+            geojson_data = json.load(f)
+
+        features = geojson_data.get("features", [])
+        geoms = shapely.from_geojson([json.dumps(feat["geometry"]) for feat in features])
+
+        # Keep the untouched original for the finest level
+        versions = {0.0: geojson_data}
+        simplified_geoms = {0.0: geoms}
+        for tol in self.tolerances:
+            if tol == 0.0:
+                continue
+            simplified = _simplify(geoms, tol)
+            simplified_geoms[tol] = simplified
+            versions[tol] = {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": feat.get("properties", {}),
+                        "geometry": json.loads(shapely.to_geojson(geom)),
+                    }
+                    for feat, geom in zip(features, simplified)
+                ],
+            }
+        return {"geometries": simplified_geoms, "versions": versions}
+
+    def _entry(self, admin_level):
+        with self._lock:
+            entry = self._levels.get(admin_level)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry
+            self._stats["misses"] += 1
+            entry = self._load(admin_level)
+            self._levels[admin_level] = entry
+            self._stats["loads"] += 1
+            return entry
+
+    @staticmethod
+    def _snap(versions, zoom, tolerance):
+        if tolerance is None:
+            tolerance = tolerance_for_zoom(zoom) if zoom is not None else 0.0
+        return max([tol for tol in versions if tol <= tolerance], default=0.0)
+
+    def get(self, admin_level, zoom=None, tolerance=None):
+        """Return the GeoJSON for an admin level, simplified for the map zoom"""
+        versions = self._entry(admin_level)["versions"]
+        return versions[self._snap(versions, zoom, tolerance)]
+
+    def geometries(self, admin_level, zoom=None, tolerance=None):
+        """Return the shapely geometries for an admin level (full resolution by default)"""
+        geoms = self._entry(admin_level)["geometries"]
+        return geoms[self._snap(geoms, zoom, tolerance)]
+
+    def properties(self, admin_level):
+        """Return the feature properties for an admin level, in geometry order"""
+        return [feat.get("properties", {}) for feat in self.get(admin_level)["features"]]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, levels=sorted(self._levels))
+
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+
+
+_store = BoundaryStore()
+
+
+def get_boundary_store():
+    """Return the process-wide boundary store"""
+    return _store
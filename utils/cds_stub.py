@@ -0,0 +1,160 @@
+"""Local stand-in for the CDS retrieve API, serving GRIB fixtures.
+
+``POST /retrieve/<dataset>`` with a CDS request body returns GRIB bytes, one
+part per requested variable and date: the fixture file
+``<variable>_<date>.grib`` from ``--fixture-dir`` when there is one (served
+as is, whatever the requested hours), otherwise seeded synthetic fields on the
+requested area, grid and hours, built with eccodes. Latency and a failure rate
+can be injected to exercise concurrent and retried downloads:
+
+    python -m utils.cds_stub --port 8002 --latency 2 --failure-rate 0.2
+
+and point ``utils.era5_download.HTTPBackend("http://127.0.0.1:8002")`` at it
+in place of ``cdsapi.Client()``.
+"""
+import argparse
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+# ECMWF parameter ids, and the mean and spread of the synthetic values
+PARAMETERS = {
+    '10m_u_component_of_wind': (165, 0.0, 6.0),
+    '10m_v_component_of_wind': (166, 0.0, 6.0),
+    'mean_sea_level_pressure': (151, 100800.0, 600.0),
+    'total_precipitation': (228, 0.0005, 0.001),
+    '2m_temperature': (167, 299.0, 3.0),
+}
+
+
+def synthetic_grib(variable, date, times, area, grid=(0.25, 0.25)):
+    """GRIB1 messages for one variable on one date, one per hour, seeded by their request"""
+    import eccodes
+
+    param_id, mean, spread = PARAMETERS[variable]
+    north, west, south, east = area
+    d_lon, d_lat = grid
+    ni = int(round((east - west) / d_lon)) + 1
+    nj = int(round((north - south) / d_lat)) + 1
+    buffer = io.BytesIO()
+    for hour in times:
+        seed = zlib.crc32(f"{variable}/{date}/{hour}".encode())
+        values = np.random.default_rng(seed).normal(mean, spread, ni * nj)
+        if variable == 'total_precipitation':
+            values = np.abs(values)
+        message = eccodes.codes_grib_new_from_samples('regular_ll_sfc_grib1')
+        try:
+            eccodes.codes_set_key_vals(message, {
+                'paramId': param_id,
+                'dataDate': int(date.replace('-', '')),
+                'dataTime': int(hour.replace(':', '')),
+                'Ni': ni, 'Nj': nj,
+                'latitudeOfFirstGridPointInDegrees': north,
+                'longitudeOfFirstGridPointInDegrees': west,
+                'latitudeOfLastGridPointInDegrees': north - (nj - 1) * d_lat,
+                'longitudeOfLastGridPointInDegrees': west + (ni - 1) * d_lon,
+                'iDirectionIncrementInDegrees': d_lon,
+                'jDirectionIncrementInDegrees': d_lat,
+            })
+            eccodes.codes_set_values(message, values)
+            buffer.write(eccodes.codes_get_message(message))
+        finally:
+            eccodes.codes_release(message)
+    return buffer.getvalue()
+
+
+def make_handler(fixture_dir=None, latency=0.0, failure_rate=0.0, seed=0, stats=None):
+    stats = {} if stats is None else stats
+    stats.update(requests=0, failures=0, bytes=0)
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class CDSStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status, message):
+            self._send(status, json.dumps({"error": message}).encode(), "application/json")
+
+        def do_POST(self):
+            if not self.path.startswith("/retrieve/"):
+                self._error(404, f"Unknown path {self.path}")
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with lock:
+                stats["requests"] += 1
+                fail = rng.random() < failure_rate
+                stats["failures"] += fail
+            time.sleep(latency)
+            if fail:
+                self._error(503, "Request queue is full, try again later")
+                return
+
+            unknown = [v for v in request.get("variable", []) if v not in PARAMETERS]
+            if unknown:
+                self._error(400, f"Unknown variables {unknown}")
+                return
+            parts = []
+            for variable in request["variable"]:
+                for date in request["date"]:
+                    fixture = Path(fixture_dir) / f"{variable}_{date}.grib" if fixture_dir else None
+                    if fixture is not None and fixture.exists():
+                        parts.append(fixture.read_bytes())
+                    else:
+                        parts.append(synthetic_grib(variable, date, request["time"], request["area"],
+                                                    request.get("grid", (0.25, 0.25))))
+            body = b"".join(parts)
+            with lock:
+                stats["bytes"] += len(body)
+            self._send(200, body, "application/x-grib")
+
+    return CDSStubHandler
+
+
+def start_stub_server(port=0, host="127.0.0.1", **handler_kwargs):
+    """Start the stub in a daemon thread and return (server, base_url); ``server.stats`` counts requests"""
+    stats = {}
+    server = ThreadingHTTPServer((host, port), make_handler(stats=stats, **handler_kwargs))
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the CDS retrieve API serving GRIB fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--fixture-dir", type=Path, help="directory of <variable>_<date>.grib fixtures")
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        make_handler(fixture_dir=args.fixture_dir, latency=args.latency, failure_rate=args.failure_rate,
+                     seed=args.seed),
+    )
+    print(f"CDS stub serving on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
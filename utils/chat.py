@@ -0,0 +1,160 @@
+"""Chat completion helpers for the Anticipatory Action chatbot.
+
+- one pooled OpenAI client per API key (and base URL), reused across reruns
+- a token budget that compacts old turns once the history grows too long
+- streaming completions that record time-to-first-token and tokens/s
+
+Set ``OPENAI_BASE_URL`` (e.g. to ``python -m utils.openai_stub``) to run against
+a local OpenAI-compatible server.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.lazy import lazy_import
+
+openai = lazy_import("openai")
+
+# Rough English average when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+MAX_CLIENTS = 16
+
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=None):
+    """Return the shared OpenAI client for this key, creating it on first use"""
+    base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url)
+            _clients[key] = client
+            # Drop the least recently used client beyond the pool size
+            while len(_clients) > MAX_CLIENTS:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(key)
+        return client
+
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The cl100k_base encoding, loaded on first use; None if it is unavailable"""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            # tiktoken downloads the encoding on a cold cache, so this stays off the page's first render
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # Not installed, or the encoding file could not be fetched (e.g. offline)
+                _encoding = None
+            _encoding_loaded = True
+        return _encoding
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text or ""))
+
+
+def _truncate(text, max_tokens):
+    """The start of ``text`` that fits in ``max_tokens``"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (text or "")[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text or "")[:max_tokens])
+
+
+def _summary_line(msg, max_chars=160):
+    text = " ".join((msg["content"] or "").split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return f"- {msg['role']}: {text}"
+
+
+def budget_history(messages, max_tokens=3000, keep_recent=6):
+    """Fit chat history into a token budget
+
+    Below the budget the history is returned unchanged. Above it, everything
+    except the ``keep_recent`` latest messages is compacted into one short
+    summary message (a trimmed line per turn, oldest dropped first if needed).
+    If the latest messages alone are over the budget, the oldest of them join
+    the summary, and a latest message still too long is cut to fit.
+    """
+    history = [{"role": m["role"], "content": m["content"]} for m in messages]
+    if sum(count_tokens(m["content"]) for m in history) <= max_tokens:
+        return history
+
+    recent = history[-keep_recent:] if keep_recent else []
+    while len(recent) > 1 and sum(count_tokens(m["content"]) for m in recent) > max_tokens:
+        recent = recent[1:]
+    if recent and count_tokens(recent[0]["content"]) > max_tokens:
+        recent = [{**recent[0], "content": _truncate(recent[0]["content"], max_tokens)}]
+    older = history[:len(history) - len(recent)]
+    remaining = max_tokens - sum(count_tokens(m["content"]) for m in recent)
+
+    lines = []
+    for msg in reversed(older):
+        line = _summary_line(msg)
+        cost = count_tokens(line)
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    if not lines:
+        return recent
+
+    summary = "Summary of earlier conversation:\n" + "\n".join(reversed(lines))
+    return [{"role": "assistant", "content": summary}] + recent
+
+
+def stream_chat(client, messages, metrics, model="gpt-4", max_tokens=1000):
+    """Yield response text as it streams, filling ``metrics`` with timings
+
+    ``metrics`` gets ``ttft_s`` (time to first token), ``tokens``,
+    ``total_s`` and ``tokens_per_s`` once the stream ends.
+    """
+    start = time.perf_counter()
+    metrics.update({"model": model, "prompt_tokens": sum(count_tokens(m["content"]) for m in messages)})
+    first = None
+    chunks = []
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    for event in stream:
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content
+        if not delta:
+            continue
+        if first is None:
+            first = time.perf_counter()
+            metrics["ttft_s"] = first - start
+        chunks.append(delta)
+        yield delta
+
+    end = time.perf_counter()
+    tokens = count_tokens("".join(chunks))
+    generation = end - (first or end)
+    metrics.update({
+        "tokens": tokens,
+        "total_s": end - start,
+        "tokens_per_s": tokens / generation if generation > 0 else 0.0,
+    })
+    metrics.setdefault("ttft_s", end - start)
@@ -0,0 +1,185 @@
+"""Track x admin-unit crossings and landfall timing.
+
+The track is cut into straight segments between consecutive fixes. All
+segment/polygon pairs are found with one STRtree query and intersected in a
+single vectorized shapely call; the pieces of track inside each unit are then
+located along their segments to interpolate entry and exit times (and the
+storm's wind at entry) linearly between the two fixes.
+
+Landfall is the first crossing onto land: the Natural Earth land polygons in
+``data/boundaries/land.geojson`` (``LAND_FILE`` overrides) together with the
+detailed admin-0 outline. The admin-0 outline alone would report where a
+storm crosses the land border into the country, not where it reaches the coast.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from utils.boundaries import get_boundary_store
+from utils.exposure import unit_names
+from utils.tracks import load_index, load_track
+
+LAND_FILE = Path(os.environ.get(
+    "LAND_FILE", Path(__file__).resolve().parent.parent / "data" / "boundaries" / "land.geojson"
+))
+
+
+class Landfall(NamedTuple):
+    time: pd.Timestamp
+    lon: float
+    lat: float
+    wind_kn: float
+
+
+def track_segments(track):
+    """Line segments between consecutive fixes, with their start/end times (ns) and winds"""
+    coords = track[["lon", "lat"]].to_numpy(dtype=np.float64)
+    times = track["time"].to_numpy("datetime64[ns]").view(np.int64)
+    wind = track["max_sustained_wind"].to_numpy(dtype=np.float64)
+    segments = shapely.linestrings(np.stack([coords[:-1], coords[1:]], axis=1))
+    return segments, times[:-1], times[1:], wind[:-1], wind[1:]
+
+
+def _intervals(segments, geoms):
+    """(unit, segment, start fraction, end fraction) for every piece of track inside a unit"""
+    tree = shapely.STRtree(segments)
+    shapely.prepare(geoms)
+    unit_idx, seg_idx = tree.query(geoms, predicate="intersects")
+    if unit_idx.size == 0:
+        empty = np.empty(0)
+        return empty.astype(np.intp), empty.astype(np.intp), empty, empty
+
+    pieces = shapely.intersection(segments[seg_idx], geoms[unit_idx])
+    # A segment can leave and re-enter a unit, so split multi-part pieces
+    parts, owner = shapely.get_parts(pieces, return_index=True)
+    first = shapely.get_point(parts, 0)
+    last = shapely.get_point(parts, -1)
+    # Points (tangent touches) have no vertices to index; they start and end at themselves
+    is_point = shapely.get_type_id(parts) == 0
+    first = np.where(is_point, parts, first)
+    last = np.where(is_point, parts, last)
+
+    segment = segments[seg_idx[owner]]
+    f0 = shapely.line_locate_point(segment, first, normalized=True)
+    f1 = shapely.line_locate_point(segment, last, normalized=True)
+    return unit_idx[owner], seg_idx[owner], np.minimum(f0, f1), np.maximum(f0, f1)
+
+
+def unit_crossings(geoms, properties, track):
+    """Per-unit first entry and last exit of the storm centre, earliest entry first
+
+    Columns: unit, name, entry_time, exit_time, hours_inside, entry_lon,
+    entry_lat, entry_wind_kn. Units the centre never passes through are left out.
+    """
+    columns = ["unit", "name", "entry_time", "exit_time", "hours_inside", "entry_lon", "entry_lat", "entry_wind_kn"]
+    geoms = np.asarray(geoms)
+    if len(track) < 2 or len(geoms) == 0:
+        return pd.DataFrame(columns=columns)
+
+    segments, t0, t1, w0, w1 = track_segments(track)
+    unit, seg, f_in, f_out = _intervals(segments, geoms)
+    if unit.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    entry = t0[seg] + (f_in * (t1[seg] - t0[seg])).astype(np.int64)
+    exit_ = t0[seg] + (f_out * (t1[seg] - t0[seg])).astype(np.int64)
+    hours = (exit_ - entry) / 3.6e12
+
+    # First entry per unit: sort by (unit, entry) and keep each unit's first row
+    order = np.lexsort((entry, unit))
+    units, first_rows = np.unique(unit[order], return_index=True)
+    firsts = order[first_rows]
+    last_exit = np.full(len(geoms), np.iinfo(np.int64).min)
+    np.maximum.at(last_exit, unit, exit_)
+    inside = np.bincount(unit, weights=hours, minlength=len(geoms))
+
+    entry_points = shapely.line_interpolate_point(segments[seg[firsts]], f_in[firsts], normalized=True)
+    names = unit_names(properties)
+    table = pd.DataFrame({
+        "unit": units,
+        "name": [names[u] for u in units],
+        "entry_time": pd.to_datetime(entry[firsts]).round("min"),
+        "exit_time": pd.to_datetime(last_exit[units]).round("min"),
+        "hours_inside": inside[units].round(1),
+        "entry_lon": shapely.get_x(entry_points).round(3),
+        "entry_lat": shapely.get_y(entry_points).round(3),
+        "entry_wind_kn": (w0[seg[firsts]] + f_in[firsts] * (w1[seg[firsts]] - w0[seg[firsts]])).round(1),
+    })
+    return table.sort_values("entry_time", kind="stable").reset_index(drop=True)
+
+
+def landfall(track, land):
+    """First time the storm centre moves from outside ``land`` onto it, or None
+
+    ``land`` is a (multi)polygon, normally ``get_land()``. A
+    track that starts over land has no landfall unless it leaves and comes back.
+    """
+    if len(track) < 2:
+        return None
+    segments, t0, t1, w0, w1 = track_segments(track)
+    _, seg, f_in, _ = _intervals(segments, np.array([land]))
+    # An interval that begins at the very first fix started on land rather than crossing onto it
+    crossing = ~((seg == 0) & (f_in == 0.0))
+    if not crossing.any():
+        return None
+    seg, f_in = seg[crossing], f_in[crossing]
+    i = np.lexsort((f_in, seg))[0]
+    point = shapely.line_interpolate_point(segments[seg[i]], f_in[i], normalized=True)
+    return Landfall(
+        time=pd.Timestamp(t0[seg[i]] + int(f_in[i] * (t1[seg[i]] - t0[seg[i]]))).round("min"),
+        lon=float(shapely.get_x(point)),
+        lat=float(shapely.get_y(point)),
+        wind_kn=float(w0[seg[i]] + f_in[i] * (w1[seg[i]] - w0[seg[i]])),
+    )
+
+
+def admin_outline(admin_level="Admin Level 0"):
+    """Union of an admin level's units"""
+    return shapely.union_all(get_boundary_store().geometries(admin_level))
+
+
+_land = None
+_land_lock = threading.Lock()
+
+
+def get_land(path=LAND_FILE):
+    """Process-wide land geometry for landfall: the land file plus the admin-0 outline where available"""
+    global _land
+    with _land_lock:
+        if _land is None:
+            with open(path, 'r') as f:
+                features = json.load(f)["features"]
+            parts = [shapely.from_geojson(json.dumps(feat["geometry"])) for feat in features]
+            try:
+                parts.append(admin_outline())
+            except (ValueError, FileNotFoundError):
+                pass
+            _land = shapely.union_all(parts)
+            shapely.prepare(_land)
+        return _land
+
+
+def storm_landfall(storm_id, land=None, index=None):
+    """Landfall of a catalogued storm onto ``land`` (default: ``get_land()``), or None"""
+    try:
+        land = get_land() if land is None else land
+        track = load_track(storm_id, index=index)
+    except (KeyError, ValueError, FileNotFoundError):
+        return None
+    return landfall(track, land)
+
+
+def storm_landfalls(storm_ids, land=None):
+    """Landfall (or None) per storm id, loading the land geometry and the catalog index once"""
+    try:
+        land = get_land() if land is None else land
+        index = load_index()
+    except (ValueError, FileNotFoundError):
+        return dict.fromkeys(storm_ids)
+    return {storm_id: storm_landfall(storm_id, land=land, index=index) for storm_id in storm_ids}
@@ -0,0 +1,132 @@
+"""Synthetic ensembles of perturbed cyclone tracks.
+
+In the spirit of CLIMADA's perturbed trajectories: each member starts from a
+displaced position and follows the base track's step-by-step motion with a
+random-walk drift in heading, a per-member speed factor and a per-member
+intensity factor with slowly varying noise. Every member is generated at once
+as ``(members, steps)`` arrays, so a few thousand members take milliseconds.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from utils.windfield import KM_PER_DEG
+
+# Floor on member central pressure, near the lowest ever observed
+MIN_PRESSURE = 870.0
+
+
+class EnsembleSettings(NamedTuple):
+    n_members: int = 1000
+    seed: int = 0
+    start_km: float = 30.0  # sd of the initial position offset
+    heading_deg: float = 3.0  # sd of the heading change per step (random walk)
+    speed_frac: float = 0.15  # sd of the per-member speed factor
+    intensity_frac: float = 0.15  # sd of the per-member intensity factor
+    noise_frac: float = 0.05  # sd of step-to-step intensity noise
+    persistence: float = 0.8  # AR(1) coefficient of the intensity noise
+
+
+class Ensemble(NamedTuple):
+    times: np.ndarray  # (steps,) datetime64
+    lon: np.ndarray  # (members, steps)
+    lat: np.ndarray
+    max_sustained_wind: np.ndarray  # knots
+    central_pressure: np.ndarray  # hPa
+    radius_max_wind: np.ndarray  # nautical miles
+    environmental_pressure: np.ndarray  # (steps,)
+
+
+def _ar1(noise, persistence):
+    """AR(1) filter along the step axis, scaled to keep the input's variance; loops over steps, not members"""
+    filtered = np.empty_like(noise)
+    filtered[:, 0] = noise[:, 0]
+    scale = np.sqrt(1 - persistence ** 2)
+    for t in range(1, noise.shape[1]):
+        filtered[:, t] = persistence * filtered[:, t - 1] + scale * noise[:, t]
+    return filtered
+
+
+def perturbed_tracks(track, settings=EnsembleSettings()):
+    """Ensemble of ``settings.n_members`` tracks perturbed from ``track`` (a catalog track frame)"""
+    rng = np.random.default_rng(settings.seed)
+    m, n_steps = settings.n_members, len(track)
+    lon = track["lon"].to_numpy(dtype=np.float64)
+    lat = track["lat"].to_numpy(dtype=np.float64)
+    cos_lat = np.cos(np.radians(lat))
+
+    # Base motion per step in km, as speed and heading
+    dx = np.diff(lon) * KM_PER_DEG * cos_lat[:-1]
+    dy = np.diff(lat) * KM_PER_DEG
+    step_km = np.hypot(dx, dy)
+    heading = np.arctan2(dx, dy)
+
+    # Heading drifts as a random walk; speed scales by a per-member factor
+    drift = np.cumsum(rng.normal(0.0, np.radians(settings.heading_deg), size=(m, n_steps - 1)), axis=1)
+    speed = np.clip(rng.normal(1.0, settings.speed_frac, size=(m, 1)), 0.2, None)
+    step = step_km * speed
+    east = np.sin(heading + drift) * step
+    north = np.cos(heading + drift) * step
+
+    start_east, start_north = rng.normal(0.0, settings.start_km, size=(2, m, 1))
+    y_km = np.concatenate([start_north, start_north + np.cumsum(north, axis=1)], axis=1)
+    member_lat = lat[0] + y_km / KM_PER_DEG
+    x_steps = np.concatenate([start_east, east], axis=1) / (KM_PER_DEG * np.cos(np.radians(member_lat)))
+    member_lon = lon[0] + np.cumsum(x_steps, axis=1)
+
+    # Intensity: per-member factor times slowly varying noise; pressure deficit scales with wind squared
+    wind = track["max_sustained_wind"].to_numpy(dtype=np.float64)
+    factor = np.clip(rng.normal(1.0, settings.intensity_frac, size=(m, 1)), 0.3, None)
+    noise = _ar1(rng.normal(0.0, settings.noise_frac, size=(m, n_steps)), settings.persistence)
+    member_wind = np.clip(wind * factor * (1.0 + noise), 10.0, None)
+    env = track["environmental_pressure"].to_numpy(dtype=np.float64)
+    deficit = env - track["central_pressure"].to_numpy(dtype=np.float64)
+    ratio = np.divide(member_wind, wind, out=np.ones_like(member_wind), where=wind > 0)
+    member_pressure = np.maximum(env - np.clip(deficit, 0.0, None) * ratio ** 2, MIN_PRESSURE)
+    rmw = np.broadcast_to(track["radius_max_wind"].to_numpy(dtype=np.float64), (m, n_steps))
+
+    return Ensemble(
+        times=track["time"].to_numpy("datetime64[ns]"),
+        lon=member_lon,
+        lat=member_lat,
+        max_sustained_wind=member_wind,
+        central_pressure=member_pressure,
+        radius_max_wind=rmw,
+        environmental_pressure=env,
+    )
+
+
+def member_track(ensemble, member, like=None):
+    """One member as a track frame (columns of ``like``, e.g. the base track, when given)"""
+    frame = pd.DataFrame({
+        "time": ensemble.times,
+        "lat": ensemble.lat[member],
+        "lon": ensemble.lon[member],
+        "radius_max_wind": ensemble.radius_max_wind[member],
+        "max_sustained_wind": ensemble.max_sustained_wind[member],
+        "central_pressure": ensemble.central_pressure[member],
+        "environmental_pressure": ensemble.environmental_pressure,
+    })
+    if like is not None:
+        for column in like.columns.difference(frame.columns):
+            frame[column] = like[column].to_numpy()
+        frame = frame[list(like.columns)]
+    return frame
+
+
+def ensemble_summary(ensemble):
+    """Per-step spread of the members: mean position, position spread (km) and wind percentiles"""
+    mean_lat = ensemble.lat.mean(axis=0)
+    dx = (ensemble.lon - ensemble.lon.mean(axis=0)) * KM_PER_DEG * np.cos(np.radians(mean_lat))
+    dy = (ensemble.lat - mean_lat) * KM_PER_DEG
+    p10, p50, p90 = np.percentile(ensemble.max_sustained_wind, [10, 50, 90], axis=0)
+    return pd.DataFrame({
+        "time": ensemble.times,
+        "mean_lat": mean_lat,
+        "mean_lon": ensemble.lon.mean(axis=0),
+        "spread_km": np.sqrt(np.mean(dx ** 2 + dy ** 2, axis=0)),
+        "wind_p10": p10,
+        "wind_p50": p50,
+        "wind_p90": p90,
+    })
@@ -0,0 +1,412 @@
+"""ERA5 hourly single-level extraction pipeline.
+
+Used by ``era5_extract_hourly_weather_data.ipynb``. Two output modes:
+
+- cube (default): one chunked, compressed Zarr (``.zarr``) or NetCDF (``.nc``)
+  store holding a ``(variable, time, latitude, longitude)`` array, opened
+  lazily with dask. GeoTIFFs can be exported from it as a derived product.
+- geotiff: the original one-LZW-GeoTIFF-per-variable-and-hour layout.
+
+Requires xarray, dask, cfgrib and zarr/netCDF4; rioxarray for GeoTIFF export.
+"""
+import glob
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from utils.era5_download import (  # noqa: F401  (DATASET re-exported for notebook users)
+    DATASET, MAX_WORKERS, RETRIES, download_chunks, merge_chunks, split_request,
+)
+from utils.parallel import MANIFEST_NAME, atomic_output, file_signature, run_tasks
+
+CUBE_NAME = "era5"
+# Time steps one GeoTIFF-mode worker writes from a single open of the GRIB file
+GRIB_BLOCK_STEPS = 24
+# Scalar GRIB coordinates that carry no information once times are normalised
+_GRIB_SCALARS = ["number", "surface", "heightAboveGround", "step", "valid_time"]
+
+
+def convert_extent_to_latlon(web_mercator_extent):
+    """Convert Web Mercator extent to WGS84 lat/lon for ERA5 API"""
+    from pyproj import Transformer
+
+    x_min, y_min, x_max, y_max = web_mercator_extent
+
+    # Create transformer from Web Mercator to WGS84
+    transformer = Transformer.from_crs("EPSG:3857", "EPSG:4326", always_xy=True)
+
+    # Transform corners
+    lon_min, lat_min = transformer.transform(x_min, y_min)
+    lon_max, lat_max = transformer.transform(x_max, y_max)
+
+    # ERA5 API expects [north, west, south, east]
+    return [lat_max, lon_min, lat_min, lon_max]
+
+
+def download_variable_set(client, var_set_name, variables, area, dates, times, output_dir,
+                          max_workers=MAX_WORKERS, retries=RETRIES):
+    """Download a set of variables from ERA5
+
+    The request is fetched as one chunk per variable and date (see
+    ``utils.era5_download``) into ``{output_dir}/chunks_{var_set_name}/`` and
+    merged into one GRIB file. Chunks downloaded by an earlier run are reused;
+    if any chunk still fails after its retries, returns None and keeps the
+    finished chunks for the next run.
+    """
+    filename = f"{output_dir}/era5_{var_set_name}.grib"
+
+    print(f"Downloading {var_set_name}...")
+    print(f"   Variables: {variables}")
+    print(f"   Output: {filename}")
+
+    chunks = split_request(variables, dates, times, area)
+    paths, stats = download_chunks(client, chunks, f"{output_dir}/chunks_{var_set_name}",
+                                   max_workers=max_workers, retries=retries)
+    if stats["failed"]:
+        print(f"Error downloading {var_set_name}: {stats['failed']} of {len(chunks)} chunks failed; "
+              f"rerun to fetch only those")
+        return None
+
+    merge_chunks(paths, filename)
+    print(f"Downloaded {var_set_name} to {filename}")
+    return filename
+
+
+# — Cube output mode —
+
+def _on_valid_time(ds):
+    """Put a GRIB hypercube on a single 'time' axis of valid times
+
+    Instantaneous fields come as (time, lat, lon); accumulated fields such as
+    total precipitation come as (time, step, lat, lon) and are flattened to
+    time + step.
+    """
+    if "step" in ds.dims:
+        valid = ds["valid_time"].values.ravel()
+        ds = ds.stack(sample=("time", "step"))
+        ds = ds.drop_vars(["sample", "time", "step", "valid_time"], errors="ignore")
+        ds = ds.assign_coords(sample=valid).rename(sample="time")
+    elif "valid_time" in ds.coords and "time" in ds.dims:
+        ds = ds.assign_coords(time=ds["valid_time"].values)
+
+    ds = ds.drop_vars([c for c in _GRIB_SCALARS if c in ds.coords])
+    ds = ds.sel(time=~pd.isnull(ds["time"].values))
+    _, keep = np.unique(ds["time"].values, return_index=True)
+    return ds.isel(time=np.sort(keep)).sortby("time").transpose("time", ...)
+
+
+def open_grib(grib_file):
+    """Open every hypercube of an ERA5 GRIB file as one Dataset on valid time"""
+    import cfgrib
+
+    parts = cfgrib.open_datasets(grib_file, backend_kwargs={'indexpath': ''})
+    return xr.merge([_on_valid_time(ds) for ds in parts], join="outer", compat="override")
+
+
+def build_cube(ds, derive_wind_speed=True):
+    """Stack a Dataset's variables into a (variable, time, latitude, longitude) array"""
+    if derive_wind_speed and {"u10", "v10"} <= set(ds.data_vars):
+        ds = ds.assign(wind_speed=np.hypot(ds["u10"], ds["v10"]))
+        ds["wind_speed"].attrs = {"units": "m s**-1", "long_name": "10 metre wind speed"}
+
+    variables = list(ds.data_vars)
+    cube = ds.to_array("variable").transpose("variable", "time", "latitude", "longitude")
+    cube = cube.assign_coords(units=("variable", [ds[v].attrs.get("units", "") for v in variables]))
+    cube.name = CUBE_NAME
+    return cube
+
+
+def write_cube(cube, path, time_chunk=24):
+    """Write a cube to Zarr (``.zarr``) or NetCDF (``.nc``), chunked per variable and time block"""
+    path = Path(path)
+    time_chunk = min(time_chunk, cube.sizes["time"])
+    cube = cube.chunk({"variable": 1, "time": time_chunk, "latitude": -1, "longitude": -1})
+    ds = cube.to_dataset()
+
+    if path.suffix == ".zarr":
+        from numcodecs import Blosc
+
+        encoding = {CUBE_NAME: {"compressor": Blosc(cname="zstd", clevel=5, shuffle=Blosc.BITSHUFFLE)}}
+        ds.to_zarr(path, mode="w", encoding=encoding, consolidated=True)
+    elif path.suffix == ".nc":
+        chunksizes = (1, time_chunk, cube.sizes["latitude"], cube.sizes["longitude"])
+        encoding = {CUBE_NAME: {"zlib": True, "complevel": 4, "chunksizes": chunksizes}}
+        ds.to_netcdf(path, encoding=encoding)
+    else:
+        raise ValueError(f"Cube path must end in .zarr or .nc: {path}")
+    return path
+
+
+def open_cube(path):
+    """Open a cube lazily; data is only read when a slice is computed"""
+    path = Path(path)
+    if path.suffix == ".zarr":
+        ds = xr.open_zarr(path, consolidated=True)
+    else:
+        ds = xr.open_dataset(path, chunks={})
+    return ds[CUBE_NAME]
+
+
+def grib_to_cube(grib_file, path, time_chunk=24, derive_wind_speed=True):
+    """Convert an ERA5 GRIB download into a single cube store"""
+    print(f"Building cube from {grib_file}...")
+    cube = build_cube(open_grib(grib_file), derive_wind_speed=derive_wind_speed)
+    write_cube(cube, path, time_chunk=time_chunk)
+    print(f"Wrote {dict(cube.sizes)} cube to {path}")
+    return open_cube(path)
+
+
+def time_label(time_val):
+    """Timestamp used in GeoTIFF file names, e.g. 20201031T06"""
+    return pd.Timestamp(time_val).strftime('%Y%m%dT%H')
+
+
+def _export_slice(cube_path, var_name, time_val, output_file):
+    import rioxarray  # noqa: F401  (registers the .rio accessor)
+
+    time_slice = open_cube(cube_path).sel(variable=var_name, time=time_val)
+    time_slice = time_slice.drop_vars(["variable", "units"], errors="ignore")
+    time_slice = time_slice.rename({'longitude': 'x', 'latitude': 'y'})
+    time_slice = time_slice.rio.set_spatial_dims(x_dim='x', y_dim='y').rio.write_crs("EPSG:4326")
+    partial = atomic_output(output_file)
+    time_slice.rio.to_raster(partial, driver="GTiff", compress='lzw')
+    os.replace(partial, output_file)
+
+
+def export_geotiffs(cube_path, output_dir, variables=None, max_workers=None):
+    """Write one LZW GeoTIFF per variable and time step from a cube (derived product)
+
+    Time slices are exported in parallel; slices already exported from the
+    same cube are skipped using the manifest in ``output_dir``.
+    """
+    cube = open_cube(cube_path)
+    variables = list(cube["variable"].values) if variables is None else variables
+    # The consolidated metadata (Zarr) or the file itself (NetCDF) changes on every rewrite
+    meta_path = Path(cube_path) / ".zmetadata" if Path(cube_path).suffix == ".zarr" else cube_path
+    cube_signature = file_signature(meta_path)
+
+    tasks = []
+    for var_name in variables:
+        for time_val in cube.time.values:
+            output_file = f"{output_dir}/{var_name}_{time_label(time_val)}.tif"
+            tasks.append({
+                "output": output_file,
+                "signature": cube_signature + [[str(var_name), str(time_val)]],
+                "args": (str(cube_path), var_name, time_val, output_file),
+            })
+
+    print(f"Exporting {len(tasks)} GeoTIFF slices from {cube_path}...")
+    run_tasks(tasks, _export_slice, Path(output_dir) / MANIFEST_NAME, max_workers=max_workers, label="GeoTIFF files")
+    return [t["output"] for t in tasks if os.path.exists(t["output"])]
+
+
+# — GeoTIFF output mode —
+
+def grib_index(grib_file, output_dir):
+    """cfgrib index path for ``grib_file``, kept in ``output_dir``
+
+    Built by the first open and then read by every worker, so no worker
+    rescans the GRIB file. cfgrib never rewrites an existing index, so the
+    name carries the file's size and mtime and a changed file gets a new one.
+    """
+    stat = os.stat(grib_file)
+    prefix = f"{output_dir}/.{Path(grib_file).name}"
+    current = f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}"
+    for old in glob.glob(f"{glob.escape(prefix)}-*.idx"):
+        if not old.startswith(current + "."):
+            os.remove(old)
+    return current + ".{short_hash}.idx"
+
+
+def _grib_slices(grib_file, indexpath, filter_by_keys, var_name, selections, output_files):
+    import rioxarray  # noqa: F401
+
+    backend_kwargs = {'indexpath': indexpath}
+    if filter_by_keys:
+        backend_kwargs['filter_by_keys'] = filter_by_keys
+    with xr.open_dataset(grib_file, engine='cfgrib', backend_kwargs=backend_kwargs) as ds:
+        var_data = ds[var_name].rename({'longitude': 'x', 'latitude': 'y'})
+        var_data = var_data.rio.set_spatial_dims(x_dim='x', y_dim='y').rio.write_crs("EPSG:4326")
+        for selection, output_file in zip(selections, output_files):
+            partial = atomic_output(output_file)
+            var_data.isel(selection).rio.to_raster(partial, driver="GTiff", compress='lzw')
+            os.replace(partial, output_file)
+
+
+def _grib_tasks(grib_file, indexpath, filter_by_keys, var_name, slices):
+    """Tasks writing ``(selection, output_file)`` slices of one variable, GRIB_BLOCK_STEPS per task"""
+    signature = file_signature(grib_file)
+    tasks = []
+    for start in range(0, len(slices), GRIB_BLOCK_STEPS):
+        selections, outputs = zip(*slices[start:start + GRIB_BLOCK_STEPS])
+        tasks.append({
+            "outputs": list(outputs),
+            "signature": signature + [[var_name, selections[0], len(selections)]],
+            "args": (grib_file, indexpath, filter_by_keys, var_name, list(selections), list(outputs)),
+        })
+    return tasks
+
+
+def convert_grib_to_geotiff(grib_file, output_dir, max_workers=None):
+    """Convert GRIB2 files to individual GeoTIFF files
+
+    Each worker in a process pool writes a block of time steps of one
+    variable from a single open of the GRIB file, reading it through a shared
+    cfgrib index. Blocks already converted from the same GRIB file are skipped
+    using the manifest in ``output_dir``; failed blocks are reported and
+    retried on the next run.
+    """
+    if not os.path.exists(grib_file):
+        print(f"File not found: {grib_file}")
+        return
+
+    print(f"Converting {grib_file} to GeoTIFF format...")
+
+    # cfgrib ties its index to the path string, so every open uses the same one
+    grib_file = os.path.abspath(grib_file)
+    # Only the coordinates are read here; each worker reads its own slice through the shared index
+    indexpath = grib_index(grib_file, output_dir)
+    with xr.open_dataset(grib_file, engine='cfgrib', backend_kwargs={'indexpath': indexpath}) as ds:
+        tasks = []
+        for var_name in ds.data_vars:
+            print(f"   Converting variable: {var_name}")
+            var_data = ds[var_name]
+
+            # Handle different time dimensions
+            if 'time' in var_data.dims:
+                # Save each time step separately
+                slices = []
+                for i, time_val in enumerate(var_data.time.values):
+                    time_str = str(time_val)[:13].replace(':', '').replace('-', '').replace(' ', '_')
+                    slices.append(({'time': i}, f"{output_dir}/{var_name}_{time_str}.tif"))
+            else:
+                # Single time step
+                slices = [({}, f"{output_dir}/{var_name}.tif")]
+            tasks += _grib_tasks(grib_file, indexpath, None, var_name, slices)
+
+    run_tasks(tasks, _grib_slices, Path(output_dir) / MANIFEST_NAME, max_workers=max_workers, label="GeoTIFF files")
+    converted_files = [f for t in tasks for f in t["outputs"] if os.path.exists(f)]
+    print(f"Converted {len(converted_files)} files from {grib_file}")
+    return converted_files
+
+
+def _files_by_timestamp(output_dir, prefix):
+    """Map the timestamp in '{prefix}_{timestamp}.tif' names to their paths"""
+    return {
+        Path(f).stem[len(prefix) + 1:]: f
+        for f in glob.glob(f"{output_dir}/{prefix}_*.tif")
+    }
+
+
+def _wind_speed_slice(u_file, v_file, output_file):
+    import rioxarray
+
+    # Open u and v components
+    u_data = rioxarray.open_rasterio(u_file)
+    v_data = rioxarray.open_rasterio(v_file)
+
+    # Calculate wind speed magnitude
+    wind_speed = (u_data**2 + v_data**2)**0.5
+
+    partial = atomic_output(output_file)
+    wind_speed.rio.to_raster(partial, driver="GTiff", compress='lzw')
+    os.replace(partial, output_file)
+
+
+def create_wind_speed_magnitude(output_dir, max_workers=None):
+    """Calculate wind speed magnitude from u and v components
+
+    u/v files are paired by the timestamp in their names, slices are computed
+    in a process pool, and outputs whose inputs are unchanged since the last
+    run are skipped.
+    """
+    print("Calculating wind speed magnitude...")
+
+    u_files = _files_by_timestamp(output_dir, "u10")
+    v_files = _files_by_timestamp(output_dir, "v10")
+
+    print(f"   Found {len(u_files)} u-component files")
+    print(f"   Found {len(v_files)} v-component files")
+
+    if len(u_files) == 0:
+        print("No u-component files found. Checking available files...")
+        all_files = glob.glob(f"{output_dir}/*.tif")
+        wind_files = [f for f in all_files if 'u10' in f or 'v10' in f]
+        print(f"   Available wind files sample: {wind_files[:3]}")
+        return []
+
+    unpaired = sorted(set(u_files) ^ set(v_files))
+    if unpaired:
+        print(f"   Skipping {len(unpaired)} timestamps without both components, e.g. {unpaired[:3]}")
+
+    tasks = []
+    for timestamp in sorted(set(u_files) & set(v_files)):
+        output_file = f"{output_dir}/wind_speed_{timestamp}.tif"
+        tasks.append({
+            "output": output_file,
+            "signature": file_signature(u_files[timestamp], v_files[timestamp]),
+            "args": (u_files[timestamp], v_files[timestamp], output_file),
+        })
+
+    written, stats = run_tasks(tasks, _wind_speed_slice, Path(output_dir) / MANIFEST_NAME,
+                               max_workers=max_workers, label="wind speed files")
+    print(f"Created {stats['written']} wind speed magnitude files")
+    return [t["output"] for t in tasks if os.path.exists(t["output"])]
+
+
+def extract_all_precipitation_hours(grib_file, output_dir, max_workers=None):
+    """Extract ALL precipitation time steps (every hour)
+
+    Blocks of hours are written in a process pool, as in
+    ``convert_grib_to_geotiff``, and skipped on a rerun once extracted from
+    the same GRIB file.
+    """
+    filter_by_keys = {'shortName': 'tp'}
+    grib_file = os.path.abspath(grib_file)
+    indexpath = grib_index(grib_file, output_dir)
+    with xr.open_dataset(
+        grib_file,
+        engine='cfgrib',
+        backend_kwargs={
+            'filter_by_keys': filter_by_keys,
+            'indexpath': indexpath
+        }
+    ) as ds_precip:
+        var_data = ds_precip['tp']
+        print(f"   Full shape: {var_data.shape}")
+        print(f"   Dimensions: {var_data.dims}")
+        print(f"   Time points: {len(var_data.time)}")
+        print(f"   Step points: {len(var_data.step)}")
+
+        # Keyed by output so a valid time reached from two (time, step) pairs is written once, from the later one
+        slices = {}
+        for i, time_val in enumerate(var_data.time.values):
+            for j, step_val in enumerate(var_data.step.values):
+                # Actual time is base time + step
+                step_hours = int(step_val.astype('timedelta64[h]') / pd.Timedelta('1 hour'))
+                actual_time = pd.to_datetime(time_val) + pd.Timedelta(hours=step_hours)
+
+                output_file = f"{output_dir}/total_precipitation_{actual_time.strftime('%Y%m%dT%H')}.tif"
+                slices.pop(output_file, None)
+                slices[output_file] = {'time': i, 'step': j}
+
+    print(f"   Processing {len(slices)} time-step combinations...")
+    tasks = _grib_tasks(grib_file, indexpath, filter_by_keys, 'tp', [(sel, f) for f, sel in slices.items()])
+    run_tasks(tasks, _grib_slices, Path(output_dir) / MANIFEST_NAME, max_workers=max_workers,
+              label="precipitation files")
+    precip_files = [f for f in slices if os.path.exists(f)]
+    print(f"Extracted {len(precip_files)} hourly precipitation files")
+
+    # Remove old files (the 23 incomplete ones)
+    old_files = glob.glob(f"{output_dir}/total_precipitation_*T*.tif")
+    old_files = [f for f in old_files if f not in slices]
+    for old_file in old_files:
+        try:
+            os.remove(old_file)
+        except OSError:
+            pass
+
+    return sorted(precip_files)
@@ -0,0 +1,204 @@
+"""Concurrent, resumable ERA5 retrieval in per-variable, per-date chunks.
+
+A single CDS request covering every date and variable queues for a long time,
+and one failure loses all of it. Here the request is split into one chunk per
+variable and date. Chunks are fetched by a bounded thread pool (the CDS
+queues requests server-side, so a few in flight is enough), server errors,
+rate limiting and dropped connections are retried with exponential backoff
+and jitter (other client errors fail at once), and every finished chunk is
+recorded in a content manifest (its request, size and sha256), so a rerun
+only fetches what is missing. Finished chunks are concatenated into one GRIB
+file; GRIB is a stream of self-contained messages, so that is a valid file.
+
+The backend is anything with ``retrieve(dataset, request, target)``:
+``cdsapi.Client()`` for the CDS itself, or ``HTTPBackend`` pointed at the
+local stub (``python -m utils.cds_stub``).
+"""
+import hashlib
+import http.client
+import json
+import os
+import random
+import shutil
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from utils.parallel import MANIFEST_NAME, Manifest, atomic_output
+
+DATASET = 'reanalysis-era5-single-levels'
+# Requests in flight at once; the CDS caps active requests per user
+MAX_WORKERS = 4
+RETRIES = 4
+# First retry waits about this long; each later one doubles it, up to MAX_BACKOFF_S
+BACKOFF_S = 5.0
+MAX_BACKOFF_S = 300.0
+
+
+# Failures without an HTTP status that are worth retrying: timeouts and dropped or refused connections
+TRANSIENT_ERRORS = (TimeoutError, ConnectionError, urllib.error.URLError, http.client.IncompleteRead)
+try:
+    # cdsapi talks to the CDS through requests, whose network errors are not builtin ConnectionErrors
+    import requests
+
+    TRANSIENT_ERRORS += (requests.ConnectionError, requests.Timeout)
+except ImportError:
+    pass
+
+
+class Chunk(NamedTuple):
+    variable: str
+    date: str
+    request: dict
+
+
+def split_request(variables, dates, times, area, grid=(0.25, 0.25)):
+    """One complete CDS request per variable and date"""
+    return [
+        Chunk(variable, date, {
+            'product_type': 'reanalysis',
+            'variable': [variable],
+            'date': [date],
+            'time': list(times),
+            'area': list(area),  # [north, west, south, east]
+            'format': 'grib',
+            'grid': list(grid),
+        })
+        for variable in variables
+        for date in dates
+    ]
+
+
+def chunk_path(chunk_dir, chunk):
+    return Path(chunk_dir) / f"{chunk.variable}_{chunk.date}.grib"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HTTPBackend:
+    """Backend for a plain HTTP retrieve endpoint such as the local CDS stub"""
+
+    def __init__(self, url, timeout=120):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def retrieve(self, dataset, request, target):
+        http_request = urllib.request.Request(
+            f"{self.url}/retrieve/{dataset}", data=json.dumps(request).encode(),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        # HTTP errors raise; the caller retries 5xx (e.g. 503 while the queue is full) and 429
+        with urllib.request.urlopen(http_request, timeout=self.timeout) as response, open(target, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        return target
+
+
+def _retryable(error):
+    """Server errors (5xx), rate limiting (429) and transient network failures; other 4xx will not succeed on retry"""
+    if isinstance(error, urllib.error.HTTPError):
+        status = error.code
+    else:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status >= 500 or status == 429
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def _fetch(backend, dataset, chunk, target, retries, backoff):
+    """Retrieve one chunk into ``target`` atomically; returns the number of retries it took"""
+    partial = atomic_output(target)
+    for attempt in range(retries + 1):
+        try:
+            backend.retrieve(dataset, chunk.request, partial)
+            if os.path.getsize(partial) == 0:
+                raise ConnectionError("empty response")
+            os.replace(partial, target)
+            return attempt
+        except Exception as e:
+            Path(partial).unlink(missing_ok=True)
+            if attempt == retries or not _retryable(e):
+                raise
+            # Full jitter keeps parallel workers from retrying in lockstep
+            delay = random.uniform(0.5, 1.0) * min(MAX_BACKOFF_S, backoff * 2 ** attempt)
+            print(f"   Retrying {chunk.variable} {chunk.date} in {delay:.1f}s ({type(e).__name__}: {e})")
+            time.sleep(delay)
+
+
+def download_chunks(backend, chunks, chunk_dir, dataset=DATASET, max_workers=MAX_WORKERS,
+                    retries=RETRIES, backoff=BACKOFF_S, verify=False):
+    """Fetch every chunk not already in the manifest of ``chunk_dir``
+
+    A chunk counts as done when the manifest holds the same dataset and
+    request and the file on disk has the recorded size (and sha256, with
+    ``verify``). Returns the chunk paths in input order, or None for chunks
+    that still failed after their retries, and a stats dict.
+    """
+    chunk_dir = Path(chunk_dir)
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(chunk_dir / MANIFEST_NAME)
+
+    def is_done(path, signature):
+        if not manifest.is_done(path, signature):
+            return False
+        entry = manifest.entries[str(path)]
+        if entry.get("bytes") != os.path.getsize(path):
+            return False
+        return not verify or entry.get("sha256") == _sha256(path)
+
+    paths = [chunk_path(chunk_dir, chunk) for chunk in chunks]
+    signatures = [{"dataset": dataset, "request": chunk.request} for chunk in chunks]
+    pending = [i for i in range(len(chunks)) if not is_done(paths[i], signatures[i])]
+    stats = {"chunks": len(chunks), "fetched": 0, "skipped": len(chunks) - len(pending), "failed": 0,
+             "retries": 0, "bytes": 0}
+    failed = []
+
+    print(f"   {len(pending)} of {len(chunks)} chunks to fetch, {max_workers} at a time...")
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_fetch, backend, dataset, chunks[i], paths[i], retries, backoff): i
+                       for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    stats["retries"] += future.result()
+                except Exception as e:
+                    failed.append((i, f"{type(e).__name__}: {e}"))
+                    continue
+                size = os.path.getsize(paths[i])
+                # Saved per chunk: chunks are few and slow, and an interrupted run keeps every finished one
+                manifest.record(paths[i], signatures[i], bytes=size, sha256=_sha256(paths[i]))
+                manifest.save()
+                stats["fetched"] += 1
+                stats["bytes"] += size
+    finally:
+        manifest.save()
+
+    stats["failed"] = len(failed)
+    stats["seconds"] = time.perf_counter() - start
+    print(f"   Fetched {stats['fetched']} chunks ({stats['bytes'] / 1e6:.1f} MB), skipped {stats['skipped']} "
+          f"already downloaded, {stats['failed']} failed, {stats['retries']} retries in {stats['seconds']:.1f}s")
+    for i, error in failed[:5]:
+        print(f"   Failed {chunks[i].variable} {chunks[i].date}: {error}")
+    failed_indices = {i for i, _ in failed}
+    return [None if i in failed_indices else path for i, path in enumerate(paths)], stats
+
+
+def merge_chunks(paths, target):
+    """Concatenate GRIB chunks into one file, written atomically"""
+    partial = atomic_output(target)
+    with open(partial, 'wb') as out:
+        for path in paths:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, out)
+    os.replace(partial, target)
+    return target
@@ -0,0 +1,109 @@
+"""Hazard x admin-unit exposure overlay.
+
+Grid cells of a wind footprint are matched to admin polygons with one bulk
+STRtree query against prepared geometries, then reduced per unit with NumPy
+group operations, so the cost grows with cells + units rather than their
+product.
+"""
+import numpy as np
+import pandas as pd
+import shapely
+
+NAME_KEYS = ("name_en", "name", "shapeName", "ADM4_EN", "ADM3_EN", "ADM2_EN", "ADM1_EN")
+
+
+def unit_names(properties):
+    """Best available display name for each admin unit"""
+    names = []
+    for i, props in enumerate(properties):
+        name = next((props[k] for k in NAME_KEYS if props.get(k)), None)
+        names.append(name or f"Unit {i}")
+    return names
+
+
+def cell_unit_pairs(geoms, lons, lats):
+    """Return (unit index, flat cell index) pairs for cell centres inside each unit
+
+    Units too small to contain any cell centre are matched to the cell nearest
+    to their representative point.
+    """
+    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    cells = shapely.points(lon_grid.ravel(), lat_grid.ravel())
+    tree = shapely.STRtree(cells)
+
+    shapely.prepare(geoms)
+    unit_idx, cell_idx = tree.query(geoms, predicate="contains")
+
+    missing = np.setdiff1d(np.arange(len(geoms)), unit_idx)
+    if missing.size:
+        nearest = tree.query_nearest(shapely.point_on_surface(geoms[missing]), all_matches=False)
+        unit_idx = np.concatenate([unit_idx, missing[nearest[0]]])
+        cell_idx = np.concatenate([cell_idx, nearest[1]])
+    return unit_idx, cell_idx
+
+
+def exposure_table(geoms, properties, footprint, times=None, threshold=17.0):
+    """Per-unit peak wind, first impact time and hazard-area fraction
+
+    ``footprint`` is a ``utils.windfield.Footprint``; ``times`` maps its
+    ``first_time`` step indices to timestamps. The hazard-area fraction is the
+    cell-area-weighted share of the unit at or above ``threshold`` m/s.
+    """
+    geoms = np.asarray(geoms)
+    n_units = len(geoms)
+    unit_idx, cell_idx = cell_unit_pairs(geoms, footprint.lons, footprint.lats)
+
+    wind = footprint.wind.ravel()[cell_idx]
+    first = footprint.first_time.ravel()[cell_idx]
+    # Cell area shrinks with cos(latitude) on a regular lon/lat grid
+    lat_of_cell = np.repeat(footprint.lats, footprint.lons.size)[cell_idx]
+    area = np.cos(np.radians(lat_of_cell))
+
+    peak = np.zeros(n_units, dtype=np.float32)
+    np.maximum.at(peak, unit_idx, wind)
+
+    first_step = np.full(n_units, np.iinfo(np.int32).max, dtype=np.int64)
+    impacted = first >= 0
+    np.minimum.at(first_step, unit_idx[impacted], first[impacted])
+    first_step = np.where(first_step == np.iinfo(np.int32).max, -1, first_step)
+
+    total_area = np.bincount(unit_idx, weights=area, minlength=n_units)
+    hazard_area = np.bincount(unit_idx, weights=area * (wind >= threshold), minlength=n_units)
+    n_cells = np.bincount(unit_idx, minlength=n_units)
+
+    table = pd.DataFrame({
+        "unit": np.arange(n_units),
+        "name": unit_names(properties),
+        "peak_wind_ms": peak,
+        "first_impact_step": first_step,
+        "hazard_fraction": np.divide(hazard_area, total_area, out=np.zeros(n_units), where=total_area > 0),
+        "n_cells": n_cells,
+    })
+    if times is not None:
+        times = pd.Series(pd.to_datetime(times)).reset_index(drop=True)
+        table["first_impact"] = pd.NaT
+        hit = table["first_impact_step"] >= 0
+        table.loc[hit, "first_impact"] = times.iloc[table.loc[hit, "first_impact_step"]].to_numpy()
+        table["first_impact"] = pd.to_datetime(table["first_impact"])
+    return table.sort_values("peak_wind_ms", ascending=False).reset_index(drop=True)
+
+
+def exposure_geojson(geojson_data, table, value="peak_wind_ms", vmax=70.0):
+    """Copy of a boundary FeatureCollection with exposure columns and a fill colour per unit"""
+    by_unit = table.set_index("unit")
+    features = []
+    for i, feat in enumerate(geojson_data["features"]):
+        row = by_unit.loc[i]
+        scaled = float(min(max(row[value] / vmax, 0.0), 1.0))
+        props = dict(feat.get("properties", {}))
+        props.update({
+            "unit_name": row["name"],
+            "peak_wind_ms": round(float(row["peak_wind_ms"]), 1),
+            "hazard_fraction": round(float(row["hazard_fraction"]), 3),
+            "first_impact": str(row["first_impact"]) if "first_impact" in row and pd.notna(row["first_impact"]) else "",
+            "fill_color": [255, int(220 * (1 - scaled)), 0, int(60 + 160 * scaled)],
+        })
+        # Tooltip templates only see top-level keys, so mirror the exposure columns there
+        tooltip = {k: props[k] for k in ("unit_name", "peak_wind_ms", "hazard_fraction", "first_impact")}
+        features.append({"type": "Feature", "properties": props, "geometry": feat["geometry"], **tooltip})
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,219 @@
+"""Schools and health facilities under a storm.
+
+Facility points are ingested once into ``data/facilities/facilities.parquet``
+(``FACILITIES_FILE`` overrides) and indexed per process in a KD-tree on 3-D
+Earth-centred coordinates. The straight-line distance between two points on
+the sphere grows with their great-circle distance, so a radius in km maps
+exactly to a chord radius and the tree answers true great-circle radius
+queries. A storm is answered in step blocks with a single batched
+``query_ball_point`` per block: the facilities within R km of every fix
+are counted, and the Holland wind is evaluated only at the (fix, facility)
+pairs inside the wind field's reach and reduced to each facility's peak.
+
+    python -m utils.facilities schools.csv health_sites.geojson
+"""
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+import shapely.geometry
+
+from utils.lazy import lazy_import
+from utils.parallel import file_signature
+from utils.windfield import KM_PER_DEG, wind_at_points
+
+spatial = lazy_import("scipy.spatial")
+
+FACILITIES_FILE = Path(os.environ.get(
+    "FACILITIES_FILE", Path(__file__).resolve().parent.parent / "data" / "facilities" / "facilities.parquet"
+))
+EARTH_RADIUS_KM = KM_PER_DEG * 180 / np.pi
+FACILITY_COLUMNS = ["facility_id", "name", "type", "lon", "lat"]
+# OSM amenity / healthsites.io values folded into the two facility types
+TYPE_ALIASES = {
+    "school": "school", "kindergarten": "school", "college": "school", "university": "school",
+    "education": "school", "hospital": "health", "clinic": "health", "doctors": "health",
+    "health_post": "health", "healthcare": "health", "health": "health", "pharmacy": "health",
+}
+# Cap on (fix, facility) pairs evaluated at once; the worst case is every facility near every fix
+MAX_CHUNK_PAIRS = 4_000_000
+
+
+def read_facility_file(path, facility_type=None):
+    """Read facility points (CSV with lon/lat columns, GeoJSON points or Parquet) into the catalog columns"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        df = pd.read_csv(path)
+    elif path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif path.suffix in (".geojson", ".json"):
+        with open(path, 'r') as f:
+            features = json.load(f)["features"]
+        df = pd.DataFrame([feat["properties"] or {} for feat in features])
+        # Polygon footprints (e.g. OSM school grounds) are placed at their centroid
+        centres = shapely.centroid(np.array([shapely.geometry.shape(feat["geometry"]) for feat in features]))
+        df["lon"], df["lat"] = shapely.get_x(centres), shapely.get_y(centres)
+    else:
+        raise ValueError(f"Unsupported facility file: {path}")
+
+    df = df.rename(columns={c: c.lower() for c in df.columns})
+    df = df.rename(columns={"longitude": "lon", "latitude": "lat", "x": "lon", "y": "lat", "id": "facility_id",
+                            "osm_id": "facility_id", "amenity": "type"})
+    if facility_type is not None:
+        df["type"] = facility_type
+    df["type"] = df["type"].astype(str).str.lower().map(TYPE_ALIASES).fillna("other") if "type" in df else "other"
+    if "name" not in df:
+        df["name"] = ""
+    df["name"] = df["name"].fillna("").astype(str)
+    ids = df["facility_id"] if "facility_id" in df else pd.Series(None, index=df.index, dtype=object)
+    if pd.api.types.is_float_dtype(ids):
+        # Integer ids read back as floats when some are missing
+        ids = ids.astype("Int64")
+    generated = path.stem + "-" + pd.Series(np.arange(len(df)), index=df.index).astype(str)
+    df["facility_id"] = ids.astype("string").fillna(generated).astype(str)
+    df = df.dropna(subset=["lon", "lat"])
+    return df[FACILITY_COLUMNS].astype({"lon": np.float64, "lat": np.float64})
+
+
+def ingest(paths, output=FACILITIES_FILE):
+    """Combine facility files into the Parquet file the index loads (replacing it)"""
+    df = pd.concat([read_facility_file(p) for p in paths], ignore_index=True)
+    df = df.drop_duplicates("facility_id", keep="last").reset_index(drop=True)
+    df["type"] = df["type"].astype("category")
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(output, index=False)
+    return df
+
+
+def _xyz(lon, lat):
+    """Earth-centred coordinates in km"""
+    lon, lat = np.radians(lon), np.radians(lat)
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_KM * np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _chord(distance_km):
+    """Straight-line length of a great-circle arc of ``distance_km``"""
+    return 2 * EARTH_RADIUS_KM * np.sin(np.minimum(distance_km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class FacilityIndex:
+    """KD-tree over facility points answering batched radius and peak-wind queries for tracks"""
+
+    def __init__(self, facilities):
+        self.facilities = facilities.reset_index(drop=True)
+        self.lon = self.facilities["lon"].to_numpy(dtype=np.float64)
+        self.lat = self.facilities["lat"].to_numpy(dtype=np.float64)
+        self.tree = spatial.cKDTree(_xyz(self.lon, self.lat), balanced_tree=False)
+        self.types = self.facilities["type"].astype("category")
+
+    def __len__(self):
+        return len(self.facilities)
+
+    def pairs(self, lon, lat, radius_km):
+        """(point, facility) index pairs within ``radius_km`` of each query point, from one batched query"""
+        hits = self.tree.query_ball_point(_xyz(lon, lat), _chord(radius_km), return_sorted=False, workers=-1)
+        lengths = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        points = np.repeat(np.arange(len(hits)), lengths)
+        facilities = np.concatenate([np.asarray(h, dtype=np.int64) for h in hits]) if lengths.sum() else points[:0]
+        return points, facilities
+
+    def storm_exposure(self, track, radius_km=100.0, threshold=17.0, max_radius_km=500.0):
+        """Facilities within ``radius_km`` of each fix, and every reached facility's peak wind
+
+        Returns ``(steps, facilities)``: per track step the centre, the count
+        of facilities within the radius (total and by type) and the count at or
+        above ``threshold``; per facility reached by the wind field its peak
+        wind, the time of that peak, the first time at or above ``threshold``
+        and its closest distance to the centre.
+        """
+        lon = track["lon"].to_numpy(dtype=np.float64)
+        lat = track["lat"].to_numpy(dtype=np.float64)
+        times = track["time"].reset_index(drop=True)
+        n_steps, n = len(track), len(self)
+        type_codes = self.types.cat.codes.to_numpy()
+        type_names = list(self.types.cat.categories)
+
+        within = np.zeros((n_steps, len(type_names)), dtype=np.int64)
+        gale = np.zeros(n_steps, dtype=np.int64)
+        peak = np.zeros(n, dtype=np.float32)
+        peak_step = np.full(n, -1, dtype=np.int64)
+        first_step = np.full(n, n_steps, dtype=np.int64)
+        closest = np.full(n, np.inf)
+
+        block = max(1, MAX_CHUNK_PAIRS // max(n, 1))
+        # The wind field's cut-off is a tangent-plane distance; the margin keeps every pair it can reach
+        reach = max(radius_km, max_radius_km * 1.01)
+        for start in range(0, n_steps, block):
+            step, facility = self.pairs(lon[start:start + block], lat[start:start + block], reach)
+            step += start
+            wind = wind_at_points(track, step, self.lon[facility], self.lat[facility], max_radius_km=max_radius_km)
+            chord = np.linalg.norm(_xyz(lon[step], lat[step]) - self.tree.data[facility], axis=1)
+            distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / (2 * EARTH_RADIUS_KM), 1.0))
+
+            near = distance <= radius_km
+            np.add.at(within, (step[near], type_codes[facility[near]]), 1)
+            hit = wind >= threshold
+            gale += np.bincount(step[hit], minlength=n_steps)
+            np.minimum.at(first_step, facility[hit], step[hit])
+            np.minimum.at(closest, facility, distance)
+            # Pairs come in step order, so a facility whose peak repeats keeps its latest peak step
+            np.maximum.at(peak, facility, wind)
+            at_peak = (wind >= peak[facility]) & (wind > 0)
+            peak_step[facility[at_peak]] = step[at_peak]
+
+        steps = pd.DataFrame({"time": times, "lat": lat, "lon": lon})
+        for k, name in enumerate(type_names):
+            steps[f"{name}_within"] = within[:, k]
+        steps["facilities_within"] = within.sum(axis=1)
+        steps["facilities_gale_force"] = gale
+
+        reached = np.flatnonzero(peak_step >= 0)
+        exposed = self.facilities.iloc[reached].reset_index(drop=True)
+        exposed["peak_wind_ms"] = peak[reached].astype(np.float64).round(1)
+        exposed["peak_time"] = times.iloc[peak_step[reached]].to_numpy()
+        first = first_step[reached]
+        exposed["first_gale"] = pd.Series(times.iloc[np.minimum(first, n_steps - 1)].to_numpy()).where(first < n_steps)
+        exposed["closest_km"] = closest[reached].round(1)
+        exposed = exposed.sort_values("peak_wind_ms", ascending=False, ignore_index=True)
+        return steps, exposed
+
+
+_index = None
+_index_signature = None
+_lock = threading.Lock()
+
+
+def get_facility_index(path=FACILITIES_FILE):
+    """Process-wide facility index, rebuilt when the facility file changes; None without one"""
+    global _index, _index_signature
+    path = Path(path)
+    if not path.exists():
+        return None
+    signature = file_signature(path)
+    with _lock:
+        if _index is None or _index_signature != signature:
+            _index = FacilityIndex(pd.read_parquet(path))
+            _index_signature = signature
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine school and health facility files into the facility layer")
+    parser.add_argument("paths", nargs="+", help="CSV (lon/lat columns), GeoJSON or Parquet facility files")
+    parser.add_argument("--output", type=Path, default=FACILITIES_FILE)
+    args = parser.parse_args()
+
+    df = ingest(args.paths, args.output)
+    counts = ", ".join(f"{n:,} {t}" for t, n in df["type"].value_counts().items())
+    print(f"Wrote {len(df):,} facilities ({counts}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
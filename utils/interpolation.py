@@ -0,0 +1,81 @@
+"""Temporal resampling of cyclone tracks along great circles.
+
+All target times are placed in their track segment with one ``searchsorted``;
+positions are then interpolated along the great circle between the two fixes
+(spherical linear interpolation of unit vectors) and every other float
+attribute (wind, pressure, radii) linearly in time, all as array operations.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _unit_vectors(lon, lat):
+    lon, lat = np.radians(lon), np.radians(lat)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def great_circle(lon0, lat0, lon1, lat1, fraction):
+    """Points ``fraction`` of the way along the great circles from (lon0, lat0) to (lon1, lat1)"""
+    p0, p1 = _unit_vectors(lon0, lat0), _unit_vectors(lon1, lat1)
+    omega = np.arccos(np.clip(np.sum(p0 * p1, axis=-1), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    fraction = np.asarray(fraction, dtype=np.float64)
+    # Coincident fixes (a stationary storm) have no arc to follow
+    short = sin_omega < 1e-12
+    safe = np.where(short, 1.0, sin_omega)
+    w0 = np.where(short, 1.0 - fraction, np.sin((1.0 - fraction) * omega) / safe)
+    w1 = np.where(short, fraction, np.sin(fraction * omega) / safe)
+    p = w0[..., None] * p0 + w1[..., None] * p1
+    lon = np.degrees(np.arctan2(p[..., 1], p[..., 0]))
+    lat = np.degrees(np.arctan2(p[..., 2], np.hypot(p[..., 0], p[..., 1])))
+    return lon, lat
+
+
+def resample_track(track, freq="10min", times=None):
+    """Track resampled to a regular ``freq`` (or to explicit ``times``) between its first and last fix
+
+    Positions follow great circles between fixes, float attributes are
+    interpolated linearly in time, and other columns (basin, name, year) are
+    taken from the fix that opens each segment.
+    """
+    track = track.sort_values("time").reset_index(drop=True)
+    fix_times = track["time"].to_numpy("datetime64[ns]").view(np.int64)
+    if times is None:
+        times = pd.date_range(track["time"].iloc[0], track["time"].iloc[-1], freq=freq)
+    times = pd.DatetimeIndex(times)
+    t = times.to_numpy("datetime64[ns]").view(np.int64)
+    if len(track) < 2:
+        return track.iloc[np.zeros(len(t), dtype=np.intp)].assign(time=times).reset_index(drop=True)
+
+    # Segment opening at or before each target time; times outside the track clamp to its ends
+    seg = np.clip(np.searchsorted(fix_times, t, side="right") - 1, 0, len(track) - 2)
+    t0, t1 = fix_times[seg], fix_times[seg + 1]
+    fraction = np.clip((t - t0) / np.maximum(t1 - t0, 1), 0.0, 1.0)
+
+    out = {"time": times}
+    lon = track["lon"].to_numpy(dtype=np.float64)
+    lat = track["lat"].to_numpy(dtype=np.float64)
+    out["lon"], out["lat"] = great_circle(lon[seg], lat[seg], lon[seg + 1], lat[seg + 1], fraction)
+    for column in track.columns:
+        if column in out:
+            continue
+        values = track[column]
+        if pd.api.types.is_float_dtype(values):
+            v = values.to_numpy(dtype=np.float64)
+            out[column] = v[seg] + fraction * (v[seg + 1] - v[seg])
+        else:
+            out[column] = values.to_numpy()[seg]
+    resampled = pd.DataFrame(out)[list(track.columns)]
+    if "time_step" in resampled and len(times) > 1:
+        resampled["time_step"] = (times[1] - times[0]) / pd.Timedelta("1h")
+    return resampled
+
+
+def trip(resampled, origin=None):
+    """TripsLayer record: the path and its timestamps in seconds since ``origin`` (the first time)"""
+    origin = resampled["time"].iloc[0] if origin is None else origin
+    seconds = (resampled["time"] - origin).dt.total_seconds()
+    return {
+        "path": np.column_stack([resampled["lon"], resampled["lat"]]).round(4).tolist(),
+        "timestamps": seconds.round().tolist(),
+    }
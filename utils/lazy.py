@@ -0,0 +1,44 @@
+"""Deferred imports for heavy libraries.
+
+``lazy_import("openai")`` returns a stand-in module that performs the
+real import on first attribute access, so a page can name a heavy library at
+the top and only pay for it on the code path that uses it. Modules that are
+already imported are returned as they are.
+
+    python benchmarks/bench_startup.py  # cold import time and RSS per page
+"""
+import importlib
+import sys
+import threading
+import types
+
+# Libraries imported through lazy_import; a page that loads one at start-up has lost the deferral
+HEAVY_MODULES = ["openai", "PyPDF2", "rasterio", "scipy"]
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lock"] = threading.Lock()
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        # Pages run in one thread per session, so two first uses can race
+        with self._lock:
+            if self._module is None:
+                self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """The module ``name``, imported on first use unless it is already loaded"""
+    return sys.modules.get(name) or LazyModule(name)
+
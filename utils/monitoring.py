@@ -0,0 +1,255 @@
+"""Append-only store for the monitoring data streams.
+
+Each stream (shelter, stock, facility, WASH) is held as growable columnar
+NumPy buffers: entity and categorical columns as integer codes, timestamps as
+int64 nanoseconds. Records are only ever appended. Alongside the history every
+stream keeps the row of the latest record per entity, updated as each batch
+arrives, so "current value" dashboards read O(entities) rows instead of running
+``groupby(...).last()`` over the whole history.
+"""
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+INITIAL_CAPACITY = 1024
+
+
+class StreamSpec(NamedTuple):
+    entity: str
+    numeric: tuple
+    categorical: tuple
+
+
+STREAMS = {
+    "shelter": StreamSpec("shelter_id", ("occupancy", "capacity"), ("status",)),
+    "stock": StreamSpec("hub_id", ("kits_available", "kits_distributed"), ("status",)),
+    "facility": StreamSpec("facility_id", ("operational_status",), ("type", "status")),
+    "wash": StreamSpec("location", ("kits_deployed", "cases_reported"), ("status",)),
+}
+
+
+class Codes:
+    """Stable value -> integer code mapping that only grows"""
+
+    def __init__(self):
+        self.lookup = {}
+        self.values = []
+
+    def encode(self, values):
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        # Map this batch's uniques to store-wide codes (O(unique values) dict work)
+        mapped = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = self.lookup.get(value)
+            if code is None:
+                code = len(self.values)
+                self.lookup[value] = code
+                self.values.append(value)
+            mapped[i] = code
+        return mapped[codes]
+
+    def decode(self, codes):
+        return pd.Categorical.from_codes(codes, categories=self.values)
+
+
+class StreamBuffer:
+    """Append-only columnar history of one stream plus its latest-per-entity view"""
+
+    def __init__(self, spec, capacity=INITIAL_CAPACITY):
+        self.spec = spec
+        self._size = 0
+        self._time = np.empty(capacity, dtype=np.int64)
+        self._entity = np.empty(capacity, dtype=np.int32)
+        self._numeric = {c: np.empty(capacity, dtype=np.float64) for c in spec.numeric}
+        self._categorical = {c: np.empty(capacity, dtype=np.int32) for c in spec.categorical}
+        self._entities = Codes()
+        self._categories = {c: Codes() for c in spec.categorical}
+        # Row of the latest record for each entity code (-1 = none yet)
+        self._latest = np.full(0, -1, dtype=np.int64)
+        self._sorted = True
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def n_entities(self):
+        return len(self._entities.values)
+
+    def _columns(self):
+        yield self._time
+        yield self._entity
+        yield from self._numeric.values()
+        yield from self._categorical.values()
+
+    def _reserve(self, n):
+        capacity = len(self._time)
+        if self._size + n <= capacity:
+            return
+        # Amortised doubling keeps appends O(batch)
+        while capacity < self._size + n:
+            capacity *= 2
+
+        def grow(array):
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._time = grow(self._time)
+        self._entity = grow(self._entity)
+        self._numeric = {c: grow(a) for c, a in self._numeric.items()}
+        self._categorical = {c: grow(a) for c, a in self._categorical.items()}
+
+    def append(self, records):
+        """Append a batch (DataFrame with ``timestamp``, the entity and value columns)"""
+        n = len(records)
+        if n == 0:
+            return 0
+        spec = self.spec
+        times = pd.to_datetime(records["timestamp"]).to_numpy("datetime64[ns]").view(np.int64)
+        entities = self._entities.encode(records[spec.entity])
+
+        self._reserve(n)
+        start, end = self._size, self._size + n
+        self._time[start:end] = times
+        self._entity[start:end] = entities
+        for column, array in self._numeric.items():
+            array[start:end] = records[column].to_numpy(dtype=np.float64)
+        for column, array in self._categorical.items():
+            array[start:end] = self._categories[column].encode(records[column])
+        if self._sorted and (np.any(np.diff(times) < 0) or (start and times[0] < self._time[start - 1])):
+            self._sorted = False
+        self._size = end
+
+        self._update_latest(start, times, entities)
+        return n
+
+    def _update_latest(self, start, times, entities):
+        if len(self._latest) < self.n_entities:
+            self._latest = np.concatenate(
+                [self._latest, np.full(self.n_entities - len(self._latest), -1, dtype=np.int64)]
+            )
+        # Latest row per entity within the batch: last occurrence after a stable time sort
+        order = np.argsort(times, kind="stable")
+        reversed_codes = entities[order][::-1]
+        codes, first_in_reversed = np.unique(reversed_codes, return_index=True)
+        rows = order[len(order) - 1 - first_in_reversed]
+
+        current = self._latest[codes]
+        known = current >= 0
+        newer = ~known
+        newer[known] = times[rows[known]] >= self._time[current[known]]
+        self._latest[codes[newer]] = start + rows[newer]
+
+    def _frame(self, rows, entity_codes):
+        spec = self.spec
+        data = {"timestamp": pd.to_datetime(self._time[rows])}
+        data.update({c: a[rows] for c, a in self._numeric.items()})
+        data.update({c: self._categories[c].decode(a[rows]) for c, a in self._categorical.items()})
+        frame = pd.DataFrame(data)
+        frame.insert(1, spec.entity, self._entities.decode(entity_codes))
+        return frame
+
+    def latest(self):
+        """Latest record per entity, indexed by entity"""
+        codes = np.flatnonzero(self._latest >= 0)
+        frame = self._frame(self._latest[codes], codes)
+        # Plain labels: dashboards plot every row, never the unused categories
+        frame[self.spec.entity] = frame[self.spec.entity].astype(object)
+        return frame.set_index(self.spec.entity)
+
+    def history(self, since=None, entity=None):
+        """Records in arrival order, optionally from ``since`` on and for one entity"""
+        rows = np.arange(self._size)
+        if since is not None:
+            since = pd.Timestamp(since).value
+            if self._sorted:
+                rows = rows[np.searchsorted(self._time[:self._size], since, side="left"):]
+            else:
+                rows = rows[self._time[:self._size] >= since]
+        if entity is not None:
+            code = self._entities.lookup.get(entity)
+            if code is None:
+                rows = rows[:0]
+            else:
+                rows = rows[self._entity[rows] == code]
+        return self._frame(rows, self._entity[rows])
+
+    def last_timestamp(self):
+        if self._size == 0:
+            return None
+        times = self._time[:self._size]
+        return pd.Timestamp(times[-1] if self._sorted else times.max())
+
+    def memory_bytes(self):
+        return sum(a.nbytes for a in self._columns()) + self._latest.nbytes
+
+
+class MonitoringStore:
+    """Thread-safe set of stream buffers shared by every dashboard session"""
+
+    def __init__(self, streams=STREAMS):
+        self._buffers = {name: StreamBuffer(spec) for name, spec in streams.items()}
+        # Re-entrant so callers can hold it across a check-then-append
+        self.lock = threading.RLock()
+
+    def _buffer(self, stream):
+        if stream not in self._buffers:
+            raise ValueError(f"Unknown stream: {stream}")
+        return self._buffers[stream]
+
+    def append(self, stream, records):
+        with self.lock:
+            return self._buffer(stream).append(records)
+
+    def latest(self, stream):
+        with self.lock:
+            return self._buffer(stream).latest()
+
+    def history(self, stream, since=None, entity=None):
+        with self.lock:
+            return self._buffer(stream).history(since=since, entity=entity)
+
+    def last_timestamp(self, stream):
+        with self.lock:
+            return self._buffer(stream).last_timestamp()
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: {"rows": len(b), "entities": b.n_entities, "memory_mb": b.memory_bytes() / 1e6}
+                for name, b in self._buffers.items()
+            }
+
+
+# — Synthetic feed —
+
+def synthetic_batch(stream, times, entities, rng=None):
+    """One simulated record per entity per timestamp for a stream"""
+    rng = np.random.default_rng() if rng is None else rng
+    spec = STREAMS[stream]
+    n = len(times) * len(entities)
+    records = pd.DataFrame({
+        "timestamp": np.repeat(pd.DatetimeIndex(times).to_numpy(), len(entities)),
+        spec.entity: np.tile(np.asarray(entities, dtype=object), len(times)),
+    })
+    if stream == "shelter":
+        records["occupancy"] = rng.integers(50, 100, size=n)
+        records["capacity"] = 100
+        records["status"] = rng.choice(['Operational', 'At Capacity', 'Needs Support'], size=n, p=[0.7, 0.2, 0.1])
+    elif stream == "stock":
+        records["kits_available"] = rng.integers(100, 500, size=n)
+        records["kits_distributed"] = rng.integers(50, 200, size=n)
+        records["status"] = rng.choice(['Adequate', 'Low Stock', 'Critical'], size=n, p=[0.6, 0.3, 0.1])
+    elif stream == "facility":
+        records["operational_status"] = rng.integers(60, 100, size=n)
+        records["type"] = rng.choice(['Medical', 'Education', 'Health'], size=n)
+        records["status"] = rng.choice(['Fully Operational', 'Partially Operational', 'Non-Operational'], size=n, p=[0.6, 0.3, 0.1])
+    elif stream == "wash":
+        records["kits_deployed"] = rng.integers(20, 100, size=n)
+        records["cases_reported"] = rng.integers(0, 10, size=n)
+        records["status"] = rng.choice(['Normal', 'Alert', 'Critical'], size=n, p=[0.7, 0.2, 0.1])
+    else:
+        raise ValueError(f"Unknown stream: {stream}")
+    return records
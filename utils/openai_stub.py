@@ -0,0 +1,120 @@
+"""Local OpenAI-compatible chat completions stub.
+
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) with a
+canned reply, so the chatbot can be exercised without an API key or network:
+
+    python -m utils.openai_stub --port 8001 --token-delay 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 streamlit run Home.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Anticipatory actions should be tied to a clear forecast trigger, pre-agreed "
+    "roles and pre-positioned stock, so that funds and people move before landfall."
+)
+
+
+def make_handler(reply=DEFAULT_REPLY, token_delay=0.0, first_token_delay=0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            model = request.get("model", "stub")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            created = int(time.time())
+            # One "token" per word, keeping the spaces so the text reassembles exactly
+            words = reply.split(" ")
+            tokens = [w if i == 0 else " " + w for i, w in enumerate(words)]
+            tokens = tokens[:request.get("max_tokens") or len(tokens)]
+
+            if not request.get("stream"):
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def send(delta, finish_reason=None):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            time.sleep(first_token_delay)
+            send({"role": "assistant", "content": ""})
+            for token in tokens:
+                send({"content": token})
+                time.sleep(token_delay)
+            send({}, finish_reason="stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return StubHandler
+
+
+def start_stub_server(port=0, host="127.0.0.1", **handler_kwargs):
+    """Start the stub in a daemon thread and return (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(**handler_kwargs))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="seconds before the first token")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        make_handler(token_delay=args.token_delay, first_token_delay=args.first_token_delay),
+    )
+    print(f"Stub serving on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
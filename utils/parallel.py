@@ -0,0 +1,115 @@
+"""Process-pool runner for resumable file-producing jobs.
+
+Each task writes one output file. A JSON manifest next to the outputs records
+what was written from which inputs, so an interrupted run picks up where it
+stopped and unchanged outputs are never rebuilt.
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+MANIFEST_NAME = ".manifest.json"
+# Flush the manifest to disk after this many completed tasks
+SAVE_EVERY = 25
+
+
+def file_signature(*paths):
+    """Cheap change detector for input files: size and modification time"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class Manifest:
+    """Outputs already written, keyed by output path, with the inputs they came from"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # A corrupt manifest only costs a rebuild
+                self.entries = {}
+
+    def is_done(self, output, signature):
+        entry = self.entries.get(str(output))
+        return entry is not None and entry["inputs"] == signature and os.path.exists(output)
+
+    def record(self, output, signature, **details):
+        self.entries[str(output)] = {"inputs": signature, "written": time.time(), **details}
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def _outputs(task):
+    return task["outputs"] if "outputs" in task else [task["output"]]
+
+
+def run_tasks(tasks, worker, manifest_path, max_workers=None, label="files"):
+    """Run ``worker(*task["args"])`` for every task not already in the manifest
+
+    ``tasks`` are dicts with ``output`` (path written by the worker) or
+    ``outputs`` (several paths written by one call, when a worker has a
+    setup cost worth sharing), ``signature`` (JSON-serialisable description
+    of its inputs) and ``args``. A task with several outputs runs again
+    unless all of them are done. Returns the written output paths and a
+    stats dict including files/s.
+    """
+    manifest = Manifest(manifest_path)
+    done = [all(manifest.is_done(output, t["signature"]) for output in _outputs(t)) for t in tasks]
+    pending = [t for t, is_done in zip(tasks, done) if not is_done]
+    skipped = sum(len(_outputs(t)) for t, is_done in zip(tasks, done) if is_done)
+
+    written, failed = [], []
+    start = time.perf_counter()
+    try:
+        if pending:
+            # Spawned workers: forking a parent that already holds GDAL/dask threads can deadlock
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+                futures = {pool.submit(worker, *task["args"]): task for task in pending}
+                for future in as_completed(futures):
+                    task = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed.extend((output, str(e)) for output in _outputs(task))
+                        continue
+                    for output in _outputs(task):
+                        manifest.record(output, task["signature"])
+                        written.append(output)
+                        if len(written) % SAVE_EVERY == 0:
+                            manifest.save()
+    finally:
+        manifest.save()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "written": len(written),
+        "skipped": skipped,
+        "failed": len(failed),
+        "seconds": elapsed,
+        "files_per_second": len(written) / elapsed if elapsed > 0 else 0.0,
+    }
+    print(f"   Wrote {stats['written']} {label}, skipped {skipped} already done, "
+          f"{stats['failed']} failed in {elapsed:.1f}s ({stats['files_per_second']:.1f} files/s)")
+    for output, error in failed[:5]:
+        print(f"   Failed {output}: {error}")
+    return sorted(written), stats
+
+
+def atomic_output(output_file):
+    """Temporary path to write to before moving a finished file into place"""
+    return f"{output_file}.partial"
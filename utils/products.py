@@ -0,0 +1,238 @@
+"""On-disk cache of computed hazard products (footprints, exposure tables).
+
+Products are pickled under ``data/products/`` by a content address: a hash of
+the product kind, storm id, grid spec, admin level, the source of the modules
+that compute it, and a digest of its inputs (track values, boundary and raster
+file signatures). Changing any of them changes the key, so stale entries are
+never served; they just age out. The directory is bounded by an LRU size cap:
+reads bump a file's modification time, and writes evict the least recently
+used files until the total fits. Everything is plain files, so a restarted
+process (or another worker) serves what an earlier one computed.
+
+``PRODUCT_CACHE_DIR`` and ``PRODUCT_CACHE_MB`` override the location and cap.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from utils import exposure, facilities, windfield, zonal
+from utils.boundaries import get_boundary_store
+from utils.parallel import file_signature
+from utils.tracks import load_track
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get(
+    "PRODUCT_CACHE_DIR", Path(__file__).resolve().parent.parent / "data" / "products"
+))
+MAX_BYTES = int(float(os.environ.get("PRODUCT_CACHE_MB", 2048)) * 1e6)
+# Log the running hit rate every this many lookups
+LOG_EVERY = 20
+
+_versions = {}
+
+
+def code_version(*modules):
+    """Digest of the source of the modules a product is computed by"""
+    names = tuple(sorted(m.__name__ for m in modules))
+    if names not in _versions:
+        digest = hashlib.sha1()
+        for name in names:
+            digest.update(Path(sys.modules[name].__file__).read_bytes())
+        _versions[names] = digest.hexdigest()[:12]
+    return _versions[names]
+
+
+def product_key(kind, storm_id, grid=None, admin_level=None, version=None, inputs=None):
+    """Content address of a product: hash of everything it is computed from"""
+    spec = {"kind": kind, "storm_id": storm_id, "grid": grid, "admin_level": admin_level,
+            "version": version, "inputs": inputs}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ProductCache:
+    """Size-capped LRU of pickled products, shared across processes through the filesystem"""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def path_for(self, key):
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        """Cached product or None; a hit marks the entry as recently used"""
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            value = None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # A truncated or unreadable entry only costs a rebuild
+            logger.warning("Dropping unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def put(self, key, value):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._count("writes")
+        self.evict()
+        return value
+
+    def get_or_build(self, key, build, label=""):
+        """Read through the cache: return the stored product, or build, store and return it"""
+        value = self.get(key)
+        if value is not None:
+            logger.debug("Product cache hit %s", label)
+            return value
+        logger.debug("Product cache miss %s", label)
+        value = build()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        """(mtime, size, path) of every stored product, least recently used first"""
+        found = []
+        for path in self.root.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(found)
+
+    def evict(self):
+        """Delete least recently used products until the directory fits the size cap"""
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self._stats["evictions"] += 1
+            return total
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+            lookups = self._stats["hits"] + self._stats["misses"]
+            if outcome in ("hits", "misses") and lookups % LOG_EVERY == 0:
+                logger.info("Product cache hit rate %.0f%% over %d lookups", 100 * self._stats["hits"] / lookups, lookups)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        entries = self.entries()
+        stats.update({
+            "hit_rate": stats["hits"] / lookups if lookups else None,
+            "entries": len(entries),
+            "mb": sum(size for _, size, _ in entries) / 1e6,
+            "cap_mb": self.max_bytes / 1e6,
+        })
+        return stats
+
+
+_cache = ProductCache()
+
+
+def get_product_cache():
+    """Return the process-wide product cache"""
+    return _cache
+
+
+# — Products —
+
+def _track_digest(track):
+    return hashlib.sha1(pd.util.hash_pandas_object(track, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def _grid(bounds, resolution):
+    return {"bounds": list(bounds), "resolution": resolution}
+
+
+def wind_footprint(storm_id, track=None, bounds=windfield.BANGLADESH_BOUNDS, resolution=0.05):
+    """Max-wind footprint of a catalogued storm"""
+    track = load_track(storm_id) if track is None else track
+    key = product_key("wind_footprint", storm_id, grid=_grid(bounds, resolution),
+                      version=code_version(windfield), inputs=_track_digest(track))
+    return _cache.get_or_build(
+        key, lambda: windfield.max_wind_footprint(track, bounds=bounds, resolution=resolution),
+        label=f"wind_footprint {storm_id}",
+    )
+
+
+def _boundaries(admin_level):
+    store = get_boundary_store()
+    return store, file_signature(store.path_for(admin_level))
+
+
+def exposure_table(storm_id, admin_level, track=None, bounds=windfield.BANGLADESH_BOUNDS, resolution=0.05):
+    """Per-unit peak wind, first impact and hazard-area share (``utils.exposure.exposure_table``)"""
+    track = load_track(storm_id) if track is None else track
+    store, boundary_signature = _boundaries(admin_level)
+    key = product_key("exposure_table", storm_id, grid=_grid(bounds, resolution), admin_level=admin_level,
+                      version=code_version(windfield, exposure),
+                      inputs=[_track_digest(track), boundary_signature])
+
+    def build():
+        footprint = wind_footprint(storm_id, track, bounds, resolution)
+        return exposure.exposure_table(store.geometries(admin_level), store.properties(admin_level), footprint,
+                                       times=track["time"])
+
+    return _cache.get_or_build(key, build, label=f"exposure_table {storm_id} {admin_level}")
+
+
+def population_exposure(storm_id, admin_level, track=None, bounds=windfield.BANGLADESH_BOUNDS, resolution=0.05):
+    """People (and children) under the footprint per unit, or None without a population grid"""
+    if not zonal.POPULATION_RASTER.exists():
+        return None
+    track = load_track(storm_id) if track is None else track
+    store, boundary_signature = _boundaries(admin_level)
+    rasters = [zonal.POPULATION_RASTER] + ([zonal.CHILDREN_RASTER] if zonal.CHILDREN_RASTER.exists() else [])
+    key = product_key("population_exposure", storm_id, grid=_grid(bounds, resolution), admin_level=admin_level,
+                      version=code_version(windfield, zonal),
+                      inputs=[_track_digest(track), boundary_signature, file_signature(*rasters)])
+
+    def build():
+        footprint = wind_footprint(storm_id, track, bounds, resolution)
+        return zonal.zonal_exposure(store.geometries(admin_level), store.properties(admin_level),
+                                    rasters[0], zonal.footprint_hazard(footprint),
+                                    children=rasters[1] if len(rasters) > 1 else None)
+
+    return _cache.get_or_build(key, build, label=f"population_exposure {storm_id} {admin_level}")
+
+
+def facility_exposure(storm_id, track=None, radius_km=100.0):
+    """Facilities within ``radius_km`` per fix and peak wind per facility, or None without a facility file"""
+    if not facilities.FACILITIES_FILE.exists():
+        return None
+    track = load_track(storm_id) if track is None else track
+    key = product_key("facility_exposure", storm_id, version=code_version(windfield, facilities),
+                      inputs=[_track_digest(track), file_signature(facilities.FACILITIES_FILE), radius_km])
+    return _cache.get_or_build(
+        key, lambda: facilities.get_facility_index().storm_exposure(track, radius_km=radius_km),
+        label=f"facility_exposure {storm_id}",
+    )
@@ -0,0 +1,244 @@
+"""Per-section timing of Streamlit reruns.
+
+Wrap the expensive parts of a page in ``profile_section`` (a context manager
+that also works as a decorator) between ``start_page_profile`` and
+``finish_page_profile``. Each section records wall time and, when memory
+tracking is on, its peak traced memory. The finished rerun can be shown in a
+sidebar panel and appended to the file named by ``PROFILE_LOG``:
+
+- ``*.jsonl``: one JSON object per rerun
+- ``*.prom``: Prometheus text exposition (cumulative per page/section),
+  rewritten atomically for a node-exporter textfile collector
+
+Set ``PROFILE_MEMORY=1`` to track peak memory without opening the panel.
+tracemalloc is process-wide, so under concurrent sessions the peaks include
+allocations made by other sessions' threads. It runs only while some rerun is
+tracking memory and is stopped again once the last one finishes.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROFILE_LOG_ENV = "PROFILE_LOG"
+PROFILE_MEMORY_ENV = "PROFILE_MEMORY"
+PANEL_KEY = "show_rerun_profile"
+
+_local = threading.local()
+_prometheus = {}  # (page, section) -> [count, seconds_sum, last_peak_bytes]
+_prometheus_lock = threading.Lock()
+# Reruns currently tracking memory, and whether tracemalloc was started here (not by -X tracemalloc)
+_tracking = 0
+_tracking_lock = threading.Lock()
+_started_tracing = False
+
+
+def _acquire_tracing():
+    global _tracking, _started_tracing
+    with _tracking_lock:
+        if _tracking == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracking += 1
+
+
+def _release_tracing():
+    global _tracking, _started_tracing
+    with _tracking_lock:
+        _tracking -= 1
+        # tracemalloc roughly doubles the cost of every allocation; stop paying for it once nobody reads it
+        if _tracking == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class RunProfile:
+    """Sections recorded during one rerun of one page"""
+
+    def __init__(self, page, track_memory=False):
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = datetime.now(timezone.utc)
+        self.track_memory = track_memory
+        self.sections = []
+        self.wall_s = None
+        self._release = None
+        if track_memory:
+            _acquire_tracing()
+            # Also released if the run is dropped unfinished (st.stop, a rerun exception, its thread ending)
+            self._release = weakref.finalize(self, _release_tracing)
+        self._start = time.perf_counter()
+
+    def finish(self):
+        self.wall_s = time.perf_counter() - self._start
+        if self._release is not None:
+            self._release()
+        return self
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "page": self.page,
+            "started": self.started.isoformat(timespec="milliseconds"),
+            "wall_s": self.wall_s,
+            "sections": self.sections,
+        }
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def start_run(page, track_memory=False):
+    """Begin collecting sections for this thread's rerun"""
+    previous = current_run()
+    if previous is not None and previous._release is not None:
+        # An earlier rerun on this thread that never finished
+        previous._release()
+    _local.run = RunProfile(page, track_memory=track_memory)
+    _local.stack = []
+    return _local.run
+
+
+def finish_run():
+    """Close this thread's rerun, write it to PROFILE_LOG if set, and return it"""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run.finish()
+    log_path = os.environ.get(PROFILE_LOG_ENV)
+    if log_path:
+        write_run(run, log_path)
+    return run
+
+
+@contextmanager
+def profile_section(name):
+    """Time a named block (``with profile_section("build deck"):``) or function (``@profile_section(...)``)"""
+    run = current_run()
+    if run is None:
+        yield
+        return
+    stack = _local.stack
+    memory = run.track_memory and tracemalloc.is_tracing()
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        # Hand the peak so far to the enclosing section before resetting it for this one
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"base": current, "peak": current}
+    else:
+        frame = {"base": 0, "peak": 0}
+    # Recorded on entry so the rerun lists sections in the order they started
+    record = {"section": name, "depth": len(stack), "wall_s": None, "peak_mb": None, "error": None}
+    run.sections.append(record)
+    stack.append(frame)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        stack.pop()
+        peak_mb = None
+        if memory and tracemalloc.is_tracing():
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            peak_mb = (peak - frame["base"]) / 1e6
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        record.update({"wall_s": wall, "peak_mb": peak_mb, "error": error})
+
+
+# — Sinks —
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def write_run(run, path):
+    """Append a finished rerun as JSON lines, or fold it into a Prometheus text file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".prom":
+        write_prometheus(run, path)
+        return
+    with open(path, 'a') as f:
+        f.write(json.dumps(run.to_dict()) + "\n")
+
+
+def write_prometheus(run, path):
+    with _prometheus_lock:
+        entries = [(run.page, "(rerun)", run.wall_s, None)]
+        # Sections left by st.stop() or a rerun exception never finished; skip them
+        entries += [(run.page, s["section"], s["wall_s"], s["peak_mb"]) for s in run.sections if s["wall_s"] is not None]
+        for page, section, wall, peak_mb in entries:
+            stats = _prometheus.setdefault((page, section), [0, 0.0, None])
+            stats[0] += 1
+            stats[1] += wall
+            if peak_mb is not None:
+                stats[2] = peak_mb * 1e6
+
+        lines = [
+            "# HELP streamlit_section_seconds Wall time spent in a profiled rerun section.",
+            "# TYPE streamlit_section_seconds summary",
+        ]
+        for (page, section), (count, total, _) in sorted(_prometheus.items()):
+            labels = f'page="{_label(page)}",section="{_label(section)}"'
+            lines.append(f"streamlit_section_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"streamlit_section_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP streamlit_section_peak_bytes Peak traced memory of the section's last run.",
+            "# TYPE streamlit_section_peak_bytes gauge",
+        ]
+        for (page, section), (_, _, peak) in sorted(_prometheus.items()):
+            if peak is not None:
+                labels = f'page="{_label(page)}",section="{_label(section)}"'
+                lines.append(f"streamlit_section_peak_bytes{{{labels}}} {peak:.0f}")
+
+        tmp_path = path.with_suffix(".prom.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+# — Streamlit glue —
+
+def start_page_profile(page):
+    """Start profiling a page rerun; call right after st.set_page_config"""
+    import streamlit as st
+
+    track_memory = bool(st.session_state.get(PANEL_KEY)) or os.environ.get(PROFILE_MEMORY_ENV) == "1"
+    return start_run(page, track_memory=track_memory)
+
+
+def finish_page_profile():
+    """Finish the rerun and render the optional sidebar panel"""
+    import pandas as pd
+    import streamlit as st
+
+    run = finish_run()
+    with st.sidebar:
+        show = st.toggle("Show rerun profile", key=PANEL_KEY)
+        if not show or run is None:
+            return run
+        st.markdown(f"**Rerun profile** · {run.wall_s * 1000:.0f} ms total")
+        if run.sections:
+            table = pd.DataFrame(run.sections)
+            table["section"] = ["  " * d + s for d, s in zip(table["depth"], table["section"])]
+            table["ms"] = (table["wall_s"] * 1000).round(1)
+            columns = ["section", "ms"] + (["peak_mb"] if table["peak_mb"].notna().any() else [])
+            st.dataframe(table[columns], hide_index=True, use_container_width=True)
+        if not run.track_memory:
+            st.caption("Peak memory is recorded from the next rerun on.")
+    return run
@@ -0,0 +1,124 @@
+"""Offline BM25 retrieval over uploaded documents.
+
+A PDF is split into overlapping word chunks once, indexed with BM25, and only
+the top-k chunks for each question are sent to the model instead of the whole
+document text.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+import numpy as np
+
+from utils.lazy import lazy_import
+
+PyPDF2 = lazy_import("PyPDF2")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have how i if in into is it its
+of on or our should that the their them then there these they this to was we were what when
+where which who will with would you your
+""".split())
+
+
+class Chunk(NamedTuple):
+    text: str
+    page: int  # 1-based page the chunk starts on
+
+
+def file_hash(data):
+    """Content hash used as the index cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def chunk_pages(pages, chunk_words=200, overlap=40):
+    """Split page texts into overlapping word windows, remembering the start page"""
+    words, word_pages = [], []
+    for page_no, text in enumerate(pages, start=1):
+        page_words = (text or "").split()
+        words.extend(page_words)
+        word_pages.extend([page_no] * len(page_words))
+
+    chunks = []
+    step = max(chunk_words - overlap, 1)
+    for start in range(0, len(words), step):
+        window = words[start:start + chunk_words]
+        if not window:
+            break
+        chunks.append(Chunk(" ".join(window), word_pages[start]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks, with postings held as NumPy arrays"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+
+        postings = defaultdict(lambda: ([], []))
+        doc_len = np.zeros(len(self.chunks), dtype=np.float32)
+        for doc_id, chunk in enumerate(self.chunks):
+            counts = Counter(tokenize(chunk.text))
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                docs, tfs = postings[term]
+                docs.append(doc_id)
+                tfs.append(tf)
+
+        n_docs = max(len(self.chunks), 1)
+        avg_len = float(doc_len.mean()) if len(self.chunks) else 1.0
+        # Per-document length normalisation, precomputed once
+        self._norm = (k1 * (1 - b + b * doc_len / max(avg_len, 1.0))).astype(np.float32)
+        self._postings = {}
+        for term, (docs, tfs) in postings.items():
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            self._postings[term] = (np.array(docs, dtype=np.int32), np.array(tfs, dtype=np.float32), idf)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def search(self, query, k=5):
+        """Return the k best (chunk, score) pairs for a query, best first"""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs, idf = posting
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(self.chunks[i], float(scores[i])) for i in top]
+
+
+def build_pdf_index(pdf_file, chunk_words=200, overlap=40):
+    """Extract text from a PDF (path or file-like) and index it"""
+    reader = PyPDF2.PdfReader(pdf_file)
+    pages = [page.extract_text() for page in reader.pages]
+    return BM25Index(chunk_pages(pages, chunk_words, overlap))
+
+
+def format_context(results, max_chars=6000):
+    """Render retrieved chunks as a prompt block with page references"""
+    parts, used = [], 0
+    for chunk, _ in results:
+        block = f"[p. {chunk.page}] {chunk.text}"
+        if used + len(block) > max_chars:
+            break
+        parts.append(block)
+        used += len(block)
+    return "\n\n".join(parts)
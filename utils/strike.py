@@ -0,0 +1,158 @@
+"""Strike probability: share of tracks whose centre passes within a radius of each cell.
+
+A track buffered by the radius is a chain of capsules, one per segment
+between fixes, and a capsule cuts every grid row in a single interval. The
+intervals of all segments of all members in a batch are solved analytically
+at once (distances in km, with longitude scaled at each row's latitude),
+merged per member and row so a member counts once per cell, and histogrammed
+into a difference array whose cumulative sum along the rows is the cell
+count. No polygons are buffered or unioned, and members can be added batch
+by batch while the probability grid is shown.
+"""
+import base64
+import io
+
+import numpy as np
+
+from utils.windfield import KM_PER_DEG, make_grid
+
+# lon_min, lat_min, lon_max, lat_max: the Bay of Bengal and its coasts
+STRIKE_BOUNDS = (80.0, 5.0, 100.0, 27.0)
+STRIKE_RADIUS_KM = 100.0
+# Cap on (segments x rows) intervals solved at once
+MAX_CHUNK_INTERVALS = 5_000_000
+
+
+def _solve(alpha, beta, lo, hi):
+    """Interval of x with lo <= alpha * x + beta <= hi (all x, or none, when alpha is 0)"""
+    flat = np.abs(alpha) < 1e-12
+    safe = np.where(flat, 1.0, alpha)
+    x0, x1 = (lo - beta) / safe, (hi - beta) / safe
+    inside = (beta >= lo) & (beta <= hi)
+    low = np.where(flat, np.where(inside, -np.inf, np.inf), np.minimum(x0, x1))
+    high = np.where(flat, np.where(inside, np.inf, -np.inf), np.maximum(x0, x1))
+    return low, high
+
+
+class StrikeGrid:
+    """Running count of members passing within ``radius_km`` of each cell centre"""
+
+    def __init__(self, bounds=STRIKE_BOUNDS, resolution=0.1, radius_km=STRIKE_RADIUS_KM):
+        self.lons, self.lats = make_grid(bounds, resolution)
+        self.resolution = resolution
+        self.radius_km = radius_km
+        self.counts = np.zeros((self.lats.size, self.lons.size), dtype=np.int32)
+        self.n_members = 0
+        # Rows a circle of the radius can reach either side of its centre
+        self._reach = int(np.ceil(radius_km / (KM_PER_DEG * resolution))) + 1
+
+    def add(self, lon, lat):
+        """Add a batch of tracks as (members, steps) arrays of centre positions"""
+        lon = np.atleast_2d(np.asarray(lon, dtype=np.float64))
+        lat = np.atleast_2d(np.asarray(lat, dtype=np.float64))
+        chunk = max(1, MAX_CHUNK_INTERVALS // ((2 * self._reach + 8) * lon.shape[1]))
+        for start in range(0, lon.shape[0], chunk):
+            self.counts += self._coverage(lon[start:start + chunk], lat[start:start + chunk])
+        self.n_members += lon.shape[0]
+        return self
+
+    def add_track(self, track):
+        """Add one track frame (e.g. a historical storm from the catalog)"""
+        return self.add(track["lon"].to_numpy()[None, :], track["lat"].to_numpy()[None, :])
+
+    def _intervals(self, lon, lat):
+        """(member, row, first col, last col) of every capsule/row intersection in a batch"""
+        n_members, n_steps = lon.shape
+        n_rows = self.lats.size
+        res, lon0, lat0 = self.resolution, self.lons[0], self.lats[0]
+        # Segment end points; a single-fix track is one zero-length segment
+        end = 1 if n_steps > 1 else 0
+        lon_a, lat_a = lon[:, :n_steps - end].ravel(), lat[:, :n_steps - end].ravel()
+        lon_b, lat_b = lon[:, end:].ravel(), lat[:, end:].ravel()
+        member = np.repeat(np.arange(n_members), max(n_steps - end, 1))
+
+        # Rows each segment's capsule can reach
+        low_row = np.ceil((np.minimum(lat_a, lat_b) - lat0) / res).astype(np.int64) - self._reach
+        span = int(np.ceil(np.max(np.abs(lat_b - lat_a), initial=0.0) / res)) + 2 * self._reach + 1
+        rows = low_row[:, None] + np.arange(span)
+        row_lat = lat0 + rows * res
+        scale = KM_PER_DEG * np.cos(np.radians(row_lat))
+
+        # End-point circles, in km on each row's local scale
+        r = self.radius_km
+        ax, bx = lon_a[:, None] * scale, lon_b[:, None] * scale
+        dya = (row_lat - lat_a[:, None]) * KM_PER_DEG
+        dyb = (row_lat - lat_b[:, None]) * KM_PER_DEG
+        with np.errstate(invalid="ignore"):
+            ha = np.sqrt(r ** 2 - dya ** 2)
+            hb = np.sqrt(r ** 2 - dyb ** 2)
+        low = np.fmin(ax - ha, bx - hb)
+        high = np.fmax(ax + ha, bx + hb)
+
+        # Rectangle between the circles: |n . d| <= r and 0 <= u . d <= length, with d measured from a
+        ux, uy = bx - ax, np.broadcast_to((lat_b - lat_a)[:, None] * KM_PER_DEG, ax.shape)
+        length = np.hypot(ux, uy)
+        moving = length > 0
+        ux = np.divide(ux, length, out=np.zeros_like(length), where=moving)
+        uy = np.divide(uy, length, out=np.zeros_like(length), where=moving)
+        n_low, n_high = _solve(-uy, ux * dya, -r, r)
+        u_low, u_high = _solve(ux, uy * dya, 0.0, length)
+        rect_low, rect_high = np.maximum(n_low, u_low), np.minimum(n_high, u_high)
+        rect = moving & (rect_low <= rect_high)
+        low = np.where(rect, np.fmin(low, ax + rect_low), low)
+        high = np.where(rect, np.fmax(high, ax + rect_high), high)
+
+        # Columns whose centres fall inside the interval
+        hit = np.isfinite(low) & np.isfinite(high) & (rows >= 0) & (rows < n_rows)
+        first = np.ceil((np.where(hit, low, 0.0) / scale - lon0) / res).astype(np.int64)
+        last = np.floor((np.where(hit, high, 0.0) / scale - lon0) / res).astype(np.int64)
+        first, last = np.clip(first, 0, None), np.clip(last, None, self.lons.size - 1)
+        hit &= first <= last
+        return np.broadcast_to(member[:, None], rows.shape)[hit], rows[hit], first[hit], last[hit]
+
+    def _coverage(self, lon, lat):
+        n_rows, n_cols = self.counts.shape
+        member, rows, first, last = self._intervals(lon, lat)
+        # Merge overlapping intervals of the same member and row, so each cell counts once per member
+        width = n_cols + 2
+        group = member.astype(np.int64) * n_rows + rows
+        order = np.argsort(group * width + first, kind="stable")
+        starts = (group * width + first)[order]
+        ends = np.maximum.accumulate((group * width + last)[order])
+        new = np.ones(starts.size, dtype=bool)
+        new[1:] = starts[1:] > ends[:-1]
+        heads = np.flatnonzero(new)
+        merged_start = starts[heads]
+        merged_end = ends[np.append(heads[1:] - 1, starts.size - 1)] if heads.size else ends[:0]
+
+        diff = np.zeros((n_rows, n_cols + 1), dtype=np.int32)
+        row = (merged_start // width) % n_rows
+        np.add.at(diff, (row, merged_start % width), 1)
+        np.add.at(diff, (row, merged_end % width + 1), -1)
+        return np.cumsum(diff, axis=1)[:, :n_cols]
+
+    def probability(self):
+        """Share of members within the radius of each cell, shape (lat, lon)"""
+        return self.counts / max(self.n_members, 1)
+
+
+def probability_image(grid, min_probability=0.01):
+    """Render strike probability as a PNG data URL plus its [W, S, E, N] bounds for a BitmapLayer"""
+    from PIL import Image
+
+    p = grid.probability()
+    # Light -> dark purple ramp, transparent below min_probability
+    rgba = np.zeros(p.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = (200 - 120 * p).astype(np.uint8)
+    rgba[..., 1] = (170 * (1.0 - p)).astype(np.uint8)
+    rgba[..., 2] = 230
+    rgba[..., 3] = np.where(p >= min_probability, 60 + 170 * p, 0).astype(np.uint8)
+
+    # Image rows run north to south
+    buffer = io.BytesIO()
+    Image.fromarray(rgba[::-1]).save(buffer, format="PNG")
+    url = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+    half = grid.resolution / 2
+    bounds = [float(grid.lons[0] - half), float(grid.lats[0] - half),
+              float(grid.lons[-1] + half), float(grid.lats[-1] + half)]
+    return url, bounds
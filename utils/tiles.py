@@ -0,0 +1,180 @@
+"""Offline Mapbox Vector Tile pyramid for the admin boundaries.
+
+Run once after adding or updating boundary files:
+
+    python -m utils.tiles --levels 0 1 2 3 4 --max-zoom 10
+
+Tiles are written to ``static/tiles/adm{level}/{z}/{x}/{y}.pbf``, which Streamlit
+serves from the app's own origin at ``app/static/tiles/`` when
+``server.enableStaticServing`` is on (see ``.streamlit/config.toml``), so the
+browser only fetches tiles in view. ``TILE_SERVER_URL`` points the map at tiles
+hosted elsewhere instead. With neither, pages fall back to GeoJSON.
+"""
+import argparse
+import json
+import math
+import os
+from pathlib import Path
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+
+from utils.boundaries import ADMIN_FILES, get_boundary_store
+
+# Streamlit serves the static/ folder next to the main script at app/static/
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+TILE_DIR = STATIC_DIR / "tiles"
+TILE_EXTENT = 4096
+LAYER_NAME = "boundaries"
+# Half the Web Mercator world width in metres
+ORIGIN_SHIFT = 20037508.342789244
+EARTH_RADIUS = 6378137.0
+MAX_LAT = 85.0511287798
+
+
+def level_key(admin_level):
+    """'Admin Level 3' -> 'adm3'"""
+    return Path(ADMIN_FILES[admin_level]).stem
+
+
+def to_mercator(coords):
+    """Project an (N, 2) lon/lat array to Web Mercator metres"""
+    lon = coords[:, 0]
+    lat = np.clip(coords[:, 1], -MAX_LAT, MAX_LAT)
+    x = np.radians(lon) * EARTH_RADIUS
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS
+    return np.column_stack([x, y])
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """Slippy-map tile index containing a lon/lat point"""
+    lat = max(min(lat, MAX_LAT), -MAX_LAT)
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """Web Mercator bounds (minx, miny, maxx, maxy) of a tile"""
+    size = 2 * ORIGIN_SHIFT / 2 ** zoom
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def _clean_properties(properties):
+    # MVT only carries scalar attribute values
+    return {k: v for k, v in properties.items() if isinstance(v, (str, int, float, bool))}
+
+
+def build_level(admin_level, out_dir=TILE_DIR, min_zoom=0, max_zoom=10, buffer=64):
+    """Write the tile pyramid for one admin level and return the tile count"""
+    store = get_boundary_store()
+    properties = [_clean_properties(p) for p in store.properties(admin_level)]
+    level_dir = Path(out_dir) / level_key(admin_level)
+
+    lon_min, lat_min, lon_max, lat_max = shapely.total_bounds(store.geometries(admin_level))
+    written = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        # Geometry simplified for this zoom, projected once per zoom level
+        geoms = shapely.transform(store.geometries(admin_level, zoom=zoom), to_mercator)
+        tree = shapely.STRtree(geoms)
+
+        x0, y0 = lonlat_to_tile(lon_min, lat_max, zoom)
+        x1, y1 = lonlat_to_tile(lon_max, lat_min, zoom)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                minx, miny, maxx, maxy = tile_bounds(zoom, x, y)
+                pad = (maxx - minx) * buffer / TILE_EXTENT
+                clip_box = (minx - pad, miny - pad, maxx + pad, maxy + pad)
+                hits = tree.query(shapely.box(*clip_box), predicate="intersects")
+                clipped = shapely.clip_by_rect(geoms[hits], *clip_box)
+                features = [
+                    {"geometry": geom, "properties": properties[i]}
+                    for i, geom in zip(hits, clipped)
+                    if not geom.is_empty
+                ]
+                # Tiles inside the bounds are always written (empty if no unit reaches them) so that a
+                # static file server never answers the map with a 404; the layer requests nothing outside
+                tile = b"" if not features else mapbox_vector_tile.encode(
+                    [{"name": LAYER_NAME, "features": features}],
+                    default_options={
+                        "quantize_bounds": (minx, miny, maxx, maxy),
+                        "extents": TILE_EXTENT,
+                    },
+                )
+                tile_path = level_dir / str(zoom) / str(x) / f"{y}.pbf"
+                tile_path.parent.mkdir(parents=True, exist_ok=True)
+                tile_path.write_bytes(tile)
+                written += 1
+
+    metadata = {
+        "name": level_key(admin_level),
+        "format": "pbf",
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": [float(lon_min), float(lat_min), float(lon_max), float(lat_max)],
+        "layer": LAYER_NAME,
+        "tiles": written,
+    }
+    level_dir.mkdir(parents=True, exist_ok=True)
+    with open(level_dir / "metadata.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return written
+
+
+def load_metadata(admin_level, tile_dir=TILE_DIR):
+    """Return the pyramid metadata for an admin level, or None if not built"""
+    meta_path = Path(tile_dir) / level_key(admin_level) / "metadata.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, 'r') as f:
+        return json.load(f)
+
+
+def tile_base_url(tile_dir=TILE_DIR):
+    """Base URL the browser loads tiles from, or None when no tile source is configured"""
+    url = os.environ.get("TILE_SERVER_URL")
+    if url:
+        return url
+    from streamlit import config
+
+    tile_dir = Path(tile_dir).resolve()
+    if not config.get_option("server.enableStaticServing") or not tile_dir.is_relative_to(STATIC_DIR):
+        return None
+    # Same origin as the app, so it works wherever the app is deployed
+    base_path = config.get_option("server.baseUrlPath").strip("/")
+    prefix = f"/{base_path}" if base_path else ""
+    return f"{prefix}/app/static/{tile_dir.relative_to(STATIC_DIR).as_posix()}"
+
+
+def tile_url(admin_level, base_url=None):
+    """URL template for an admin level's tiles, for use in a pydeck MVTLayer; None without a tile source"""
+    base_url = base_url or tile_base_url()
+    if base_url is None:
+        return None
+    return f"{base_url.rstrip('/')}/{level_key(admin_level)}/{{z}}/{{x}}/{{y}}.pbf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the admin boundary vector tile pyramid")
+    parser.add_argument("--levels", nargs="+", type=int, default=[0, 1, 2, 3, 4])
+    parser.add_argument("--min-zoom", type=int, default=0)
+    parser.add_argument("--max-zoom", type=int, default=10)
+    parser.add_argument("--out-dir", default=str(TILE_DIR))
+    args = parser.parse_args()
+
+    for level in args.levels:
+        admin_level = f"Admin Level {level}"
+        try:
+            count = build_level(admin_level, args.out_dir, args.min_zoom, args.max_zoom)
+        except FileNotFoundError as e:
+            print(f"Skipping {admin_level}: {e}")
+            continue
+        print(f"{admin_level}: wrote {count} tiles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Indexed store of crisis timeline events.
+
+Events are read once from a CSV/Parquet file, sorted by time, with phase,
+source, alert level and event name held as categoricals. Each event is tagged
+with its forecast horizon at load (matching the patterns against the distinct
+event names only), and row positions are grouped by phase, horizon and storm,
+so the page's lookups are dictionary hits instead of full-frame filters.
+
+For charts, ``bin_events`` aggregates a time window into at most ``max_bins``
+bins per lane on the server, so the Vega-Lite spec sent to the browser stays
+the same size however many events the window holds.
+"""
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# TIMELINE_EVENTS points the page at another events file (CSV or Parquet)
+EVENTS_FILE = Path(os.environ.get(
+    "TIMELINE_EVENTS", Path(__file__).resolve().parent.parent / "data" / "timeline" / "events.csv"
+))
+
+PHASES = ["Preparedness", "Monitoring", "Recovery"]
+ALERT_LEVELS = ["Info", "Watch", "Warning", "Alert", "Critical"]
+
+# Forecast horizon of preparedness events, matched against event names
+HORIZON_PATTERNS = {
+    "seasonal": r"Seasonal|SEAS5",
+    "s2s": r"MJO|S2S|Risk Period",
+    "medium_range": r"Track Forecast",
+    "nowcast": r"Intensity|Surge|72-hour",
+}
+HORIZONS = list(HORIZON_PATTERNS)
+
+# Chart payload bounds: bins per lane, and the largest window drawn event by event
+MAX_BINS = 120
+MAX_RAW_EVENTS = 500
+# Candidate bin widths, finest first
+BIN_WIDTHS = [pd.Timedelta(w) for w in ("10min", "1h", "6h", "1D", "7D", "30D", "91D", "365D")]
+
+
+def _horizon_tags(events, phases):
+    """Horizon per event: regexes run over the distinct names, then mapped back"""
+    names = pd.Series(events.cat.categories)
+    tags = np.full(len(names), -1)
+    for code, pattern in enumerate(HORIZON_PATTERNS.values()):
+        tags[(tags < 0) & names.str.contains(pattern).to_numpy()] = code
+    event_codes = events.cat.codes.to_numpy()
+    codes = np.where(event_codes >= 0, tags[event_codes], -1)
+    # Horizons describe forecasts, so only preparedness events carry one
+    codes = np.where(phases.to_numpy() == "Preparedness", codes, -1)
+    return pd.Categorical.from_codes(codes, categories=HORIZONS)
+
+
+def read_events(path=EVENTS_FILE):
+    """Read an events file into a time-sorted frame with categorical columns"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    if "storm_id" not in df:
+        df["storm_id"] = "UNKNOWN"
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], utc=True)
+    df["Phase"] = pd.Categorical(df["Phase"], categories=PHASES)
+    df["Alert_Level"] = pd.Categorical(df["Alert_Level"], categories=ALERT_LEVELS, ordered=True)
+    for column in ("storm_id", "Event", "Source", "Location"):
+        df[column] = df[column].astype("category")
+    if "Horizon" in df:
+        df["Horizon"] = pd.Categorical(df["Horizon"], categories=HORIZONS)
+    else:
+        df["Horizon"] = _horizon_tags(df["Event"], df["Phase"])
+
+    # Stable sort keeps the file order for events at the same time
+    return df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+
+
+class EventStore:
+    """Time-sorted events with precomputed row groups per phase, horizon and storm"""
+
+    def __init__(self, events):
+        self.events = events
+        # Positions within each group ascend, so they are already in time order
+        self._groups = {}
+        for column in ("Phase", "Horizon", "storm_id"):
+            for key, rows in events.groupby(column, observed=True).indices.items():
+                self._groups[(column, key)] = rows
+        for column in ("Phase", "Horizon"):
+            for (storm, key), rows in events.groupby(["storm_id", column], observed=True).indices.items():
+                self._groups[(column, key, storm)] = rows
+
+    def __len__(self):
+        return len(self.events)
+
+    def storms(self):
+        return list(self.events["storm_id"].cat.categories)
+
+    def _rows(self, phase=None, horizon=None, storm_id=None):
+        empty = np.empty(0, dtype=np.intp)
+        if phase is None and horizon is None:
+            if storm_id is None:
+                return np.arange(len(self.events))
+            return self._groups.get(("storm_id", storm_id), empty)
+        selections = []
+        for column, key in (("Phase", phase), ("Horizon", horizon)):
+            if key is None:
+                continue
+            group = (column, key) if storm_id is None else (column, key, storm_id)
+            selections.append(self._groups.get(group, empty))
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def select(self, phase=None, horizon=None, storm_id=None):
+        """Events matching every given key, oldest first"""
+        return self.events.iloc[self._rows(phase, horizon, storm_id)]
+
+    def latest(self, phase=None, horizon=None, storm_id=None):
+        """Most recent matching event as a Series, or None"""
+        rows = self._rows(phase, horizon, storm_id)
+        if len(rows) == 0:
+            return None
+        return self.events.iloc[rows[-1]]
+
+    def span(self, storm_id=None):
+        """(first, last) event time, optionally for one storm"""
+        rows = self._rows(storm_id=storm_id)
+        if len(rows) == 0:
+            return None
+        times = self.events["Timestamp"]
+        return times.iloc[rows[0]], times.iloc[rows[-1]]
+
+    def between(self, start, end, storm_id=None):
+        """Events with start <= Timestamp < end, via binary search on the time index"""
+        times = self.events["Timestamp"].array
+        lo = times.searchsorted(_utc(start), side="left")
+        hi = times.searchsorted(_utc(end), side="left")
+        if storm_id is None:
+            return self.events.iloc[lo:hi]
+        rows = self._rows(storm_id=storm_id)
+        rows = rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+        return self.events.iloc[rows]
+
+
+def _utc(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp
+
+
+def bin_width(start, end, max_bins=MAX_BINS):
+    """Finest candidate width that covers [start, end] in at most ``max_bins`` bins"""
+    span = _utc(end) - _utc(start)
+    for width in BIN_WIDTHS:
+        if span / width <= max_bins:
+            return width
+    return BIN_WIDTHS[-1] * math.ceil(span / (BIN_WIDTHS[-1] * max_bins))
+
+
+def width_label(width):
+    """Readable bin width, e.g. '6 hours' or '7 days'"""
+    minutes = int(width / pd.Timedelta("1min"))
+    for unit, size in (("day", 1440), ("hour", 60), ("minute", 1)):
+        if minutes % size == 0:
+            count = minutes // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    return str(width)
+
+
+def bin_events(events, start, end, lane="Phase", max_bins=MAX_BINS):
+    """Aggregate events into time bins per lane: count, highest alert level and busiest event
+
+    The result has at most ``max_bins`` rows per lane category whatever the
+    number of events, so it can be embedded in a chart spec as is.
+    """
+    start, end = _utc(start), _utc(end)
+    width = bin_width(start, end, max_bins)
+    lanes = events[lane].cat
+    n_lanes = len(lanes.categories)
+    n_bins = max(int(math.ceil((end - start) / width)), 1)
+
+    times = events["Timestamp"].array.asi8
+    bins = np.clip((times - start.value) // width.value, 0, n_bins - 1)
+    lane_codes = lanes.codes.to_numpy()
+    valid = lane_codes >= 0
+    key = bins[valid] * n_lanes + lane_codes[valid]
+
+    counts = np.bincount(key, minlength=n_bins * n_lanes)
+    alerts = np.full(n_bins * n_lanes, -1, dtype=np.int64)
+    np.maximum.at(alerts, key, events["Alert_Level"].cat.codes.to_numpy()[valid])
+    occupied = np.flatnonzero(counts)
+
+    # Most frequent event name per occupied bin, for the tooltip
+    names = events["Event"].cat
+    n_names = len(names.categories)
+    pairs, pair_counts = np.unique(key * n_names + names.codes.to_numpy()[valid], return_counts=True)
+    pair_keys = pairs // n_names
+    order = np.lexsort((-pair_counts, pair_keys))
+    _, first = np.unique(pair_keys[order], return_index=True)
+    top_event = pairs[order][first] % n_names  # aligned with occupied, both ascending by key
+
+    bin_start = start + (occupied // n_lanes) * width
+    return pd.DataFrame({
+        "bin_start": bin_start,
+        "bin_end": bin_start + width,
+        lane: lanes.categories[occupied % n_lanes],
+        "events": counts[occupied],
+        "max_alert": pd.Categorical.from_codes(alerts[occupied], categories=ALERT_LEVELS, ordered=True),
+        "top_event": names.categories[top_event],
+    }), width
+
+
+def place_landfall(df, landfalls):
+    """Move each storm's "Landfall Occurs" event to the landfall computed from its track
+
+    ``landfalls`` maps storm id to a ``Landfall`` (or None). A storm with a
+    landfall but no such event gets one appended. Returns a re-sorted copy.
+    """
+    df = df.copy()
+    added = []
+    for storm_id, landfall in landfalls.items():
+        if landfall is None:
+            continue
+        timestamp = _utc(landfall.time)
+        location = f"{landfall.lat:.2f}°N, {landfall.lon:.2f}°E"
+        rows = (df["storm_id"] == storm_id) & (df["Event"] == "Landfall Occurs")
+        if rows.any():
+            if location not in df["Location"].cat.categories:
+                df["Location"] = df["Location"].cat.add_categories([location])
+            df.loc[rows, "Timestamp"] = timestamp
+            df.loc[rows, "Location"] = location
+        else:
+            added.append({"storm_id": storm_id, "Phase": "Monitoring", "Event": "Landfall Occurs",
+                          "Timestamp": timestamp, "Location": location, "Source": "Track crossing",
+                          "Alert_Level": "Critical"})
+    if added:
+        # Concatenating categoricals with new values falls back to object; restore the dtypes
+        new = pd.DataFrame(added)
+        new["Horizon"] = pd.Categorical([None] * len(new), categories=HORIZONS)
+        df = pd.concat([df.astype({c: object for c in ("storm_id", "Event", "Source", "Location")}), new],
+                       ignore_index=True)
+        for column in ("storm_id", "Event", "Source", "Location"):
+            df[column] = df[column].astype("category")
+        df["Phase"] = pd.Categorical(df["Phase"], categories=PHASES)
+        df["Alert_Level"] = pd.Categorical(df["Alert_Level"], categories=ALERT_LEVELS, ordered=True)
+    return df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+
+
+def load_events(path=EVENTS_FILE, landfalls=None):
+    """Event store for a file, with landfall events placed from track data when given"""
+    df = read_events(path)
+    if landfalls:
+        df = place_landfall(df, landfalls)
+    return EventStore(df)
@@ -0,0 +1,149 @@
+"""Columnar catalog of cyclone tracks.
+
+Track files (CSV exported by ``climada_export_tc_tracks.ipynb`` or the matching
+GeoJSON) are ingested into Parquet files partitioned by basin and year, with
+one row group per storm and a small index table. Loading a storm reads a single
+row group, keeping every attribute column.
+
+    python -m utils.tracks data/boundaries/CyclonePath/*.csv
+"""
+import argparse
+import json
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CATALOG_DIR = DATA_DIR / "catalog" / "tracks"
+# Track exports bundled with the repo, ingested when no catalog exists yet
+DEFAULT_SOURCES = sorted((DATA_DIR / "boundaries" / "CyclonePath").glob("*_track.csv"))
+
+INDEX_FILE = "index.parquet"
+KEY_COLUMNS = ["storm_id", "name", "basin", "year", "time", "lat", "lon"]
+# Basin for exports that do not carry one; IBTrACS codes ("NA" is the North Atlantic) would mislabel them
+UNKNOWN_BASIN = "UN"
+
+
+def read_track_file(path):
+    """Read one track export into a DataFrame with the catalog key columns"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        df = pd.read_csv(path)
+    elif path.suffix in (".geojson", ".json"):
+        with open(path, 'r') as f:
+            features = json.load(f)["features"]
+        df = pd.DataFrame([feat["properties"] for feat in features])
+    else:
+        raise ValueError(f"Unsupported track file: {path}")
+
+    df["time"] = pd.to_datetime(df["time"])
+
+    # Files are named {name}_{year}_track.* by the CLIMADA export notebook
+    match = re.match(r"(?P<name>.+?)_(?P<year>\d{4})_track$", path.stem)
+    if "name" not in df:
+        df["name"] = match.group("name").upper() if match else path.stem.upper()
+    if "sid" in df:
+        df = df.rename(columns={"sid": "storm_id"})
+    if "storm_id" not in df:
+        df["storm_id"] = df["name"].str.upper() + "_" + df["time"].dt.year.astype(str)
+    if "basin" not in df:
+        df["basin"] = UNKNOWN_BASIN
+
+    df["year"] = df.groupby("storm_id")["time"].transform("min").dt.year
+    return df
+
+
+def ingest(paths, catalog_dir=CATALOG_DIR):
+    """Add track files to the catalog (replacing storms already present)"""
+    catalog_dir = Path(catalog_dir)
+    new = pd.concat([read_track_file(p) for p in paths], ignore_index=True)
+
+    existing = load_all(catalog_dir) if (catalog_dir / INDEX_FILE).exists() else None
+    if existing is not None:
+        existing = existing[~existing["storm_id"].isin(new["storm_id"].unique())]
+        new = pd.concat([existing, new], ignore_index=True)
+
+    # Storms keep a single basin/year partition even if the basin changes along the track
+    storm_basin = new.groupby("storm_id")["basin"].transform("first")
+    new = new.assign(basin=storm_basin).sort_values(["storm_id", "time"])
+    columns = KEY_COLUMNS + [c for c in new.columns if c not in KEY_COLUMNS]
+    new = new[columns].reset_index(drop=True)
+
+    for old in catalog_dir.glob("basin=*/year=*/*.parquet"):
+        old.unlink()
+
+    index_rows = []
+    for (basin, year), part in new.groupby(["basin", "year"], sort=True):
+        rel_path = Path(f"basin={basin}") / f"year={year}" / "tracks.parquet"
+        out_path = catalog_dir / rel_path
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+        schema = pa.Schema.from_pandas(part, preserve_index=False)
+        with pq.ParquetWriter(out_path, schema, compression="zstd") as writer:
+            for row_group, (storm_id, storm) in enumerate(part.groupby("storm_id", sort=True)):
+                writer.write_table(pa.Table.from_pandas(storm, schema=schema, preserve_index=False))
+                index_rows.append({
+                    "storm_id": storm_id,
+                    "name": storm["name"].iloc[0],
+                    "basin": basin,
+                    "year": int(year),
+                    "start_time": storm["time"].min(),
+                    "end_time": storm["time"].max(),
+                    "n_points": len(storm),
+                    "max_wind": storm["max_sustained_wind"].max() if "max_sustained_wind" in storm else None,
+                    "min_pressure": storm["central_pressure"].min() if "central_pressure" in storm else None,
+                    "path": str(rel_path),
+                    "row_group": row_group,
+                })
+
+    index = pd.DataFrame(index_rows).sort_values(["year", "start_time"], ascending=[False, True])
+    index.to_parquet(catalog_dir / INDEX_FILE, index=False)
+    return index.reset_index(drop=True)
+
+
+def load_index(catalog_dir=CATALOG_DIR):
+    """Return the storm index, building the catalog from bundled tracks if needed"""
+    catalog_dir = Path(catalog_dir)
+    if not (catalog_dir / INDEX_FILE).exists():
+        if not DEFAULT_SOURCES:
+            return None
+        ingest(DEFAULT_SOURCES, catalog_dir)
+    return pd.read_parquet(catalog_dir / INDEX_FILE).set_index("storm_id", drop=False)
+
+
+def load_track(storm_id, catalog_dir=CATALOG_DIR, index=None):
+    """Load one storm's full track by reading its row group"""
+    index = load_index(catalog_dir) if index is None else index
+    entry = index.loc[storm_id]
+    table = pq.ParquetFile(Path(catalog_dir) / entry["path"]).read_row_group(int(entry["row_group"]))
+    return table.to_pandas()
+
+
+def load_all(catalog_dir=CATALOG_DIR, basin=None, year=None):
+    """Load every track point, optionally pruned to one basin and/or year"""
+    index = pd.read_parquet(Path(catalog_dir) / INDEX_FILE)
+    if basin is not None:
+        index = index[index["basin"] == basin]
+    if year is not None:
+        index = index[index["year"] == int(year)]
+    paths = [Path(catalog_dir) / path for path in index["path"].unique()]
+    if not paths:
+        return None
+    return pd.concat([pq.read_table(path).to_pandas() for path in paths], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest cyclone track files into the track catalog")
+    parser.add_argument("paths", nargs="*", default=[str(p) for p in DEFAULT_SOURCES])
+    parser.add_argument("--catalog-dir", default=str(CATALOG_DIR))
+    args = parser.parse_args()
+
+    index = ingest(args.paths, args.catalog_dir)
+    print(f"Catalog now holds {len(index)} storms in {args.catalog_dir}")
+
+
+if __name__ == "__main__":
+    main()
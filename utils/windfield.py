@@ -0,0 +1,160 @@
+"""Vectorized Holland (1980) parametric wind field from track data.
+
+All time steps are evaluated at once as a (time, lat, lon) array and reduced to
+a max-wind footprint. Track units follow the CLIMADA export: wind in knots,
+radius of maximum wind in nautical miles and pressures in hPa.
+"""
+import base64
+import io
+from typing import NamedTuple
+
+import numpy as np
+
+# lon_min, lat_min, lon_max, lat_max
+BANGLADESH_BOUNDS = (88.0, 20.5, 92.75, 26.75)
+
+KN_TO_MS = 0.514444
+NM_TO_KM = 1.852
+KM_PER_DEG = 111.195
+RHO_AIR = 1.15  # kg/m3
+OMEGA = 7.292e-5  # Earth rotation, rad/s
+
+# Cap on (steps x cells) evaluated at once, to bound peak memory on large grids
+MAX_CHUNK_ELEMENTS = 20_000_000
+
+
+class Footprint(NamedTuple):
+    lons: np.ndarray  # cell centres, ascending
+    lats: np.ndarray  # cell centres, ascending
+    wind: np.ndarray  # max sustained wind in m/s, shape (lat, lon)
+    first_time: np.ndarray  # first time step index with wind >= threshold (-1 if never)
+
+
+def make_grid(bounds=BANGLADESH_BOUNDS, resolution=0.05):
+    """Cell-centre longitudes and latitudes of a regular grid"""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    lons = np.arange(lon_min + resolution / 2, lon_max, resolution)
+    lats = np.arange(lat_min + resolution / 2, lat_max, resolution)
+    return lons, lats
+
+
+def _track_arrays(track):
+    """Pull the per-step parameters out of a track DataFrame as SI arrays"""
+    lat = track["lat"].to_numpy(dtype=np.float64)
+    lon = track["lon"].to_numpy(dtype=np.float64)
+    vmax = track["max_sustained_wind"].to_numpy(dtype=np.float64) * KN_TO_MS
+    rmax = track["radius_max_wind"].to_numpy(dtype=np.float64) * NM_TO_KM
+    dp = (track["environmental_pressure"] - track["central_pressure"]).to_numpy(dtype=np.float64) * 100.0
+
+    # Translation velocity (km/h) from consecutive fixes; duplicate fixes at one time are averaged first,
+    # since a zero time step would divide by zero, and every fix takes the velocity of its time
+    hours = (track["time"] - track["time"].iloc[0]).dt.total_seconds().to_numpy() / 3600.0
+    times, step = np.unique(hours, return_inverse=True)
+    if len(times) > 1:
+        counts = np.bincount(step)
+        x = np.bincount(step, lon * KM_PER_DEG * np.cos(np.radians(lat))) / counts
+        y = np.bincount(step, lat * KM_PER_DEG) / counts
+        vx = np.gradient(x, times)[step]
+        vy = np.gradient(y, times)[step]
+    else:
+        vx = vy = np.zeros_like(lat)
+    trans = np.column_stack([vx, vy]) / 3.6  # m/s
+    return lat, lon, vmax, rmax, np.clip(dp, 100.0, None), trans
+
+
+def _holland_speed(dx, dy, lat_c, vmax, rmax, dp, tx, ty, trans_factor):
+    """Wind speed (m/s) and distance (km) at offsets (dx, dy) km east/north of the centre; arguments broadcast"""
+    r = np.hypot(dx, dy)
+    r_safe = np.maximum(r, 0.1)
+
+    # Holland B from the observed Vmax and pressure drop, bounded to the usual range
+    b = np.clip(RHO_AIR * np.e * vmax ** 2 / dp, 1.0, 2.5)
+    f = 2 * OMEGA * np.abs(np.sin(np.radians(lat_c)))
+    x = (rmax / r_safe) ** b
+    rf2 = r_safe * 1000.0 * f / 2
+    v = np.sqrt(b / RHO_AIR * dp * x * np.exp(-x) + rf2 ** 2) - rf2
+
+    # Forward-motion asymmetry: add part of the translation speed along the cyclonic flow
+    sign = np.where(lat_c >= 0, 1.0, -1.0)
+    v = v + trans_factor * sign * (-dy * tx + dx * ty) / r_safe * np.minimum(r_safe / rmax, 1.0)
+    return np.maximum(v, 0.0), r
+
+
+def _holland(params, lons, lats, max_radius_km, trans_factor):
+    lat_c, lon_c, vmax, rmax, dp, trans = params
+    lat_c, lon_c, vmax, rmax, dp = (a[:, None, None] for a in (lat_c, lon_c, vmax, rmax, dp))
+
+    # Local tangent-plane offsets from the storm centre, km
+    dx = (lons[None, None, :] - lon_c) * KM_PER_DEG * np.cos(np.radians(lat_c))
+    dy = (lats[None, :, None] - lat_c) * KM_PER_DEG
+    v, r = _holland_speed(dx, dy, lat_c, vmax, rmax, dp, trans[:, 0, None, None], trans[:, 1, None, None],
+                          trans_factor)
+    return np.where(r <= max_radius_km, v, 0.0).astype(np.float32)
+
+
+def holland_wind_field(track, lons, lats, max_radius_km=500.0, trans_factor=0.5):
+    """Sustained wind speed (m/s) for every time step, shape (time, lat, lon)"""
+    return _holland(_track_arrays(track), lons, lats, max_radius_km, trans_factor)
+
+
+def wind_at_points(track, steps, lons, lats, max_radius_km=500.0, trans_factor=0.5):
+    """Sustained wind (m/s) at paired samples: point ``(lons[i], lats[i])`` at track step ``steps[i]``"""
+    lat_c, lon_c, vmax, rmax, dp, trans = (a[steps] for a in _track_arrays(track))
+    dx = (np.asarray(lons) - lon_c) * KM_PER_DEG * np.cos(np.radians(lat_c))
+    dy = (np.asarray(lats) - lat_c) * KM_PER_DEG
+    v, r = _holland_speed(dx, dy, lat_c, vmax, rmax, dp, trans[:, 0], trans[:, 1], trans_factor)
+    return np.where(r <= max_radius_km, v, 0.0).astype(np.float32)
+
+
+def max_wind_footprint(track, bounds=BANGLADESH_BOUNDS, resolution=0.05, threshold=17.0,
+                       max_radius_km=500.0, trans_factor=0.5):
+    """Reduce the wind field of a full track to its max-wind footprint
+
+    Time steps are evaluated in blocks so peak memory stays bounded on large
+    grids; within a block every step and cell is computed at once. ``first_time``
+    records the first step at which each cell reaches ``threshold`` (gale force
+    by default).
+    """
+    lons, lats = make_grid(bounds, resolution)
+    params = _track_arrays(track)
+    n_steps = len(track)
+    block = max(1, MAX_CHUNK_ELEMENTS // max(lons.size * lats.size, 1))
+
+    wind = np.zeros((lats.size, lons.size), dtype=np.float32)
+    first_time = np.full((lats.size, lons.size), -1, dtype=np.int32)
+    for start in range(0, n_steps, block):
+        chunk = tuple(a[start:start + block] for a in params)
+        field = _holland(chunk, lons, lats, max_radius_km, trans_factor)
+        np.maximum(wind, field.max(axis=0), out=wind)
+
+        hit = field >= threshold
+        first = np.where(hit.any(axis=0), hit.argmax(axis=0) + start, -1)
+        first_time = np.where(first_time < 0, first, first_time)
+    return Footprint(lons, lats, wind, first_time)
+
+
+def footprint_image(footprint, vmax=70.0, min_wind=10.0):
+    """Render a footprint as a PNG data URL plus its [W, S, E, N] bounds for a BitmapLayer"""
+    from PIL import Image
+
+    # Yellow -> red ramp with transparency below min_wind
+    scaled = np.clip((footprint.wind - min_wind) / (vmax - min_wind), 0.0, 1.0)
+    rgba = np.zeros(footprint.wind.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = 255
+    rgba[..., 1] = (220 * (1.0 - scaled)).astype(np.uint8)
+    rgba[..., 3] = np.where(footprint.wind >= min_wind, 80 + 150 * scaled, 0).astype(np.uint8)
+
+    # Image rows run north to south
+    buffer = io.BytesIO()
+    Image.fromarray(rgba[::-1]).save(buffer, format="PNG")
+    url = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    half_lon = (footprint.lons[1] - footprint.lons[0]) / 2 if footprint.lons.size > 1 else 0.0
+    half_lat = (footprint.lats[1] - footprint.lats[0]) / 2 if footprint.lats.size > 1 else 0.0
+    bounds = [
+        float(footprint.lons[0] - half_lon),
+        float(footprint.lats[0] - half_lat),
+        float(footprint.lons[-1] + half_lon),
+        float(footprint.lats[-1] + half_lat),
+    ]
+    return url, bounds
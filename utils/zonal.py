@@ -0,0 +1,315 @@
+"""Windowed zonal statistics of population and hazard rasters per admin unit.
+
+Admin polygons are burned once into a label raster on the population grid
+(the unit index of every cell), cached on disk as a memory-mapped ``.npy``
+keyed by the grid and the polygons. Statistics are then accumulated a strip of
+rows at a time: the population strip is read through a rasterio window, the
+same rows of the label raster are paged in from the memmap, hazard values are
+sampled at the strip's cell centres, and per-unit sums are added with
+``np.bincount``. Peak memory is set by the strip size, not the grid, so a
+country-scale 100 m population grid runs in flat memory.
+
+Rasters must be north-up in lon/lat (e.g. WorldPop EPSG:4326 GeoTIFFs).
+rasterio is imported lazily (``utils.lazy``), so pages that only reference
+the raster paths do not load it at start-up.
+
+    python -m utils.zonal --level "Admin Level 3" --hazard wind.tif --output exposure.csv
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from utils.exposure import unit_names
+from utils.lazy import lazy_import
+
+rasterio = lazy_import("rasterio")
+rasterio_features = lazy_import("rasterio.features")
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+# POPULATION_RASTER / CHILDREN_RASTER point at other grids (e.g. WorldPop total and under-18)
+POPULATION_RASTER = Path(os.environ.get("POPULATION_RASTER", DATA_DIR / "population" / "population.tif"))
+CHILDREN_RASTER = Path(os.environ.get("CHILDREN_RASTER", DATA_DIR / "population" / "children.tif"))
+ZONE_DIR = DATA_DIR / "zones"
+
+# Cells per strip; bounds the working set of one pass over the grid
+MAX_STRIP_CELLS = 4_000_000
+# Bump when the label raster layout changes, so stale cached masks are rebuilt
+MASK_VERSION = 1
+
+_masks = {}  # cache key -> read-only memmap
+_masks_lock = threading.Lock()
+
+
+class Grid(NamedTuple):
+    width: int
+    height: int
+    transform: tuple  # GDAL-order affine coefficients (a, b, c, d, e, f)
+    crs: str
+
+
+def grid_of(dataset):
+    """Grid of an open rasterio dataset, checked to be north-up lon/lat"""
+    transform = dataset.transform
+    if transform.b != 0 or transform.d != 0 or transform.e >= 0:
+        raise ValueError(f"{dataset.name} is not a north-up grid")
+    if dataset.crs is not None and not dataset.crs.is_geographic:
+        raise ValueError(f"{dataset.name} must be in lon/lat (EPSG:4326), not {dataset.crs}")
+    return Grid(dataset.width, dataset.height, tuple(transform)[:6], str(dataset.crs or "EPSG:4326"))
+
+
+def strips(grid, max_cells=MAX_STRIP_CELLS, block_rows=1):
+    """(first row, row count) of horizontal strips of at most ``max_cells``, aligned to the block height"""
+    rows = max(block_rows, (max_cells // grid.width) // block_rows * block_rows)
+    for row in range(0, grid.height, rows):
+        yield row, min(rows, grid.height - row)
+
+
+def _cell_centres(grid, row, n_rows):
+    a, _, c, _, e, f = grid.transform
+    xs = c + a * (np.arange(grid.width) + 0.5)
+    ys = f + e * (np.arange(row, row + n_rows) + 0.5)
+    return xs, ys
+
+
+# — Zone masks —
+
+def mask_key(geoms, grid):
+    """Content hash of the polygons and the grid they are burned into"""
+    digest = hashlib.sha1(repr((MASK_VERSION, tuple(grid))).encode())
+    for wkb in shapely.to_wkb(geoms):
+        digest.update(wkb)
+    return digest.hexdigest()[:20]
+
+
+def _build_mask(geoms, grid, path):
+    """Build the label raster for ``geoms`` on ``grid`` and move it into place at ``path``"""
+    # Unique per writer: batch workers or sessions building the same mask must not share a partial file
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.", suffix=".partial.npy",
+                                     delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        _burn_labels(geoms, grid, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _burn_labels(geoms, grid, tmp_path):
+    """Burn unit indices into an int32 memmap strip by strip (-1 outside every unit)"""
+    tree = shapely.STRtree(geoms)
+    transform = rasterio.transform.Affine(*grid.transform)
+    labels = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.int32, shape=(grid.height, grid.width))
+    for row, n_rows in strips(grid):
+        west, top = transform * (0, row)
+        east, bottom = transform * (grid.width, row + n_rows)
+        units = tree.query(shapely.box(west, bottom, east, top))
+        out = labels[row:row + n_rows]
+        if units.size == 0:
+            out[:] = -1
+            continue
+        rasterio_features.rasterize(
+            zip(geoms[units], units.tolist()),
+            out=out,
+            transform=transform * rasterio.transform.Affine.translation(0, row),
+            fill=-1,
+        )
+    labels.flush()
+    del labels
+
+
+def zone_mask(geoms, grid, cache_dir=ZONE_DIR):
+    """Read-only memmap of unit indices on ``grid``, rasterized on first use and cached on disk"""
+    geoms = np.asarray(geoms)
+    key = mask_key(geoms, grid)
+    with _masks_lock:
+        mask = _masks.get(key)
+        if mask is not None:
+            return mask
+        path = Path(cache_dir) / f"{key}.npy"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _build_mask(geoms, grid, path)
+        mask = np.load(path, mmap_mode="r")
+        _masks[key] = mask
+        return mask
+
+
+# — Hazard layers —
+
+class ArrayHazard:
+    """In-memory hazard grid (e.g. a modelled wind footprint)"""
+
+    def __init__(self, values, transform):
+        self.values = values
+        self.transform = rasterio.transform.Affine(*tuple(transform)[:6])
+        self.shape = values.shape
+
+    def read(self, rows, cols):
+        return self.values[rows, cols].astype(np.float32)
+
+
+class RasterHazard:
+    """Hazard raster on disk, read one window at a time"""
+
+    def __init__(self, path, band=1):
+        self.dataset = rasterio.open(path)
+        grid_of(self.dataset)
+        self.band = band
+        self.transform = self.dataset.transform
+        self.shape = (self.dataset.height, self.dataset.width)
+
+    def read(self, rows, cols):
+        window = rasterio.windows.Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+        values = self.dataset.read(self.band, window=window).astype(np.float32)
+        if self.dataset.nodata is not None:
+            values[values == self.dataset.nodata] = np.nan
+        return values
+
+    def close(self):
+        self.dataset.close()
+
+
+def footprint_hazard(footprint):
+    """Max-wind footprint (m/s) as a hazard layer"""
+    dx = footprint.lons[1] - footprint.lons[0]
+    dy = footprint.lats[1] - footprint.lats[0]
+    # Footprint rows run south to north; rasters run north to south
+    transform = rasterio.transform.from_origin(footprint.lons[0] - dx / 2, footprint.lats[-1] + dy / 2, dx, dy)
+    return ArrayHazard(footprint.wind[::-1], transform)
+
+
+def _sample(hazard, xs, ys):
+    """Nearest hazard value at every (ys x xs) cell centre, NaN outside the hazard grid"""
+    inverse = ~hazard.transform
+    cols = np.floor(inverse.a * xs + inverse.c).astype(np.int64)
+    rows = np.floor(inverse.e * ys + inverse.f).astype(np.int64)
+    col_ok = (cols >= 0) & (cols < hazard.shape[1])
+    row_ok = (rows >= 0) & (rows < hazard.shape[0])
+    values = np.full((ys.size, xs.size), np.nan, dtype=np.float32)
+    if not col_ok.any() or not row_ok.any():
+        return values
+    c0, c1 = cols[col_ok].min(), cols[col_ok].max() + 1
+    r0, r1 = rows[row_ok].min(), rows[row_ok].max() + 1
+    block = hazard.read(slice(r0, r1), slice(c0, c1))
+    values[np.ix_(row_ok, col_ok)] = block[np.ix_(rows[row_ok] - r0, cols[col_ok] - c0)]
+    return values
+
+
+# — Zonal statistics —
+
+def _read_counts(dataset, window):
+    counts = dataset.read(1, window=window).astype(np.float64)
+    if dataset.nodata is not None:
+        counts[counts == dataset.nodata] = 0.0
+    counts[~np.isfinite(counts) | (counts < 0)] = 0.0
+    return counts
+
+
+def zonal_exposure(geoms, properties, population, hazard, children=None, threshold=17.0,
+                   max_cells=MAX_STRIP_CELLS, cache_dir=ZONE_DIR):
+    """Per-unit population, population-weighted hazard and population at or above ``threshold``
+
+    ``population`` (and optional ``children``, on the same grid) are raster
+    paths; ``hazard`` is an ``ArrayHazard`` or ``RasterHazard`` sampled at the
+    population cell centres. Units with no cell centre inside get zero counts
+    and NaN hazard.
+    """
+    geoms = np.asarray(geoms)
+    n_units = len(geoms)
+    sums = {key: np.zeros(n_units) for key in ("population", "covered", "weighted", "exposed", "children",
+                                               "exposed_children")}
+    peak = np.full(n_units, -np.inf, dtype=np.float32)
+    n_cells = np.zeros(n_units, dtype=np.int64)
+
+    with rasterio.open(population) as pop_ds:
+        grid = grid_of(pop_ds)
+        child_ds = rasterio.open(children) if children is not None else None
+        try:
+            if child_ds is not None and grid_of(child_ds) != grid:
+                raise ValueError(f"{children} is not on the population grid")
+            mask = zone_mask(geoms, grid, cache_dir=cache_dir)
+            block_rows = pop_ds.block_shapes[0][0]
+            for row, n_rows in strips(grid, max_cells, block_rows):
+                window = rasterio.windows.Window(0, row, grid.width, n_rows)
+                labels = np.asarray(mask[row:row + n_rows]).ravel()
+                inside = labels >= 0
+                if not inside.any():
+                    continue
+                units = labels[inside]
+                pop = _read_counts(pop_ds, window).ravel()[inside]
+                xs, ys = _cell_centres(grid, row, n_rows)
+                values = _sample(hazard, xs, ys).ravel()[inside]
+                covered = ~np.isnan(values)
+                hit = values >= threshold  # NaN compares False
+
+                n_cells += np.bincount(units, minlength=n_units)
+                sums["population"] += np.bincount(units, weights=pop, minlength=n_units)
+                sums["covered"] += np.bincount(units[covered], weights=pop[covered], minlength=n_units)
+                sums["weighted"] += np.bincount(units[covered], weights=pop[covered] * values[covered],
+                                                minlength=n_units)
+                sums["exposed"] += np.bincount(units[hit], weights=pop[hit], minlength=n_units)
+                np.maximum.at(peak, units[covered], values[covered])
+                if child_ds is not None:
+                    kids = _read_counts(child_ds, window).ravel()[inside]
+                    sums["children"] += np.bincount(units, weights=kids, minlength=n_units)
+                    sums["exposed_children"] += np.bincount(units[hit], weights=kids[hit], minlength=n_units)
+        finally:
+            if child_ds is not None:
+                child_ds.close()
+
+    population_total = sums["population"]
+    table = pd.DataFrame({
+        "unit": np.arange(n_units),
+        "name": unit_names(properties),
+        "population": population_total.round(),
+        "exposed_population": sums["exposed"].round(),
+        "exposed_share": np.divide(sums["exposed"], population_total, out=np.zeros(n_units),
+                                   where=population_total > 0),
+        "pop_weighted_hazard": np.divide(sums["weighted"], sums["covered"], out=np.full(n_units, np.nan),
+                                         where=sums["covered"] > 0),
+        "max_hazard": np.where(np.isfinite(peak), peak, np.nan),
+        "n_cells": n_cells,
+    })
+    if children is not None:
+        table.insert(4, "children", sums["children"].round())
+        table.insert(5, "exposed_children", sums["exposed_children"].round())
+    return table.sort_values("exposed_population", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def main():
+    from utils.boundaries import get_boundary_store
+
+    parser = argparse.ArgumentParser(description="Population-weighted hazard per admin unit")
+    parser.add_argument("--level", default="Admin Level 3")
+    parser.add_argument("--population", type=Path, default=POPULATION_RASTER)
+    parser.add_argument("--children", type=Path, default=CHILDREN_RASTER if CHILDREN_RASTER.exists() else None)
+    parser.add_argument("--hazard", type=Path, required=True, help="hazard GeoTIFF, e.g. max wind in m/s")
+    parser.add_argument("--threshold", type=float, default=17.0)
+    parser.add_argument("--output", type=Path, help="CSV to write (printed otherwise)")
+    args = parser.parse_args()
+
+    store = get_boundary_store()
+    hazard = RasterHazard(args.hazard)
+    try:
+        table = zonal_exposure(store.geometries(args.level), store.properties(args.level), args.population,
+                               hazard, children=args.children, threshold=args.threshold)
+    finally:
+        hazard.close()
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Wrote {len(table)} units to {args.output}")
+    else:
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()